@@ -2,8 +2,11 @@
 用户代理 (UserAgent)
 代表具有确认偏误的信息消费者
 """
+from collections import deque
+
 import numpy as np
 from mesa import Agent
+from content import slant_distance
 
 
 class UserAgent(Agent):
@@ -11,18 +14,63 @@ class UserAgent(Agent):
     代表一个具有确认偏误的用户
     
     属性:
-        belief: 当前信念，范围 [-1.0, 1.0]
+        belief: 当前信念，范围 [-1.0, 1.0]（多维时为每个分量都在该范围内的向量）
         P_strength: 确认偏误强度 (0-1)，控制选择性接触的强度
         learning_rate: 信念更新速率
-        history: 消费内容的历史记录
+        feed_size: 每次获取的信息流大小
+        consume_per_step: 每步从信息流中消费的内容数量
+        history: 消费内容的历史记录（设置 history_limit 时只保留最近的记录）
+        index: 在模型信念数组 model.beliefs 中的位置
+    
+    belief、P_strength、learning_rate、feed_size、consume_per_step 都存放在模型的每用户数组中，
+    代理只是这些数组元素的视图，便于模型对全体用户做向量化计算
     """
     
-    def __init__(self, model, initial_belief, P_strength, learning_rate=0.05):
+    def __init__(self, model, index, P_strength, learning_rate=0.05, history_limit=None):
         super().__init__(model)
-        self.belief = initial_belief
+        self.index = index
         self.P_strength = P_strength
         self.learning_rate = learning_rate
-        self.history = []  # 记录消费过的内容
+        # 记录消费过的内容
+        self.history = [] if history_limit is None else deque(maxlen=history_limit)
+    
+    @property
+    def belief(self):
+        """当前信念，存放在模型的信念数组中（多维时返回副本，避免记录被后续更新改写）"""
+        belief = self.model.beliefs[self.index]
+        return belief if self.model.belief_dim == 1 else belief.copy()
+    
+    @belief.setter
+    def belief(self, value):
+        self.model.beliefs[self.index] = value
+    
+    @property
+    def P_strength(self):
+        """确认偏误强度，存放在模型的 agent_P 数组中"""
+        return self.model.agent_P[self.index]
+    
+    @P_strength.setter
+    def P_strength(self, value):
+        self.model.agent_P[self.index] = value
+    
+    @property
+    def learning_rate(self):
+        """信念更新速率，存放在模型的 agent_learning_rate 数组中"""
+        return self.model.agent_learning_rate[self.index]
+    
+    @learning_rate.setter
+    def learning_rate(self, value):
+        self.model.agent_learning_rate[self.index] = value
+    
+    @property
+    def feed_size(self):
+        """信息流大小，存放在模型的 agent_feed_size 数组中"""
+        return self.model.agent_feed_size[self.index]
+
+    @property
+    def consume_per_step(self):
+        """每步消费的内容数量，存放在模型的 agent_consume 数组中"""
+        return self.model.agent_consume[self.index]
         
     def step(self):
         """
@@ -30,9 +78,14 @@ class UserAgent(Agent):
         1. 从平台获取个性化信息流
         2. 基于确认偏误选择内容
         3. 更新信念（强化螺旋）
+        
+        每步消费多个内容时，一次批量选择并按消费顺序批量更新信念
         """
         # 1. 获取平台推荐的信息流
-        feed = self.model.generate_feed(self, feed_size=10)
+        feed = self.model.get_feed(self)
+        if self.consume_per_step > 1:
+            self.consume_many(feed, self.consume_per_step)
+            return
         
         # 2. 基于确认偏误选择内容（实现 P 机制）
         selected_item = self.select_content(feed)
@@ -40,12 +93,87 @@ class UserAgent(Agent):
         if selected_item is not None:
             # 3. 消费内容并更新信念
             self.update_belief(selected_item)
+            self.model.record_consumption(self, selected_item)
             self.history.append({
                 'step': self.model.steps,
                 'slant': selected_item['slant'],
                 'belief_after': self.belief
             })
     
+    def consume_many(self, feed, count):
+        """
+        从信息流中消费多个内容：批量选择、批量更新信念并记录
+
+        Args:
+            feed: 平台提供的信息流列表
+            count: 消费数量
+        """
+        items = self.select_contents(feed, count)
+        if not items:
+            return
+        path = self.update_beliefs(items)
+        self.model.record_consumptions(self, np.array([item['slot'] for item in items]))
+        step = self.model.steps
+        self.history.extend(
+            {'step': step, 'slant': item['slant'], 'belief_after': belief}
+            for item, belief in zip(items, path)
+        )
+    
+    def select_contents(self, feed, count):
+        """
+        基于确认偏误从信息流中一次选择多个内容（吸引力与 select_content 相同）
+        
+        不放回时使用 Gumbel-top-k，结果的顺序与逐个不放回抽样的顺序同分布；
+        同一步内的多次选择都基于步开始时的信念
+        
+        Args:
+            feed: 平台提供的信息流列表
+            count: 选择数量（不放回时不超过信息流大小）
+            
+        Returns:
+            按消费顺序排列的内容项列表
+        """
+        if not feed:
+            return []
+        distances = slant_distance(np.array([item['slant'] for item in feed]), self.belief)
+        log_attractiveness = -distances * (self.P_strength * 5)
+        if not np.isfinite(log_attractiveness).any():
+            # 容错：吸引力全为零时均匀选择
+            log_attractiveness = np.zeros(len(feed))
+        
+        if self.model.consume_with_replacement:
+            weights = np.exp(log_attractiveness - log_attractiveness.max())
+            chosen = np.random.choice(len(feed), count, p=weights / weights.sum())
+        else:
+            keys = log_attractiveness - np.log(-np.log(np.random.random(len(feed))))
+            chosen = np.argsort(-keys)[:count]
+        return [feed[i] for i in chosen]
+    
+    def update_beliefs(self, items):
+        """
+        按消费顺序依次向多个内容靠拢的批量信念更新
+        
+        第 j 个内容之后的信念为闭式解
+        b_j = (1-lr)^(j+1) · b + Σ_{i<=j} lr · (1-lr)^(j-i) · s_i，
+        用一次下三角矩阵乘法得到全部中间信念
+        
+        Args:
+            items: 按消费顺序排列的内容项列表
+            
+        Returns:
+            每个内容消费之后的信念序列（最后一个为新的信念）
+        """
+        slants = np.array([item['slant'] for item in items])
+        rate = self.learning_rate
+        order = np.arange(len(items))
+        lags = np.subtract.outer(order, order)
+        weights = np.where(lags >= 0, rate * (1.0 - rate) ** np.maximum(lags, 0), 0.0)
+        retained = (1.0 - rate) ** (order + 1)
+        path = weights @ slants + np.multiply.outer(retained, self.belief)
+        np.clip(path, -1.0, 1.0, out=path)
+        self.belief = path[-1]
+        return path
+    
     def select_content(self, feed):
         """
         基于确认偏误从信息流中选择内容
@@ -61,7 +189,7 @@ class UserAgent(Agent):
             return None
         
         # 1. 计算信息流中每个内容与用户信念的距离
-        distances = np.array([abs(self.belief - item['slant']) for item in feed])
+        distances = slant_distance(np.array([item['slant'] for item in feed]), self.belief)
         
         # 2. 将距离转化为吸引力（使用指数衰减）
         # P_strength 从 0-1 缩放到 0-5，控制衰减速度（降低以避免过度锁定）
@@ -2,15 +2,21 @@
 单次模拟分析脚本
 用于快速测试和分析单个配置的模型运行
 """
+import os
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 matplotlib.rcParams['axes.unicode_minus'] = False
 from model import PlatformModel
+from metrics import compute_metrics
+from catalog import RunCatalog, model_params
 
 
-def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200):
+def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200, seed=None,
+                    catalog_root='runs'):
     """
     运行单次模拟并生成详细分析
     
@@ -19,18 +25,25 @@ def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200):
         P_strength: 确认偏误强度
         num_users: 用户数量
         steps: 模拟步数
+        seed: 随机数种子（None 表示随机抽取一个并登记）
+        catalog_root: 运行目录的根路径（None 表示不登记，图片保存在当前目录）
     """
     print("="*70)
     print(f"运行模拟: Q={Q_strength}, P={P_strength}")
     print("="*70)
     
     # 创建并运行模型
+    if seed is None:
+        seed = np.random.randint(2**31 - 1)
+    start = time.perf_counter()
     model = PlatformModel(
         num_users=num_users,
         Q_strength=Q_strength,
         P_strength=P_strength,
         learning_rate=0.05,
-        content_pool_size=1000
+        content_pool_size=1000,
+        record_trajectory=True,
+        seed=seed
     )
     
     print(f"\n模拟 {steps} 个时间步...")
@@ -38,12 +51,15 @@ def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200):
         model.step()
         if (i + 1) % 50 == 0:
             print(f"进度: {i+1}/{steps}")
+    # 记录最后一步之后的状态，数据的最后一行即为最终结果
+    model.collect()
     
     print("\n✓ 模拟完成！\n")
+    duration = time.perf_counter() - start
     
     # 获取数据
     model_data = model.datacollector.get_model_vars_dataframe()
-    agent_data = model.datacollector.get_agent_vars_dataframe()
+    trajectory = model.trajectory
     
     # 统计分析
     print("="*70)
@@ -60,8 +76,8 @@ def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200):
     print(f"  增长量:   {polarization_increase:.4f}")
     print(f"  增长率:   {(polarization_increase/initial_polarization*100):.1f}%")
     
-    initial_beliefs = agent_data.xs(0, level='Step')['Belief'].values
-    final_beliefs = agent_data.xs(steps-1, level='Step')['Belief'].values
+    initial_beliefs = trajectory.initial
+    final_beliefs = trajectory.final
     
     print(f"\n【信念分布】")
     print(f"  初始均值: {np.mean(initial_beliefs):.3f}")
@@ -70,15 +86,26 @@ def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200):
     print(f"  最终标准差: {np.std(final_beliefs):.3f}")
     
     # 检测双峰分布（极化的标志）
-    final_left = np.sum(final_beliefs < -0.3)
-    final_center = np.sum((final_beliefs >= -0.3) & (final_beliefs <= 0.3))
-    final_right = np.sum(final_beliefs > 0.3)
+    final_metrics = compute_metrics(final_beliefs)
+    final_left = round(final_metrics['left_share'] * num_users)
+    final_center = round(final_metrics['center_share'] * num_users)
+    final_right = round(final_metrics['right_share'] * num_users)
     
     print(f"\n【观点分布】")
     print(f"  左翼 (< -0.3):  {final_left} 人 ({final_left/num_users*100:.1f}%)")
     print(f"  中间 (-0.3~0.3): {final_center} 人 ({final_center/num_users*100:.1f}%)")
     print(f"  右翼 (> 0.3):   {final_right} 人 ({final_right/num_users*100:.1f}%)")
     
+    print(f"\n【极化指标】")
+    print(f"  双峰系数:       {final_metrics['bimodality']:.3f} (> 0.555 提示双峰)")
+    print(f"  平均绝对差:     {final_metrics['mean_abs_diff']:.4f}")
+    print(f"  Esteban-Ray:    {final_metrics['esteban_ray']:.4f}")
+    print(f"  Esteban-Ray(细): {final_metrics['esteban_ray_fine']:.6f} "
+          f"(误差 ≤ {final_metrics['esteban_ray_fine_error']:.1e})")
+    print(f"  直方图熵:       {final_metrics['entropy']:.3f}")
+    print(f"  群体距离指数:   {final_metrics['group_distance']:.3f}")
+    print(f"  极端观点比例:   {final_metrics['extremism']*100:.1f}%")
+    
     # 可视化
     fig = plt.figure(figsize=(16, 10))
     
@@ -146,13 +173,21 @@ def run_and_analyze(Q_strength=0.8, P_strength=0.8, num_users=100, steps=200):
     plt.tight_layout()
     
     filename = f'analysis_Q{Q_strength}_P{P_strength}.png'
+    if catalog_root is not None:
+        with RunCatalog(catalog_root) as catalog:
+            batch_id, directory = catalog.new_batch('analyze.py')
+            run_id = catalog.record_run(batch_id, model_params(model), seed=seed, steps=steps,
+                                        duration=duration,
+                                        metrics={'polarization': final_polarization, **final_metrics})
+            catalog.add_artifact(batch_id, filename, os.path.join(directory, filename), run_id)
+        filename = os.path.join(directory, filename)
     plt.savefig(filename, dpi=300, bbox_inches='tight')
     print(f"\n可视化结果已保存至: {filename}")
     plt.show()
     
     print("="*70)
     
-    return model, model_data, agent_data
+    return model, model_data, trajectory
 
 
 if __name__ == "__main__":
@@ -164,7 +199,7 @@ if __name__ == "__main__":
     
     # 运行分析
     # 可以修改这里的参数来测试不同场景
-    model, model_data, agent_data = run_and_analyze(
+    model, model_data, trajectory = run_and_analyze(
         Q_strength=0.8,  # 算法个性化强度
         P_strength=0.8,  # 确认偏误强度
         num_users=100,   # 用户数量
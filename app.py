@@ -1,20 +1,46 @@
 """
 完全自定义的 Solara 可视化界面
 避免使用 Mesa SolaraViz 的 bug
+
+每个浏览器会话拥有独立的模型实例（见 sessions.py），
+并发会话数、单个模型的内存预算和空闲回收时间可通过环境变量配置
 """
+import os
 import solara
+import solara.lab
 import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 matplotlib.rcParams['axes.unicode_minus'] = False
-import numpy as np
-from model import PlatformModel
+from sessions import SessionManager, SessionLimitError
+from profiler import PHASE_LABELS
+
+
+# 会话注册表：模型按会话隔离，不在浏览器会话之间共享
+sessions = SessionManager(
+    max_sessions=int(os.environ.get('FB_MAX_SESSIONS', 30)),
+    idle_timeout=float(os.environ.get('FB_IDLE_TIMEOUT', 1800)),
+    history_limit=int(os.environ.get('FB_HISTORY_LIMIT', 50)),
+    max_records=int(os.environ.get('FB_MAX_RECORDS', 1000)),
+    max_users=int(os.environ.get('FB_MAX_USERS', 500))
+)
+sessions.start_eviction(interval=float(os.environ.get('FB_EVICT_INTERVAL', 60)))
+
+
+def _track_page():
+    """每个页面（内核）启动时登记，关闭时注销；会话的最后一个页面关闭后立即释放模型"""
+    session_id = solara.get_session_id()
+    sessions.connect(session_id)
+    return lambda: sessions.disconnect(session_id)
+
 
+solara.lab.on_kernel_start(_track_page)
 
-# 全局状态
-model = solara.reactive(None)
+# 界面状态（每次重置或运行后递增 revision，触发图表重新绘制）
 running = solara.reactive(False)
 step_count = solara.reactive(0)
+revision = solara.reactive(0)
+session_error = solara.reactive(None)
 
 # 参数状态
 num_users = solara.reactive(100)
@@ -22,52 +48,74 @@ Q_strength = solara.reactive(0.5)
 P_strength = solara.reactive(0.5)
 learning_rate = solara.reactive(0.05)
 content_pool_size = solara.reactive(1000)
+profiling = solara.reactive(False)
+
+
+def current_model():
+    """当前会话的模型（未创建或已因空闲被回收时为 None）"""
+    return sessions.get(solara.get_session_id())
 
 
 def reset_model():
     """重置模型"""
-    model.value = PlatformModel(
-        num_users=num_users.value,
-        Q_strength=Q_strength.value,
-        P_strength=P_strength.value,
-        learning_rate=learning_rate.value,
-        content_pool_size=content_pool_size.value
-    )
+    try:
+        sessions.create(
+            solara.get_session_id(),
+            num_users=num_users.value,
+            Q_strength=Q_strength.value,
+            P_strength=P_strength.value,
+            learning_rate=learning_rate.value,
+            content_pool_size=content_pool_size.value,
+            profile=profiling.value
+        )
+        session_error.value = None
+    except SessionLimitError as e:
+        session_error.value = str(e)
     step_count.value = 0
+    revision.value += 1
 
 
 def step_model():
     """运行一步"""
-    if model.value is not None:
-        model.value.step()
-        step_count.value = model.value.steps
+    m = current_model()
+    if m is not None:
+        m.step()
+        step_count.value = m.steps
+    revision.value += 1
 
 
 @solara.component
 def ControlPanel():
     """控制面板"""
+    _ = revision.value  # 订阅刷新信号
     with solara.Card("控制面板"):
         solara.SliderInt("用户数量", value=num_users, min=10, max=500, step=10)
         solara.SliderFloat("算法个性化强度 (Q)", value=Q_strength, min=0.0, max=1.0, step=0.1)
         solara.SliderFloat("确认偏误强度 (P)", value=P_strength, min=0.0, max=1.0, step=0.1)
         solara.SliderFloat("信念更新速率", value=learning_rate, min=0.01, max=0.2, step=0.01)
         solara.SliderInt("内容池大小", value=content_pool_size, min=100, max=2000, step=100)
+        solara.Checkbox(label="性能剖析（重置后生效）", value=profiling)
         
         with solara.Row():
             solara.Button("重置模型", on_click=reset_model, color="primary")
-            solara.Button("运行一步", on_click=step_model, disabled=model.value is None)
+            solara.Button("运行一步", on_click=step_model, disabled=current_model() is None)
 
 
 @solara.component
 def ModelInfo():
     """模型信息"""
-    if model.value is None:
+    _ = revision.value  # 订阅刷新信号
+    if session_error.value is not None:
+        solara.Error(session_error.value)
+        return
+    m = current_model()
+    if m is None:
         solara.Warning("请先点击'重置模型'创建模型")
         return
     
     # 判断场景
-    Q = model.value.Q_strength
-    P = model.value.P_strength
+    Q = m.Q_strength
+    P = m.P_strength
     
     if Q < 0.3 and P < 0.3:
         scenario = "🔷 基线场景 (低P低Q)"
@@ -97,8 +145,8 @@ def ModelInfo():
 ---
 
 **模型状态:**
-- 当前步数: {model.value.steps}
-- 用户数量: {model.value.num_users}
+- 当前步数: {m.steps}
+- 用户数量: {m.num_users}
 - Q 强度: {Q:.2f}
 - P 强度: {P:.2f}
 """)
@@ -107,72 +155,83 @@ def ModelInfo():
 @solara.component
 def BeliefDistribution():
     """信念分布图"""
-    if model.value is None or len(model.value.agents) == 0:
+    _ = revision.value  # 订阅刷新信号
+    m = current_model()
+    if m is None or len(m.agents) == 0:
         solara.Info("等待模型初始化...")
         return
     
-    beliefs = [agent.belief for agent in model.value.agents]
     
+    # 直接绘制模型维护的直方图计数，绘图开销与用户数量无关
     fig, ax = plt.subplots(figsize=(8, 5))
-    ax.hist(beliefs, bins=20, range=(-1, 1), color='steelblue', edgecolor='black', alpha=0.7)
+    ax.hist(m.histogram_edges[:-1], bins=m.histogram_edges, weights=m.belief_histogram,
+            color='steelblue', edgecolor='black', alpha=0.7)
     ax.axvline(x=0, color='red', linestyle='--', linewidth=2, alpha=0.5)
     ax.set_xlabel('信念值', fontsize=12)
     ax.set_ylabel('用户数量', fontsize=12)
-    ax.set_title(f'信念分布 (步数: {model.value.steps})', fontsize=14, fontweight='bold')
+    ax.set_title(f'信念分布 (步数: {m.steps})', fontsize=14, fontweight='bold')
     ax.set_xlim(-1, 1)
     
     # 统计信息
-    mean_b = np.mean(beliefs)
-    std_b = np.std(beliefs)
-    var_b = np.var(beliefs)
+    mean_b = m.calculate_mean_belief()
+    std_b = m.calculate_belief_std()
+    var_b = m.calculate_polarization()
     
     stats = f'均值: {mean_b:.3f}\n标准差: {std_b:.3f}\n极化: {var_b:.3f}'
     ax.text(0.02, 0.98, stats, transform=ax.transAxes, verticalalignment='top',
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5), fontsize=10)
     
     plt.tight_layout()
-    solara.FigureMatplotlib(fig, dependencies=[step_count.value])
+    solara.FigureMatplotlib(fig, dependencies=[revision.value])
     plt.close(fig)
 
 
 @solara.component
 def PolarizationChart():
     """极化趋势图"""
-    if model.value is None:
+    _ = revision.value  # 订阅刷新信号
+    m = current_model()
+    if m is None:
         solara.Info("等待模型初始化...")
         return
     
-    model_data = model.value.datacollector.get_model_vars_dataframe()
+    model_data = m.datacollector.get_model_vars_dataframe()
+    # 超出记录上限的早期步已被丢弃，横轴从 records_dropped 开始
+    steps = model_data.index + m.records_dropped
     if len(model_data) == 0:
         solara.Info("开始运行以查看数据...")
         return
     
     fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(model_data.index, model_data['Polarization'], 'r-', linewidth=2, label='极化程度')
+    ax.plot(steps, model_data['Polarization'], 'r-', linewidth=2, label='极化程度')
     ax.set_xlabel('时间步', fontsize=12)
     ax.set_ylabel('极化程度 (方差)', fontsize=12)
     ax.set_title('极化程度随时间变化', fontsize=14, fontweight='bold')
     ax.legend()
     ax.grid(True, alpha=0.3)
     plt.tight_layout()
-    solara.FigureMatplotlib(fig, dependencies=[step_count.value])
+    solara.FigureMatplotlib(fig, dependencies=[revision.value])
     plt.close(fig)
 
 
 @solara.component
 def MeanBeliefChart():
     """平均信念图"""
-    if model.value is None:
+    _ = revision.value  # 订阅刷新信号
+    m = current_model()
+    if m is None:
         solara.Info("等待模型初始化...")
         return
     
-    model_data = model.value.datacollector.get_model_vars_dataframe()
+    model_data = m.datacollector.get_model_vars_dataframe()
+    # 超出记录上限的早期步已被丢弃，横轴从 records_dropped 开始
+    steps = model_data.index + m.records_dropped
     if len(model_data) == 0:
         solara.Info("开始运行以查看数据...")
         return
     
     fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(model_data.index, model_data['Mean_Belief'], 'b-', linewidth=2, label='平均信念')
+    ax.plot(steps, model_data['Mean_Belief'], 'b-', linewidth=2, label='平均信念')
     ax.axhline(y=0, color='gray', linestyle='--', alpha=0.5)
     ax.set_xlabel('时间步', fontsize=12)
     ax.set_ylabel('平均信念', fontsize=12)
@@ -180,7 +239,42 @@ def MeanBeliefChart():
     ax.legend()
     ax.grid(True, alpha=0.3)
     plt.tight_layout()
-    solara.FigureMatplotlib(fig, dependencies=[step_count.value])
+    solara.FigureMatplotlib(fig, dependencies=[revision.value])
+    plt.close(fig)
+
+
+@solara.component
+def ThroughputChart():
+    """吞吐量与分阶段耗时（启用性能剖析时显示）"""
+    _ = revision.value  # 订阅刷新信号
+    m = current_model()
+    if m is None or m.profiler is None:
+        solara.Info("勾选'性能剖析'并重置模型以查看吞吐量")
+        return
+    
+    model_data = m.datacollector.get_model_vars_dataframe()
+    # 每步开始时收集的是上一步的吞吐量，第一条记录为 0
+    steps = model_data.index + m.records_dropped
+    if len(model_data) < 2:
+        solara.Info("开始运行以查看数据...")
+        return
+    
+    stats = m.profiler.stats()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
+    ax1.plot(steps[1:], model_data['Agent_Steps_Per_Sec'].iloc[1:], 'm-', linewidth=2)
+    ax1.set_xlabel('时间步', fontsize=12)
+    ax1.set_ylabel('用户·步 / 秒', fontsize=12)
+    ax1.set_title(f"吞吐量 (平均 {stats['throughput']:,.0f})", fontsize=14, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    
+    phases = stats['phases']
+    labels = [PHASE_LABELS.get(name, name) for name in phases]
+    ax2.barh(labels[::-1], [values['per_step'] * 1e3 for values in phases.values()][::-1],
+             color='mediumpurple')
+    ax2.set_xlabel('每步耗时 (ms)', fontsize=12)
+    ax2.set_title('分阶段耗时', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    solara.FigureMatplotlib(fig, dependencies=[revision.value])
     plt.close(fig)
 
 
@@ -207,3 +301,6 @@ def Page():
                 
                 with solara.Card("平均信念"):
                     MeanBeliefChart()
+                
+                with solara.Card("性能"):
+                    ThroughputChart()
@@ -0,0 +1,235 @@
+"""
+性能基准测试
+对模拟热点路径计时：PlatformModel.generate_feed、UserAgent.select_content、
+UserAgent.update_belief、datacollector.collect 和完整的 PlatformModel.step，
+扫描用户数量、内容池大小与信息流大小，报告每步耗时、每个用户耗时与峰值内存，
+结果保存为 JSON，可用 --compare 比较两个版本
+"""
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from catalog import code_version
+from model import PlatformModel
+
+
+# 预设的扫描网格：(用户数量, 内容池大小, 信息流大小)
+GRIDS = {
+    'quick': {
+        'num_users': [100, 1000],
+        'content_pool_size': [1000, 10000],
+        'feed_size': [10]
+    },
+    'full': {
+        'num_users': [100, 1000, 10_000, 100_000, 1_000_000],
+        'content_pool_size': [1000, 10_000, 100_000, 1_000_000, 10_000_000],
+        'feed_size': [10, 50]
+    }
+}
+
+MICRO_BENCHMARKS = ['generate_feed', 'select_content', 'update_belief', 'collect']
+
+
+def _timings(func, repeat):
+    """调用 func repeat 次，返回每次的耗时（秒）"""
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def _summary(times, **extra):
+    """耗时样本的中位数、最小值与调用次数"""
+    return {'median': float(np.median(times)), 'min': float(times.min()), 'calls': len(times), **extra}
+
+
+def _peak_memory(func):
+    """func 执行期间 Python 与 NumPy 分配的峰值内存（字节，tracemalloc 统计）及其返回值"""
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def benchmark_config(num_users, content_pool_size, feed_size, backend='agents',
+                     calls=200, steps=3, seed=0):
+    """
+    一组参数下的全部基准测试
+
+    Args:
+        num_users / content_pool_size / feed_size: 模型规模
+        backend: 完整 step 使用的执行方式（'agents' 逐代理，'numpy' 等为融合计算）
+        calls: 微基准的调用次数（在随机抽取的用户上）
+        steps: 完整 step 的计时次数（另有一次预热）
+        seed: 随机数种子
+
+    Returns:
+        {基准名称: 计时结果}，另含构建模型与单步的峰值内存
+    """
+    construct_start = time.perf_counter()
+    construct_peak, model = _peak_memory(lambda: PlatformModel(
+        num_users=num_users, content_pool_size=content_pool_size, feed_size=feed_size,
+        backend=backend, seed=seed
+    ))
+    results = {'construct': {'seconds': time.perf_counter() - construct_start, 'peak_bytes': construct_peak}}
+
+    rng = np.random.default_rng(seed)
+    agents = [model.user_agents[i] for i in rng.integers(0, num_users, calls)]
+    feeds = [model.generate_feed(agent, feed_size) for agent in agents]
+
+    # 每次调用取下一个抽样用户及其信息流
+    index = iter(range(calls))
+    results['generate_feed'] = _summary(_timings(
+        lambda: model.generate_feed(agents[next(index)], feed_size), calls))
+    index = iter(range(calls))
+    results['select_content'] = _summary(_timings(
+        lambda: agents[(i := next(index))].select_content(feeds[i]), calls))
+    index = iter(range(calls))
+    results['update_belief'] = _summary(_timings(
+        lambda: agents[(i := next(index))].update_belief(feeds[i][0]), calls))
+    results['collect'] = _summary(_timings(lambda: model.datacollector.collect(model), min(calls, 20)))
+
+    # 完整的一步：预热一次（推荐器初始化、页面换入），单独一次统计峰值内存
+    model.step()
+    step_peak, _ = _peak_memory(model.step)
+    times = _timings(model.step, steps)
+    results['step'] = _summary(times, per_agent=float(np.median(times)) / num_users,
+                               agent_steps_per_second=num_users / float(np.median(times)),
+                               peak_bytes=step_peak)
+    return results
+
+
+def environment():
+    """测试环境信息（随结果保存，便于判断两次结果是否可比）"""
+    import mesa
+    return {
+        'code_version': code_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'mesa': mesa.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'platform': platform.platform()
+    }
+
+
+def run_suite(grid, backends=('agents', 'numpy'), calls=200, steps=3, max_work=1e10,
+              max_agent_users=100_000, seed=0):
+    """
+    按网格运行基准测试
+
+    Args:
+        grid: {'num_users': [...], 'content_pool_size': [...], 'feed_size': [...]}
+        backends: 完整 step 的执行方式列表
+        calls / steps: 见 benchmark_config
+        max_work: 用户数 × 内容池大小超过此值的组合跳过（全量扫描的推荐器每步代价与之成正比）
+        max_agent_users: 逐代理执行 ('agents') 的用户数上限，超过时跳过
+        seed: 随机数种子
+
+    Returns:
+        {'environment': ..., 'results': [每组参数一条记录]}
+    """
+    records = []
+    for num_users in grid['num_users']:
+        for pool in grid['content_pool_size']:
+            for feed_size in grid['feed_size']:
+                for backend in backends:
+                    config = {'num_users': num_users, 'content_pool_size': pool,
+                              'feed_size': feed_size, 'backend': backend}
+                    label = ', '.join(f'{key}={value}' for key, value in config.items())
+                    if num_users * pool > max_work or (backend == 'agents' and num_users > max_agent_users):
+                        print(f"跳过 {label}")
+                        records.append({**config, 'skipped': True})
+                        continue
+                    print(f"运行 {label}")
+                    results = benchmark_config(num_users, pool, feed_size, backend, calls, steps, seed)
+                    print(f"  step {results['step']['median'] * 1e3:9.2f} ms  "
+                          f"每个用户 {results['step']['per_agent'] * 1e6:8.2f} µs  "
+                          f"峰值内存 {results['step']['peak_bytes'] / 2**20:8.1f} MiB")
+                    records.append({**config, 'benchmarks': results})
+    return {'environment': environment(), 'results': records}
+
+
+def _flatten(suite):
+    """{(基准, 用户数, 内容池, 信息流, 执行方式): 中位耗时}"""
+    flat = {}
+    for record in suite['results']:
+        if record.get('skipped'):
+            continue
+        config = (record['num_users'], record['content_pool_size'], record['feed_size'], record['backend'])
+        for name, values in record['benchmarks'].items():
+            if 'median' in values:
+                flat[(name, *config)] = values['median']
+    return flat
+
+
+def compare(baseline_path, candidate_path, threshold=0.10):
+    """
+    比较两次基准测试结果：中位耗时之比，超过 1 + threshold 标记为退化，低于 1 - threshold 标记为加速
+
+    Returns:
+        DataFrame，每行一个 (基准, 参数组合)
+    """
+    import pandas as pd
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(candidate_path, encoding='utf-8') as f:
+        candidate = json.load(f)
+    old, new = _flatten(baseline), _flatten(candidate)
+    rows = []
+    for key in sorted(set(old) & set(new), key=str):
+        ratio = new[key] / old[key]
+        status = '退化' if ratio > 1 + threshold else ('加速' if ratio < 1 - threshold else '')
+        rows.append({
+            '基准': key[0], '用户数': key[1], '内容池': key[2], '信息流': key[3], '执行方式': key[4],
+            '基线 (ms)': old[key] * 1e3, '新版 (ms)': new[key] * 1e3, '耗时比': ratio, '结论': status
+        })
+    print(f"基线: {baseline['environment']['code_version']} ({baseline['environment']['timestamp']})")
+    print(f"新版: {candidate['environment']['code_version']} ({candidate['environment']['timestamp']})")
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="模拟热点路径的性能基准测试")
+    parser.add_argument('--grid', choices=list(GRIDS), default='quick', help="预设扫描网格")
+    parser.add_argument('--users', type=int, nargs='+', help="覆盖网格的用户数量")
+    parser.add_argument('--pool', type=int, nargs='+', help="覆盖网格的内容池大小")
+    parser.add_argument('--feed', type=int, nargs='+', help="覆盖网格的信息流大小")
+    parser.add_argument('--backends', nargs='+', default=['agents', 'numpy'], help="完整 step 的执行方式")
+    parser.add_argument('--calls', type=int, default=200, help="微基准调用次数")
+    parser.add_argument('--steps', type=int, default=3, help="完整 step 计时次数")
+    parser.add_argument('--max-work', type=float, default=1e10, help="用户数 × 内容池大小的上限")
+    parser.add_argument('--output', default='benchmark_results.json', help="结果 JSON 路径")
+    parser.add_argument('--compare', nargs=2, metavar=('基线.json', '新版.json'),
+                        help="比较两次结果而不运行测试")
+    parser.add_argument('--threshold', type=float, default=0.10, help="判定退化 / 加速的相对变化")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    if args.compare:
+        print("基准测试结果比较")
+        print("=" * 70)
+        table = compare(*args.compare, threshold=args.threshold)
+        print(table.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    else:
+        print("性能基准测试")
+        print("=" * 70)
+        grid = dict(GRIDS[args.grid])
+        for key, values in [('num_users', args.users), ('content_pool_size', args.pool), ('feed_size', args.feed)]:
+            if values:
+                grid[key] = values
+        suite = run_suite(grid, args.backends, args.calls, args.steps, args.max_work)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(suite, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存至: {args.output}")
@@ -0,0 +1,257 @@
+"""
+运行目录 (RunCatalog)
+用本地 SQLite 数据库记录每次运行的参数、种子、代码版本、耗时和汇总指标，
+以及存放在每次运行 / 每批运行目录中的产物（图表、表格、轨迹）的路径；
+常用参数列建有索引，跨数千次运行的条件查询立即返回
+"""
+import datetime
+import json
+import os
+import sqlite3
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+
+# 单独成列并建索引的参数（其余参数存入 params JSON）
+INDEXED_PARAMS = ['Q_strength', 'P_strength', 'learning_rate', 'content_pool_size', 'num_users']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    script TEXT,
+    created TEXT,
+    code_version TEXT,
+    directory TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER REFERENCES batches(id),
+    created TEXT,
+    seed INTEGER,
+    Q_strength REAL,
+    P_strength REAL,
+    learning_rate REAL,
+    content_pool_size INTEGER,
+    num_users INTEGER,
+    steps INTEGER,
+    duration REAL,
+    final_polarization REAL,
+    params TEXT,
+    metrics TEXT
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER REFERENCES batches(id),
+    run_id INTEGER REFERENCES runs(id),
+    name TEXT,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_Q ON runs(Q_strength);
+CREATE INDEX IF NOT EXISTS idx_runs_P ON runs(P_strength);
+CREATE INDEX IF NOT EXISTS idx_runs_learning_rate ON runs(learning_rate);
+CREATE INDEX IF NOT EXISTS idx_runs_pool ON runs(content_pool_size);
+CREATE INDEX IF NOT EXISTS idx_runs_users ON runs(num_users);
+CREATE INDEX IF NOT EXISTS idx_runs_QP ON runs(Q_strength, P_strength, num_users);
+CREATE INDEX IF NOT EXISTS idx_runs_polarization ON runs(final_polarization);
+CREATE INDEX IF NOT EXISTS idx_runs_batch ON runs(batch_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts(run_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_batch ON artifacts(batch_id);
+"""
+
+# 可以按范围查询的列
+QUERY_COLUMNS = INDEXED_PARAMS + ['seed', 'steps', 'duration', 'final_polarization', 'batch_id']
+
+
+def code_version():
+    """当前代码版本：git 提交号（有未提交修改时加 -dirty），不在 git 仓库中时为 'unknown'"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class RunCatalog:
+    """
+    本地运行目录
+
+    一次脚本调用是一个批次 (batch)，拥有自己的目录 root/batch_XXXXXX，
+    批次中的每次模型运行是一条 run 记录；产物文件放在批次目录中并登记路径，
+    不再互相覆盖
+
+    属性:
+        root: 目录根路径（数据库为 root/catalog.db）
+        connection: SQLite 连接
+    """
+
+    def __init__(self, root='runs'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(root, 'catalog.db'))
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def new_batch(self, script):
+        """
+        登记一个新批次并创建其目录
+
+        Returns:
+            (批次编号, 批次目录)
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO batches (script, created, code_version) VALUES (?, ?, ?)",
+                (script, _now(), code_version())
+            )
+            batch_id = cursor.lastrowid
+            directory = os.path.join(self.root, f'batch_{batch_id:06d}')
+            self.connection.execute("UPDATE batches SET directory = ? WHERE id = ?", (directory, batch_id))
+        os.makedirs(directory, exist_ok=True)
+        return batch_id, directory
+
+    def batch_directory(self, batch_id):
+        """批次目录"""
+        return self.connection.execute("SELECT directory FROM batches WHERE id = ?", (batch_id,)).fetchone()[0]
+
+    def record_runs(self, batch_id, runs):
+        """
+        批量登记运行（一次事务）
+
+        Args:
+            batch_id: 所属批次
+            runs: 每次运行一个字典：params（模型参数）、seed、steps、duration、
+                metrics（汇总指标，含 'polarization' 时单独成列）
+
+        Returns:
+            运行编号列表
+        """
+        created = _now()
+        ids = []
+        with self.connection:
+            for run in runs:
+                params = dict(run.get('params', {}))
+                metrics = dict(run.get('metrics', {}))
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (batch_id, created, seed, Q_strength, P_strength, learning_rate, "
+                    "content_pool_size, num_users, steps, duration, final_polarization, params, metrics) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (batch_id, created, None if run.get('seed') is None else int(run['seed']),
+                     *(params.get(name) for name in INDEXED_PARAMS),
+                     run.get('steps'), run.get('duration'), metrics.get('polarization'),
+                     json.dumps(params, default=str), json.dumps(metrics, default=float))
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def record_run(self, batch_id, params, seed=None, steps=None, duration=None, metrics=None):
+        """登记一次运行，返回运行编号"""
+        return self.record_runs(batch_id, [{
+            'params': params, 'seed': seed, 'steps': steps, 'duration': duration, 'metrics': metrics or {}
+        }])[0]
+
+    def add_artifact(self, batch_id, name, path, run_id=None):
+        """登记一个产物文件（run_id 为 None 表示属于整个批次）"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO artifacts (batch_id, run_id, name, path) VALUES (?, ?, ?, ?)",
+                (batch_id, run_id, name, path)
+            )
+
+    def artifact_path(self, batch_id, filename, run_id=None):
+        """批次目录中的产物路径，同时登记该产物"""
+        path = os.path.join(self.batch_directory(batch_id), filename)
+        self.add_artifact(batch_id, filename, path, run_id)
+        return path
+
+    def query(self, where=None, args=(), **ranges):
+        """
+        按参数与指标查询运行
+
+        Args:
+            where: 额外的 SQL 条件（参数用 ? 占位，值放在 args 中）
+            args: where 的参数
+            **ranges: 列名 = 值（相等）或 (下限, 上限)（闭区间，None 表示不限），
+                列名见 QUERY_COLUMNS，如 query(Q_strength=(0.7, None), num_users=(10000, None))
+
+        Returns:
+            DataFrame，每行一次运行（含批次的脚本与代码版本）
+        """
+        conditions, values = [], []
+        for column, value in ranges.items():
+            if column not in QUERY_COLUMNS:
+                raise ValueError(f"不能按 {column} 查询（可选 {QUERY_COLUMNS}）")
+            if isinstance(value, (tuple, list)):
+                low, high = value
+                if low is not None:
+                    conditions.append(f"runs.{column} >= ?")
+                    values.append(low)
+                if high is not None:
+                    conditions.append(f"runs.{column} <= ?")
+                    values.append(high)
+            else:
+                conditions.append(f"runs.{column} = ?")
+                values.append(value)
+        if where:
+            conditions.append(f"({where})")
+            values.extend(args)
+        sql = ("SELECT runs.*, batches.script, batches.code_version, batches.directory "
+               "FROM runs JOIN batches ON runs.batch_id = batches.id")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return pd.read_sql_query(sql + " ORDER BY runs.id", self.connection, params=values)
+
+    def artifacts(self, batch_id=None, run_id=None):
+        """某批次或某次运行的产物列表（运行的产物包括其批次的公共产物）"""
+        if run_id is not None:
+            sql = ("SELECT * FROM artifacts WHERE run_id = ? OR (run_id IS NULL AND batch_id = "
+                   "(SELECT batch_id FROM runs WHERE id = ?))")
+            return pd.read_sql_query(sql, self.connection, params=(run_id, run_id))
+        return pd.read_sql_query("SELECT * FROM artifacts WHERE batch_id = ?", self.connection, params=(batch_id,))
+
+
+def model_params(model, names=INDEXED_PARAMS + ['update_mode', 'recommender']):
+    """从模型实例读取要登记的参数（缺少的属性跳过）"""
+    params = {}
+    for name in names:
+        if hasattr(model, name):
+            value = getattr(model, name)
+            if isinstance(value, np.generic):
+                value = value.item()
+            params[name] = value if isinstance(value, (int, float, str, bool)) else type(value).__name__
+    if 'content_pool_size' not in params and hasattr(model, 'content_pool'):
+        params['content_pool_size'] = len(model.content_pool)
+    return params
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="查询运行目录")
+    parser.add_argument('--root', default='runs', help="目录根路径")
+    parser.add_argument('--where', default=None, help="SQL 条件，如 \"Q_strength > 0.7 AND num_users >= 10000\"")
+    args = parser.parse_args()
+    with RunCatalog(args.root) as catalog:
+        runs = catalog.query(args.where)
+    print("=" * 70)
+    print(f"共 {len(runs)} 次运行")
+    print("=" * 70)
+    columns = ['id', 'batch_id', 'script', 'Q_strength', 'P_strength', 'num_users', 'seed',
+               'steps', 'duration', 'final_polarization', 'code_version']
+    print(runs[columns].to_string(index=False))
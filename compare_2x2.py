@@ -7,7 +7,6 @@ import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 matplotlib.rcParams['axes.unicode_minus'] = False
 from matplotlib.animation import FuncAnimation
-import numpy as np
 from model import PlatformModel
 
 print("=" * 70)
@@ -24,10 +23,10 @@ models = {
     '共谋\n(高P高Q)': PlatformModel(num_users=100, Q_strength=0.8, P_strength=0.8, learning_rate=0.1)
 }
 
-# 存储初始信念分布
-initial_beliefs = {}
+# 存储初始信念分布（模型维护的直方图计数）
+initial_histograms = {}
 for name, model in models.items():
-    initial_beliefs[name] = [agent.belief for agent in model.agents]
+    initial_histograms[name] = model.belief_histogram.copy()
 
 print("✓ 模型创建完成")
 print("\n场景说明:")
@@ -86,12 +85,12 @@ def update(frame):
     # 为每个模型更新图表
     for i, (name, model) in enumerate(models.items()):
         color = colors[name]
-        beliefs = [agent.belief for agent in model.agents]
+        edges = model.histogram_edges
         model_data = model.datacollector.get_model_vars_dataframe()
         
         # 第1行：当前信念分布
         ax_dist = axes[f'{name}_dist']
-        ax_dist.hist(beliefs, bins=20, range=(-1, 1), color=color, 
+        ax_dist.hist(edges[:-1], bins=edges, weights=model.belief_histogram, color=color, 
                     edgecolor='black', alpha=0.7)
         ax_dist.axvline(x=0, color='black', linestyle='--', linewidth=1, alpha=0.5)
         ax_dist.set_xlabel('信念值', fontsize=9)
@@ -101,8 +100,8 @@ def update(frame):
         ax_dist.set_ylim(0, 40)
         
         # 添加统计信息
-        polarization = np.var(beliefs)
-        mean_b = np.mean(beliefs)
+        polarization = model.calculate_polarization()
+        mean_b = model.calculate_mean_belief()
         stats = f'极化: {polarization:.3f}\n均值: {mean_b:.2f}'
         ax_dist.text(0.02, 0.98, stats, transform=ax_dist.transAxes,
                     verticalalignment='top', fontsize=8,
@@ -124,10 +123,9 @@ def update(frame):
         
         # 第3行：初始vs当前分布对比
         ax_compare = axes[f'{name}_compare']
-        bins = np.linspace(-1, 1, 21)
-        ax_compare.hist(initial_beliefs[name], bins=bins, alpha=0.4, 
+        ax_compare.hist(edges[:-1], bins=edges, weights=initial_histograms[name], alpha=0.4, 
                        label='初始', color='gray', density=True)
-        ax_compare.hist(beliefs, bins=bins, alpha=0.6, 
+        ax_compare.hist(edges[:-1], bins=edges, weights=model.belief_histogram, alpha=0.6, 
                        label='当前', color=color, density=True)
         ax_compare.axvline(x=0, color='black', linestyle='--', linewidth=1, alpha=0.3)
         ax_compare.set_xlabel('信念值', fontsize=9)
@@ -144,8 +142,7 @@ def update(frame):
         print(f"\n模拟完成！运行了 {frame+1} 步")
         print("\n最终极化程度对比:")
         for name, model in models.items():
-            beliefs = [agent.belief for agent in model.agents]
-            final_polar = np.var(beliefs)
+            final_polar = model.calculate_polarization()
             print(f"  {name.replace(chr(10), ' ')}: {final_polar:.4f}")
         ani.event_source.stop()
 
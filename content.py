@@ -0,0 +1,320 @@
+"""
+内容池 (ContentPool)
+以环形缓冲区存储的信息内容，支持按步新增内容、TTL 过期和时间衰减，
+也可以从磁盘上的内存映射文件加载大规模真实语料
+"""
+import json
+import os
+
+import numpy as np
+
+
+# 内存映射内容池目录中各状态数组的文件名（不含 .npy 后缀）
+POOL_ARRAYS = ('slant', 'ids', 'created', 'alive', 'weights')
+
+
+def slant_distance(slants, belief):
+    """
+    内容倾向性与信念之间的距离
+
+    一维时为绝对差，多维（话题向量）时为欧氏距离
+
+    Args:
+        slants: 倾向性数组，形状 (n,) 或 (n, d)
+        belief: 信念，标量或长度为 d 的向量
+
+    Returns:
+        长度为 n 的距离数组
+    """
+    if slants.ndim == 1:
+        return np.abs(slants - belief)
+    return np.sqrt(((slants - belief) ** 2).sum(axis=-1))
+
+
+def pairwise_slant_distance(beliefs, slants):
+    """
+    一批信念与一批倾向性两两之间的距离矩阵
+
+    Args:
+        beliefs: 形状 (k,) 或 (k, d)
+        slants: 形状 (n,) 或 (n, d)
+
+    Returns:
+        (k, n) 距离矩阵
+    """
+    if slants.ndim == 1:
+        return np.abs(beliefs[:, None] - slants[None, :])
+    squared = (np.einsum('ij,ij->i', beliefs, beliefs)[:, None]
+               - 2.0 * beliefs @ slants.T
+               + np.einsum('ij,ij->i', slants, slants)[None, :])
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+def _check_capacity(capacity):
+    """环形缓冲区的槽位按容量取模，容量至少为 1"""
+    if capacity < 1:
+        raise ValueError(
+            f"内容池容量必须至少为 1（当前为 {capacity}）；"
+            "初始为空的内容池可设 content_pool_size=0 并用 content_capacity 指定容量"
+        )
+
+
+class ContentPool:
+    """
+    环形缓冲区内容池
+
+    内容按到达顺序写入固定容量的数组，槽位编号在内容存活期间保持不变；
+    容量写满时覆盖最早的内容。过期只需移动缓冲区起点，
+    采样权重只在内容写入和过期时更新；时间衰减由创建步数直接算出（见 log_weights），
+    不逐步改写存储的权重
+
+    属性:
+        capacity: 槽位数量
+        dim: 倾向性维度（1 为标量，大于 1 时每个内容是一个话题向量）
+        slant: 每个槽位内容的倾向性，形状 (capacity,) 或 (capacity, dim)
+        ids: 每个槽位内容的全局编号（从 0 递增，不随槽位复用而重复）
+        created: 每个槽位内容的创建步数
+        alive: 每个槽位是否存有有效内容
+        weights: 每个槽位的基础采样权重（有效槽位为 1，无效槽位为 0，不含时间衰减）
+        popularity: 每个槽位内容被消费的次数（槽位复用时清零）
+        ttl: 内容存活步数（None 表示不过期）
+        decay: 每步的权重衰减系数（None 表示不衰减）
+        index: 可选的近邻索引 (IVFIndex)，随内容写入增量更新
+    """
+
+    def __init__(self, capacity, ttl=None, decay=None, dim=1):
+        _check_capacity(capacity)
+        self.capacity = capacity
+        self.ttl = ttl
+        self.decay = decay
+        self.dim = dim
+        self.slant = np.zeros(capacity if dim == 1 else (capacity, dim))
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.created = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.weights = np.zeros(capacity)
+        self.popularity = np.zeros(capacity)
+        self.start = 0      # 最早内容所在的槽位
+        self.size = 0       # 有效内容数量
+        self.next_id = 0
+        self.index = None
+        self.metadata = {}
+
+    @classmethod
+    def from_file(cls, path, ttl=None, decay=None):
+        """
+        从 save_content_pool 写出的目录以内存映射方式加载内容池
+
+        状态数组以写时复制 (copy-on-write) 模式映射：多个进程只读共享同一份
+        页缓存，只有被写入（新内容到达、过期、热度变化）的页才在本进程中复制；
+        元数据数组只读映射，存放在 metadata 字典中
+
+        Args:
+            path: 内容池目录
+            ttl: 内容存活步数（None 表示不过期）
+            decay: 每步的权重衰减系数（None 表示不衰减）
+
+        Returns:
+            ContentPool
+        """
+        with open(os.path.join(path, 'pool.json'), encoding='utf-8') as f:
+            info = json.load(f)
+        _check_capacity(info['capacity'])
+        pool = cls.__new__(cls)
+        pool.capacity = info['capacity']
+        pool.ttl = ttl
+        pool.decay = decay
+        pool.dim = info['dim']
+        for name in POOL_ARRAYS:
+            setattr(pool, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='c'))
+        # 全零数组由操作系统按需分配页，未被消费的内容不占内存
+        pool.popularity = np.zeros(pool.capacity)
+        pool.start = 0
+        pool.size = info['size']
+        pool.next_id = info['next_id']
+        pool.index = None
+        pool.metadata = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in info['metadata']
+        }
+        return pool
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, slot):
+        """返回槽位中的内容项（与内容列表的元素格式相同）"""
+        slant = float(self.slant[slot]) if self.dim == 1 else self.slant[slot].copy()
+        return {'id': int(self.ids[slot]), 'slant': slant, 'slot': int(slot)}
+
+    @property
+    def is_full(self):
+        return self.size == self.capacity
+
+    def add(self, slants, step):
+        """
+        写入一批新内容，容量不足时覆盖最早的内容
+
+        Args:
+            slants: 新内容的倾向性数组，形状 (k,) 或 (k, dim)
+            step: 当前步数
+
+        Returns:
+            写入的槽位编号数组
+        """
+        slants = np.asarray(slants, dtype=np.float64)[-self.capacity:]
+        count = len(slants)
+        slots = (self.start + self.size + np.arange(count)) % self.capacity
+        overwritten = max(self.size + count - self.capacity, 0)
+
+        self.slant[slots] = slants
+        self.ids[slots] = self.next_id + np.arange(count)
+        self.created[slots] = step
+        self.alive[slots] = True
+        self.weights[slots] = 1.0
+        self.popularity[slots] = 0.0
+
+        self.next_id += count
+        self.start = (self.start + overwritten) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        if self.index is not None:
+            self.index.add(slots, slants)
+        return slots
+
+    def expire(self, step):
+        """
+        移除存活超过 ttl 步的内容
+
+        缓冲区内创建时间按到达顺序单调不减，只需在两段连续区间上二分查找
+
+        Returns:
+            过期的内容数量
+        """
+        if self.ttl is None or self.size == 0:
+            return 0
+        threshold = step - self.ttl
+        first_end = min(self.start + self.size, self.capacity)
+        expired = int(np.searchsorted(self.created[self.start:first_end], threshold, side='right'))
+        if expired == first_end - self.start:
+            wrapped = self.start + self.size - self.capacity
+            if wrapped > 0:
+                expired += int(np.searchsorted(self.created[:wrapped], threshold, side='right'))
+        if expired == 0:
+            return 0
+
+        slots = (self.start + np.arange(expired)) % self.capacity
+        self.alive[slots] = False
+        self.weights[slots] = 0.0
+        self.start = (self.start + expired) % self.capacity
+        self.size -= expired
+        return expired
+
+    def advance(self, step):
+        """进入新的一步：移除过期内容（衰减不需要逐步更新，见 log_weights）"""
+        self.expire(step)
+
+    def log_weights(self, select=slice(None)):
+        """
+        槽位的对数采样权重，无效槽位为 -inf
+
+        有衰减时，内容的权重为 decay ** (最新内容的创建步数 - 该内容的创建步数)。
+        相对于最新内容计算，所有内容同时平移不改变排序，运行再久也不会下溢为 0，
+        且每步无需改写整个缓冲区（内存映射的内容池保持写时复制共享）
+
+        Args:
+            select: 槽位编号数组或切片
+
+        Returns:
+            对数权重数组
+        """
+        with np.errstate(divide='ignore'):
+            log_weight = np.log(self.weights[select])
+        if self.decay is not None and self.size:
+            newest = self.created[(self.start + self.size - 1) % self.capacity]
+            log_weight = log_weight + (self.created[select] - newest) * np.log(self.decay)
+        return log_weight
+
+    def alive_slots(self):
+        """有效内容所在的槽位编号"""
+        return np.flatnonzero(self.alive)
+
+    def build_index(self, index):
+        """
+        为当前有效内容建立近邻索引，此后新写入的内容自动加入索引
+
+        Args:
+            index: 未训练的索引实例（如 IVFIndex）
+        """
+        index.build(self.slant, self.alive_slots())
+        self.index = index
+
+    def candidates(self, belief):
+        """
+        信息流的候选槽位：有索引时为近邻候选，否则为 None（表示全量扫描）
+        """
+        if self.index is None:
+            return None
+        return self.index.search(belief, alive=self.alive)
+
+    def candidate_groups(self, beliefs):
+        """
+        一批信息流的候选槽位：[(用户下标数组, 候选槽位数组), ...]，
+        近邻检索相同的用户共用一组候选；没有索引时为 None（表示全量扫描）
+        """
+        if self.index is None:
+            return None
+        return self.index.search_batch(beliefs, alive=self.alive)
+
+
+def save_content_pool(path, slants, ids=None, sort=True, **metadata):
+    """
+    将内容语料写为可被 ContentPool.from_file 内存映射加载的目录
+
+    Args:
+        path: 输出目录（不存在时创建）
+        slants: 倾向性数组，形状 (n,) 或 (n, d)
+        ids: 内容的全局编号（默认 0..n-1）
+        sort: 一维时是否按倾向性排序存储，使倾向性相近的内容位于相邻的页，
+            基于索引的信息流只需读取少量页
+        **metadata: 其他逐内容的元数据数组（长度为 n），如 source、timestamp
+
+    Returns:
+        输出目录
+    """
+    slants = np.asarray(slants, dtype=np.float64)
+    count = len(slants)
+    ids = np.arange(count, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+    metadata = {name: np.asarray(values) for name, values in metadata.items()}
+    for name, values in [('ids', ids), *metadata.items()]:
+        if len(values) != count:
+            raise ValueError(f"{name} 的长度 {len(values)} 与内容数量 {count} 不一致")
+    reserved = set(metadata) & set(POOL_ARRAYS + ('popularity', 'pool'))
+    if reserved:
+        raise ValueError(f"元数据名称与内容池状态冲突: {sorted(reserved)}")
+
+    if sort and slants.ndim == 1:
+        order = np.argsort(slants, kind='stable')
+        slants, ids = slants[order], ids[order]
+        metadata = {name: values[order] for name, values in metadata.items()}
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        'slant': slants,
+        'ids': ids,
+        'created': np.zeros(count, dtype=np.int64),
+        'alive': np.ones(count, dtype=bool),
+        'weights': np.ones(count),
+        **metadata
+    }
+    for name, values in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), values)
+    info = {
+        'capacity': count,
+        'size': count,
+        'dim': 1 if slants.ndim == 1 else slants.shape[1],
+        'next_id': int(ids.max()) + 1 if count else 0,
+        'metadata': sorted(metadata)
+    }
+    with open(os.path.join(path, 'pool.json'), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,57 @@
+"""
+用户参数的总体分布
+将参数配置（常数、分布名称及参数、函数或数组）抽样为每个用户一个值的连续数组
+"""
+import numpy as np
+
+
+# 分布名称 -> 抽样函数 (参数..., size)
+DISTRIBUTIONS = {
+    'uniform': lambda low, high, size: np.random.uniform(low, high, size),
+    'normal': lambda mean, std, size: np.random.normal(mean, std, size),
+    'beta': lambda a, b, size: np.random.beta(a, b, size),
+    'lognormal': lambda mean, sigma, size: np.random.lognormal(mean, sigma, size),
+    'gamma': lambda shape, scale, size: np.random.gamma(shape, scale, size),
+    # 帕累托（幂律）分布，scale 为最小值，适合重尾的活跃度
+    'pareto': lambda shape, scale, size: scale * (1.0 + np.random.pareto(shape, size)),
+    'choice': lambda values, probabilities, size: np.random.choice(values, size, p=probabilities)
+}
+
+
+def sample_parameter(spec, size, low=None, high=None, dtype=np.float64):
+    """
+    按配置为 size 个用户抽样参数
+
+    Args:
+        spec: 参数配置，可以是
+            - 常数：所有用户取相同值
+            - 元组 (分布名称, 参数...)，如 ('beta', 2, 5)、('normal', 0.5, 0.1)
+            - 函数 f(size)，返回长度为 size 的数组
+            - 长度为 size 的数组：直接使用
+        size: 用户数量
+        low: 取值下限（超出时截断）
+        high: 取值上限（超出时截断）
+        dtype: 结果数组的类型（整数类型时四舍五入）
+
+    Returns:
+        长度为 size 的连续数组
+    """
+    if callable(spec):
+        values = np.asarray(spec(size), dtype=np.float64)
+    elif isinstance(spec, tuple):
+        name, *params = spec
+        if name not in DISTRIBUTIONS:
+            raise ValueError(f"未知的分布: {name}")
+        values = np.asarray(DISTRIBUTIONS[name](*params, size), dtype=np.float64)
+    elif np.ndim(spec) == 0:
+        values = np.full(size, spec, dtype=np.float64)
+    else:
+        values = np.array(spec, dtype=np.float64)
+
+    if values.shape != (size,):
+        raise ValueError(f"参数数组长度 {values.shape} 与用户数量 {size} 不一致")
+    if low is not None or high is not None:
+        np.clip(values, low, high, out=values)
+    if np.issubdtype(dtype, np.integer):
+        values = np.rint(values)
+    return np.ascontiguousarray(values, dtype=dtype)
@@ -3,16 +3,21 @@
 系统地比较不同 P 和 Q 组合下的极化效应
 实现 2x2 实验设计以解耦算法与偏误的作用
 """
+import os
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 matplotlib.rcParams['axes.unicode_minus'] = False
 from model import PlatformModel
+from effects import bootstrap_effects
+from catalog import RunCatalog, model_params
 import pandas as pd
 
 
-def run_single_experiment(Q_strength, P_strength, num_users=100, steps=200):
+def run_single_experiment(Q_strength, P_strength, num_users=100, steps=200, seed=None):
     """
     运行单个实验
     
@@ -21,6 +26,7 @@ def run_single_experiment(Q_strength, P_strength, num_users=100, steps=200):
         P_strength: 确认偏误强度
         num_users: 用户数量
         steps: 模拟步数
+        seed: 随机数种子（None 表示不固定）
         
     Returns:
         模型实例和数据
@@ -32,7 +38,10 @@ def run_single_experiment(Q_strength, P_strength, num_users=100, steps=200):
         Q_strength=Q_strength,
         P_strength=P_strength,
         learning_rate=0.05,
-        content_pool_size=1000
+        content_pool_size=1000,
+        metrics=['mean_abs_diff', 'esteban_ray_fine'],
+        record_trajectory=True,
+        seed=seed
     )
     
     # 运行模拟
@@ -40,17 +49,29 @@ def run_single_experiment(Q_strength, P_strength, num_users=100, steps=200):
         model.step()
         if (i + 1) % 50 == 0:
             print(f"  步数 {i+1}/{steps}")
+    # 记录最后一步之后的状态，数据的最后一行即为最终结果
+    model.collect()
     
     return model
 
 
-def plot_2x2_experiment(results, steps=200):
+def _show_or_close(show):
+    """显示图表，或在无界面模式下直接关闭以释放内存"""
+    if show:
+        plt.show()
+    else:
+        plt.close('all')
+
+
+def plot_2x2_experiment(results, steps=200, show=True, directory='.'):
     """
     绘制 2x2 实验设计的结果
     
     Args:
         results: 实验结果字典
         steps: 模拟步数
+        show: 是否弹出图表窗口（无界面环境下设为 False）
+        directory: 图片保存目录
     """
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     fig.suptitle('信息茧房 2x2 实验设计：算法 (Q) vs 确认偏误 (P)', 
@@ -74,7 +95,6 @@ def plot_2x2_experiment(results, steps=200):
         
         # 获取数据
         model_data = model.datacollector.get_model_vars_dataframe()
-        agent_data = model.datacollector.get_agent_vars_dataframe()
         
         # 子图1: 极化趋势
         ax_polar = ax
@@ -89,8 +109,8 @@ def plot_2x2_experiment(results, steps=200):
         ax_hist = ax.twinx()
         
         # 获取初始和最终信念
-        initial_beliefs = agent_data.xs(0, level='Step')['Belief'].values
-        final_beliefs = agent_data.xs(steps-1, level='Step')['Belief'].values
+        initial_beliefs = model.trajectory.initial
+        final_beliefs = model.trajectory.final
         
         # 绘制分布对比
         bins = np.linspace(-1, 1, 21)
@@ -113,12 +133,13 @@ def plot_2x2_experiment(results, steps=200):
         ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=8)
     
     plt.tight_layout()
-    plt.savefig('experiment_2x2_results.png', dpi=300, bbox_inches='tight')
-    print("\n结果已保存至: experiment_2x2_results.png")
-    plt.show()
+    path = os.path.join(directory, 'experiment_2x2_results.png')
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    print(f"\n结果已保存至: {path}")
+    _show_or_close(show)
 
 
-def plot_polarization_comparison(results, steps=200):
+def plot_polarization_comparison(results, steps=200, show=True, directory='.'):
     """
     绘制四种场景的极化趋势对比图
     """
@@ -144,12 +165,13 @@ def plot_polarization_comparison(results, steps=200):
     plt.legend(fontsize=10)
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig('polarization_comparison.png', dpi=300, bbox_inches='tight')
-    print("结果已保存至: polarization_comparison.png")
-    plt.show()
+    path = os.path.join(directory, 'polarization_comparison.png')
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    print(f"结果已保存至: {path}")
+    _show_or_close(show)
 
 
-def create_summary_table(results):
+def create_summary_table(results, directory='.'):
     """
     创建实验结果摘要表
     """
@@ -178,7 +200,9 @@ def create_summary_table(results):
                 '初始极化': f"{initial_polarization:.4f}",
                 '最终极化': f"{final_polarization:.4f}",
                 '极化增量': f"{polarization_increase:.4f}",
-                '增长率': f"{(polarization_increase/initial_polarization*100):.1f}%"
+                '增长率': f"{(polarization_increase/initial_polarization*100):.1f}%",
+                '最终平均绝对差': f"{model_data['Mean_Abs_Diff'].iloc[-1]:.4f}",
+                '最终ER指数': f"{model_data['Esteban_Ray_Fine'].iloc[-1]:.6f}"
             })
     
     df = pd.DataFrame(summary_data)
@@ -188,15 +212,110 @@ def create_summary_table(results):
     print(df.to_string(index=False))
     print("="*80)
     
-    df.to_csv('experiment_summary.csv', index=False, encoding='utf-8-sig')
-    print("\n摘要表已保存至: experiment_summary.csv")
+    path = os.path.join(directory, 'experiment_summary.csv')
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    print(f"\n摘要表已保存至: {path}")
     
     return df
 
 
-def main():
+def _final_polarization(Q_strength, P_strength, num_users, steps, seed):
+    """
+    运行一次重复实验，只返回最终极化程度和耗时（供进程池调用）
+
+    最终极化程度与 run_single_experiment 的数据最后一行定义相同：最后一步之后的状态
+    """
+    start = time.perf_counter()
+    model = PlatformModel(
+        num_users=num_users,
+        Q_strength=Q_strength,
+        P_strength=P_strength,
+        learning_rate=0.05,
+        content_pool_size=1000,
+        backend='numpy',
+        seed=seed
+    )
+    for _ in range(steps):
+        model.step()
+    model.collect()
+    return model.datacollector.model_vars['Polarization'][-1], time.perf_counter() - start
+
+
+def run_replicates(replicates, num_users=100, steps=200, workers=None, catalog=None, batch_id=None):
+    """
+    2x2 设计的每个单元格运行多次独立重复（种子不同），收集最终极化程度
+
+    Args:
+        replicates: 每个单元格的重复次数
+        num_users: 用户数量
+        steps: 模拟步数
+        workers: 并行进程数（None 或 1 表示在当前进程运行）
+        catalog / batch_id: 给出时把每次重复登记到运行目录的该批次中
+
+    Returns:
+        {(Q 水平, P 水平): 最终极化程度数组}，水平 0 / 1 对应强度 0.1 / 0.8
+    """
+    levels = [0.1, 0.8]
+    tasks = [(q, p, seed) for q in range(2) for p in range(2) for seed in range(replicates)]
+    args = ([levels[q] for q, _, _ in tasks], [levels[p] for _, p, _ in tasks],
+            [num_users] * len(tasks), [steps] * len(tasks),
+            [q * 2 * replicates + p * replicates + seed for q, p, seed in tasks])
+    if workers is not None and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            values = list(executor.map(_final_polarization, *args, chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        values = [_final_polarization(*task) for task in zip(*args)]
+
+    if catalog is not None:
+        catalog.record_runs(batch_id, [{
+            'params': {'Q_strength': Q, 'P_strength': P, 'learning_rate': 0.05,
+                       'content_pool_size': 1000, 'num_users': num_users},
+            'seed': seed, 'steps': steps, 'duration': duration,
+            'metrics': {'polarization': value}
+        } for Q, P, _, _, seed, (value, duration) in zip(*args, values)])
+
+    cells = {}
+    for (q, p, _), (value, _) in zip(tasks, values):
+        cells.setdefault((q, p), []).append(value)
+    return {cell: np.asarray(cell_values) for cell, cell_values in cells.items()}
+
+
+def create_effects_table(cells, resamples=10000, seed=0, workers=None, directory='.'):
+    """
+    由重复实验结果估计 Q / P 主效应与交互效应，并给出自助法置信区间
+    """
+    print("\n" + "="*80)
+    print("各单元格最终极化（均值 ± 标准差）")
+    print("="*80)
+    names = {(0, 0): '低P低Q (基线)', (0, 1): '高P低Q (选择性接触)',
+             (1, 0): '低P高Q (信息茧房)', (1, 1): '高P高Q (共谋)'}
+    for cell, name in names.items():
+        values = cells[cell]
+        print(f"{name:<16} n={len(values):5d}  {values.mean():.4f} ± {values.std(ddof=1):.4f}")
+
+    df = bootstrap_effects(cells, resamples=resamples, seed=seed, workers=workers)
+    print("\n" + "="*80)
+    print(f"效应估计（{resamples} 次自助重抽样）")
+    print("="*80)
+    print(df.to_string(index=False))
+    print("="*80)
+
+    path = os.path.join(directory, 'experiment_effects.csv')
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    print(f"\n效应表已保存至: {path}")
+    return df
+
+
+def main(show=True, catalog_root='runs'):
     """
     主实验流程
+    
+    每次运行登记到运行目录，图表与摘要表保存在本批次的目录中，不覆盖以前的结果
+    
+    Args:
+        show: 是否弹出图表窗口（无界面环境下设为 False）
+        catalog_root: 运行目录的根路径
     """
     print("="*80)
     print("信息茧房与确认偏误共谋：2x2 实验设计")
@@ -213,30 +332,68 @@ def main():
     num_users = 100
     steps = 200
     
+    catalog = RunCatalog(catalog_root)
+    batch_id, directory = catalog.new_batch('experiment.py')
+    
     # 运行 2x2 实验
     results = {}
     
     for Q in [0.1, 0.8]:  # 低Q, 高Q
         for P in [0.1, 0.8]:  # 低P, 高P
             key = f"Q{Q}_P{P}"
-            results[key] = run_single_experiment(Q, P, num_users, steps)
+            seed = np.random.randint(2**31 - 1)
+            start = time.perf_counter()
+            model = run_single_experiment(Q, P, num_users, steps, seed)
+            results[key] = model
+            final = model.datacollector.get_model_vars_dataframe().iloc[-1]
+            catalog.record_run(batch_id, model_params(model), seed=seed, steps=steps,
+                               duration=time.perf_counter() - start,
+                               metrics={'polarization': final['Polarization'],
+                                        'mean_abs_diff': final['Mean_Abs_Diff'],
+                                        'esteban_ray_fine': final['Esteban_Ray_Fine']})
             print(f"✓ 完成: Q={Q}, P={P}\n")
     
     # 生成可视化和报告
     print("\n生成结果图表...")
-    plot_2x2_experiment(results, steps)
-    plot_polarization_comparison(results, steps)
-    create_summary_table(results)
+    plot_2x2_experiment(results, steps, show, directory)
+    plot_polarization_comparison(results, steps, show, directory)
+    create_summary_table(results, directory)
+    for filename in ['experiment_2x2_results.png', 'polarization_comparison.png', 'experiment_summary.csv']:
+        catalog.add_artifact(batch_id, filename, os.path.join(directory, filename))
+    catalog.close()
     
     print("\n" + "="*80)
     print("实验完成！")
     print("="*80)
-    print("\n主要发现:")
+    print(f"\n主要发现（批次 {batch_id}，结果保存在 {directory}）:")
     print("- 查看 experiment_2x2_results.png 了解各场景详情")
     print("- 查看 polarization_comparison.png 对比极化趋势")
     print("- 查看 experiment_summary.csv 获取定量结果")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="信息茧房 2x2 批量实验")
+    parser.add_argument('--headless', action='store_true',
+                        help="不弹出图表窗口，仅保存图片（适用于服务器）")
+    parser.add_argument('--replicates', type=int, default=None,
+                        help="每个单元格的重复次数；给出时运行重复实验并输出效应的置信区间")
+    parser.add_argument('--users', type=int, default=100, help="重复实验的用户数量")
+    parser.add_argument('--steps', type=int, default=200, help="重复实验的模拟步数")
+    parser.add_argument('--workers', type=int, default=None, help="并行进程数")
+    parser.add_argument('--resamples', type=int, default=10000, help="自助法重抽样次数")
+    parser.add_argument('--catalog', default='runs', help="运行目录的根路径")
+    args = parser.parse_args()
+    if args.replicates:
+        with RunCatalog(args.catalog) as catalog:
+            batch_id, directory = catalog.new_batch('experiment.py --replicates')
+            cells = run_replicates(args.replicates, args.users, args.steps, args.workers,
+                                   catalog, batch_id)
+            create_effects_table(cells, args.resamples, workers=args.workers, directory=directory)
+            catalog.add_artifact(batch_id, 'experiment_effects.csv',
+                                 os.path.join(directory, 'experiment_effects.csv'))
+    else:
+        if args.headless:
+            plt.switch_backend('Agg')
+        main(show=not args.headless, catalog_root=args.catalog)
 
@@ -0,0 +1,231 @@
+"""
+2x2 实验设计的无界面批量导出
+先运行模拟并记录每一步的快照，再用 Agg 后端并行渲染 PNG 帧，
+可选用 ffmpeg 合成为 MP4，适用于没有显示器的服务器
+"""
+import argparse
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
+matplotlib.rcParams['axes.unicode_minus'] = False
+import matplotlib.pyplot as plt
+import numpy as np
+from model import PlatformModel
+
+
+# 场景名称、Q、P、颜色（与 compare_2x2.py 一致）
+SCENARIOS = [
+    ('基线\n(低P低Q)', 0.1, 0.1, 'blue'),
+    ('选择性接触\n(高P低Q)', 0.1, 0.8, 'green'),
+    ('信息茧房\n(低P高Q)', 0.8, 0.1, 'orange'),
+    ('共谋\n(高P高Q)', 0.8, 0.8, 'red')
+]
+
+
+def record_snapshots(num_users=100, steps=200, learning_rate=0.1, scenarios=SCENARIOS):
+    """
+    运行四个场景并记录每一步的快照
+
+    Args:
+        num_users: 用户数量
+        steps: 模拟步数
+        learning_rate: 信念更新速率
+        scenarios: 场景列表 (名称, Q, P, 颜色)
+
+    Returns:
+        快照字典，数组的第一维为帧（第 0 帧为初始状态）
+    """
+    models = [
+        PlatformModel(num_users=num_users, Q_strength=Q, P_strength=P,
+                      learning_rate=learning_rate)
+        for _, Q, P, _ in scenarios
+    ]
+    bins = models[0].histogram_bins
+    n = len(models)
+
+    histograms = np.zeros((steps + 1, n, bins), dtype=np.int64)
+    groups = np.zeros((steps + 1, n, 3), dtype=np.int64)
+    polarization = np.zeros((steps + 1, n))
+    mean_belief = np.zeros((steps + 1, n))
+
+    def record(frame):
+        for j, model in enumerate(models):
+            histograms[frame, j] = model.belief_histogram
+            g = model.belief_groups
+            groups[frame, j] = (g['left'], g['center'], g['right'])
+            polarization[frame, j] = model.calculate_polarization()
+            mean_belief[frame, j] = model.calculate_mean_belief()
+
+    record(0)
+    for frame in range(1, steps + 1):
+        for model in models:
+            model.step()
+        record(frame)
+        if frame % 50 == 0:
+            print(f"  模拟进度: {frame}/{steps}")
+
+    return {
+        'names': [name for name, _, _, _ in scenarios],
+        'colors': [color for _, _, _, color in scenarios],
+        'edges': models[0].histogram_edges,
+        'num_users': num_users,
+        'histograms': histograms,
+        'groups': groups,
+        'polarization': polarization,
+        'mean_belief': mean_belief
+    }
+
+
+def draw_frame(fig, axes, snapshots, frame):
+    """
+    在给定画布上绘制一帧（布局与 compare_2x2.py 相同：3 行 4 列）
+    """
+    edges = snapshots['edges']
+    histograms = snapshots['histograms']
+    polarization = snapshots['polarization']
+    y_max = max(polarization[:frame + 1].max() * 1.1, 0.05)
+
+    for j, (name, color) in enumerate(zip(snapshots['names'], snapshots['colors'])):
+        ax_dist, ax_polar, ax_compare = axes[0][j], axes[1][j], axes[2][j]
+        for ax in (ax_dist, ax_polar, ax_compare):
+            ax.clear()
+
+        # 第1行：当前信念分布
+        ax_dist.hist(edges[:-1], bins=edges, weights=histograms[frame, j], color=color,
+                     edgecolor='black', alpha=0.7)
+        ax_dist.axvline(x=0, color='black', linestyle='--', linewidth=1, alpha=0.5)
+        ax_dist.set_xlabel('信念值', fontsize=9)
+        ax_dist.set_ylabel('人数', fontsize=9)
+        ax_dist.set_title(f'{name}\n步数: {frame}', fontsize=11, fontweight='bold')
+        ax_dist.set_xlim(-1, 1)
+        ax_dist.set_ylim(0, 0.4 * snapshots['num_users'])
+
+        left, center, right = snapshots['groups'][frame, j]
+        stats = (f'极化: {polarization[frame, j]:.3f}\n'
+                 f'均值: {snapshots["mean_belief"][frame, j]:.2f}\n'
+                 f'左:{left} 中:{center} 右:{right}')
+        ax_dist.text(0.02, 0.98, stats, transform=ax_dist.transAxes,
+                     verticalalignment='top', fontsize=7,
+                     bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
+
+        # 第2行：极化趋势
+        ax_polar.plot(np.arange(frame + 1), polarization[:frame + 1, j],
+                      color=color, linewidth=2, label=f'当前: {polarization[frame, j]:.3f}')
+        ax_polar.set_xlabel('时间步', fontsize=9)
+        ax_polar.set_ylabel('极化程度', fontsize=9)
+        ax_polar.set_title('极化趋势', fontsize=10)
+        ax_polar.grid(True, alpha=0.3)
+        ax_polar.legend(fontsize=8, loc='upper left')
+        ax_polar.set_ylim(0, y_max)
+
+        # 第3行：初始vs当前分布对比
+        ax_compare.hist(edges[:-1], bins=edges, weights=histograms[0, j], alpha=0.4,
+                        label='初始', color='gray', density=True)
+        ax_compare.hist(edges[:-1], bins=edges, weights=histograms[frame, j], alpha=0.6,
+                        label='当前', color=color, density=True)
+        ax_compare.axvline(x=0, color='black', linestyle='--', linewidth=1, alpha=0.3)
+        ax_compare.set_xlabel('信念值', fontsize=9)
+        ax_compare.set_ylabel('密度', fontsize=9)
+        ax_compare.set_title('分布对比', fontsize=10)
+        ax_compare.legend(fontsize=8)
+        ax_compare.set_xlim(-1, 1)
+        ax_compare.set_ylim(0, 3)
+
+
+def render_frame_range(snapshots, start, stop, out_dir, dpi=100):
+    """
+    渲染 [start, stop) 范围内的帧为 PNG（在工作进程中运行）
+
+    Returns:
+        渲染的帧数
+    """
+    fig, axes = plt.subplots(3, 4, figsize=(20, 12))
+    fig.suptitle('信息茧房 2x2 实验设计：算法 (Q) vs 确认偏误 (P)',
+                 fontsize=16, fontweight='bold')
+    for frame in range(start, stop):
+        draw_frame(fig, axes, snapshots, frame)
+        fig.tight_layout(rect=[0, 0, 1, 0.96])
+        fig.savefig(os.path.join(out_dir, f'frame_{frame:05d}.png'), dpi=dpi)
+    plt.close(fig)
+    return stop - start
+
+
+def render_frames(snapshots, out_dir, workers=None, dpi=100):
+    """
+    将全部帧按连续区间切分，交给进程池并行渲染
+
+    Args:
+        snapshots: record_snapshots 的返回值
+        out_dir: PNG 输出目录
+        workers: 进程数（默认 CPU 核数）
+        dpi: 输出分辨率
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    num_frames = len(snapshots['histograms'])
+    workers = workers or os.cpu_count() or 1
+    bounds = np.linspace(0, num_frames, min(workers, num_frames) + 1).astype(int)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(render_frame_range, snapshots, start, stop, out_dir, dpi)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        rendered = sum(f.result() for f in futures)
+    print(f"已渲染 {rendered} 帧至: {out_dir}")
+
+
+def assemble_video(out_dir, output, fps=10):
+    """
+    使用 ffmpeg 将 PNG 帧合成为 MP4
+
+    Returns:
+        成功时返回输出路径，未安装 ffmpeg 时返回 None
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        print("未找到 ffmpeg，跳过 MP4 合成（PNG 帧已保留）")
+        return None
+    subprocess.run([
+        ffmpeg, '-y', '-loglevel', 'error',
+        '-framerate', str(fps),
+        '-i', os.path.join(out_dir, 'frame_%05d.png'),
+        '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+        '-pix_fmt', 'yuv420p',
+        output
+    ], check=True)
+    print(f"视频已保存至: {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面导出 2x2 对比动画")
+    parser.add_argument('--users', type=int, default=100, help="用户数量")
+    parser.add_argument('--steps', type=int, default=200, help="模拟步数")
+    parser.add_argument('--learning-rate', type=float, default=0.1, help="信念更新速率")
+    parser.add_argument('--out', default='frames_2x2', help="PNG 帧输出目录")
+    parser.add_argument('--workers', type=int, default=None, help="渲染进程数")
+    parser.add_argument('--dpi', type=int, default=100, help="帧分辨率")
+    parser.add_argument('--mp4', default=None, help="MP4 输出路径（需要 ffmpeg）")
+    parser.add_argument('--fps', type=int, default=10, help="视频帧率")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("信息茧房 2x2 实验设计 - 无界面导出")
+    print("=" * 70)
+    print(f"\n模拟 {args.steps} 步，每个场景 {args.users} 个用户...")
+    snapshots = record_snapshots(args.users, args.steps, args.learning_rate)
+
+    print("\n渲染帧...")
+    render_frames(snapshots, args.out, args.workers, args.dpi)
+    if args.mp4:
+        assemble_video(args.out, args.mp4, args.fps)
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+信息接触多样性与回音室指标
+以每用户数组形式在线累积信息流与选择的统计量（Welford 方法），
+不需要保存消费历史即可在全规模下分析接触多样性
+"""
+import numpy as np
+
+
+class ExposureTracker:
+    """
+    每个用户的接触统计在线累积器
+
+    在信息流生成和内容选择时批量更新（多维时按第一个话题维度统计）：
+    - 信息流倾向性的均值与方差（按批合并的 Welford / Chan 算法）
+    - 选中内容与该次信息流平均倾向性的差距（运行平均）
+    - 跨立场接触：倾向性与用户当时信念符号相反的内容所占比例（信息流 / 消费）
+
+    属性:
+        feed_count / feed_mean / feed_m2: 每个用户累计接触的内容数、倾向性均值与离差平方和
+        cross_fed: 每个用户接触到的跨立场内容数
+        consumed_count / gap_mean: 每个用户的消费次数与平均选择差距
+        cross_consumed: 每个用户消费的跨立场内容数
+    """
+
+    def __init__(self, num_users):
+        self.feed_count = np.zeros(num_users, dtype=np.int64)
+        self.feed_mean = np.zeros(num_users)
+        self.feed_m2 = np.zeros(num_users)
+        self.cross_fed = np.zeros(num_users, dtype=np.int64)
+        self.consumed_count = np.zeros(num_users, dtype=np.int64)
+        self.gap_mean = np.zeros(num_users)
+        self.cross_consumed = np.zeros(num_users, dtype=np.int64)
+        # 每个用户最近一次信息流的平均倾向性与当时的信念（用于统计随后的选择）
+        self.last_feed_mean = np.zeros(num_users)
+        self.last_feed_belief = np.zeros(num_users)
+        self._summary_step = None
+        self._summary = None
+
+    def observe_feeds(self, agents, slants, valid, beliefs):
+        """
+        合并一批信息流的统计量
+
+        Args:
+            agents: 用户编号数组（互不重复）
+            slants: (用户数, 信息流宽度) 的倾向性矩阵
+            valid: 同形状的有效位置掩码
+            beliefs: 这批用户当前的信念
+        """
+        counts = valid.sum(axis=1)
+        has_feed = counts > 0
+        agents, slants, valid, beliefs, counts = (
+            agents[has_feed], slants[has_feed], valid[has_feed], beliefs[has_feed], counts[has_feed]
+        )
+        batch_mean = np.where(valid, slants, 0.0).sum(axis=1) / counts
+        batch_m2 = np.where(valid, (slants - batch_mean[:, None]) ** 2, 0.0).sum(axis=1)
+
+        # 两组样本的均值与离差平方和合并
+        previous = self.feed_count[agents]
+        total = previous + counts
+        delta = batch_mean - self.feed_mean[agents]
+        self.feed_mean[agents] += delta * counts / total
+        self.feed_m2[agents] += batch_m2 + delta ** 2 * previous * counts / total
+        self.feed_count[agents] = total
+        self.last_feed_mean[agents] = batch_mean
+        self.last_feed_belief[agents] = beliefs
+
+        self.cross_fed[agents] += np.count_nonzero(valid & (slants * beliefs[:, None] < 0), axis=1)
+
+    def observe_selections(self, agents, slants):
+        """
+        累积一批消费事件（同一用户可以出现多次），与该用户最近一次信息流比较
+
+        Args:
+            agents: 每次消费的用户编号
+            slants: 每次消费内容的倾向性
+        """
+        agents = np.atleast_1d(np.asarray(agents, dtype=np.int64))
+        slants = np.atleast_1d(np.asarray(slants, dtype=np.float64))
+        gaps = np.abs(slants - self.last_feed_mean[agents])
+        size = len(self.consumed_count)
+        counts = np.bincount(agents, minlength=size)
+        touched = np.flatnonzero(counts)
+        batch_mean = np.bincount(agents, weights=gaps, minlength=size)[touched] / counts[touched]
+        total = self.consumed_count[touched] + counts[touched]
+        self.gap_mean[touched] += (batch_mean - self.gap_mean[touched]) * counts[touched] / total
+        self.consumed_count[touched] = total
+        np.add.at(self.cross_consumed, agents, slants * self.last_feed_belief[agents] < 0)
+
+    def feed_variance(self):
+        """每个用户接触内容倾向性的方差（接触少于 2 个内容时为 nan）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.feed_count > 1, self.feed_m2 / self.feed_count, np.nan)
+
+    def summary(self):
+        """
+        总体汇总指标
+
+        Returns:
+            feed_variance: 用户接触内容倾向性方差的平均值（接触多样性）
+            selection_gap: 选中内容与信息流平均倾向性差距的平均值
+            cross_exposure: 全部接触中跨立场内容的比例
+            cross_consumption: 全部消费中跨立场内容的比例
+        """
+        variance = self.feed_variance()
+        seen = ~np.isnan(variance)
+        consumed = self.consumed_count > 0
+        return {
+            'feed_variance': float(variance[seen].mean()) if seen.any() else float('nan'),
+            'selection_gap': float(self.gap_mean[consumed].mean()) if consumed.any() else float('nan'),
+            'cross_exposure': float(self.cross_fed.sum() / max(self.feed_count.sum(), 1)),
+            'cross_consumption': float(self.cross_consumed.sum() / max(self.consumed_count.sum(), 1))
+        }
+
+    def _step_summary(self, model):
+        """同一次收集中各指标共用一次汇总（按 model.collect_count 缓存）"""
+        if self._summary_step != model.collect_count or self._summary is None:
+            self._summary = self.summary()
+            self._summary_step = model.collect_count
+        return self._summary
+
+    def reporters(self):
+        """数据收集器的 model_reporters 条目 {列名: lambda 模型: 值}"""
+        names = {
+            'feed_variance': 'Feed_Slant_Var',
+            'selection_gap': 'Selection_Gap',
+            'cross_exposure': 'Cross_Exposure',
+            'cross_consumption': 'Cross_Consumption'
+        }
+        return {column: (lambda model, key=key: self._step_summary(model)[key])
+                for key, column in names.items()}
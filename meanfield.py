@@ -0,0 +1,230 @@
+"""
+平均场密度模型 (MeanFieldModel)
+不模拟单个用户，而是在 [-1, 1] 的细网格上演化信念密度，
+适用于数百万用户、只关心总体指标（极化程度等）的场景
+"""
+import math
+
+import numpy as np
+from mesa import Model
+from mesa import DataCollector
+
+
+# NumPy 2.0 将 trapz 更名为 trapezoid（新版本中 trapz 已移除）
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def _normal_cdf(x, mean, std):
+    """正态分布的累积分布函数"""
+    erf = np.frompyfunc(math.erf, 1, 1)
+    return 0.5 * (1.0 + erf((np.asarray(x) - mean) / (std * math.sqrt(2.0))).astype(np.float64))
+
+
+def _deposit(positions, weights, grid):
+    """
+    将位于 positions 的质量按线性插值分配到相邻的两个网格点
+
+    Returns:
+        (左侧网格点下标, 右侧网格点下标, 左侧权重, 右侧权重)
+    """
+    spacing = grid[1] - grid[0]
+    location = np.clip((positions - grid[0]) / spacing, 0.0, len(grid) - 1.0)
+    left = np.minimum(location.astype(np.int64), len(grid) - 2)
+    fraction = location - left
+    return left, left + 1, weights * (1.0 - fraction), weights * fraction
+
+
+class MeanFieldModel(Model):
+    """
+    信念密度的平均场近似，机制与 PlatformModel 的默认设置一致：
+
+    - 内容池为 [-1, 1] 上的均匀分布（大内容池极限，不放回抽样近似为独立抽样）
+    - 信息流 (Q 机制)：feed_size 个内容，密度 ∝ exp(-|s - b| × Q×5)
+    - 选择 (P 机制)：按 w(s) = exp(-|s - b| × P×5) 的权重从信息流中选一个，
+      选中倾向性的密度为 f(s|b) = k·q(s)·w(s)·E[1 / (w(s) + W)]，
+      W 为其余 k-1 个内容的权重之和，利用 1/x = ∫ exp(-t x) dt 精确写成
+      f(s|b) = k·q(s)·w(s)·∫ exp(-t w(s)) φ(t)^(k-1) dt，φ(t) = E_q[exp(-t w)]
+    - 信念更新：b' = b + learning_rate × (s - b)，质量线性插值到相邻网格点
+
+    转移矩阵只依赖参数，在初始化时一次计算；每步只需一次密度向量与
+    (网格数 × 网格数) 矩阵的乘法，计算量与用户数量无关
+
+    属性:
+        num_users: 用户数量（只用于把密度换算为人数）
+        grid: 信念网格点
+        density: 每个网格点上的概率质量（和为 1）
+        transition: 转移矩阵，transition[i, j] 为从网格点 i 转移到 j 的概率
+        belief_histogram / belief_groups: 与 PlatformModel 含义相同（按人数换算）
+
+    不包含社交网络、动态内容池和异质用户参数
+    """
+
+    GROUP_THRESHOLD = 0.3
+
+    def __init__(self, num_users=1_000_000, Q_strength=0.5, P_strength=0.5,
+                 learning_rate=0.05, feed_size=10, activity=1.0, grid_size=401,
+                 histogram_bins=20, quadrature_points=400, seed=None):
+        super().__init__(seed=seed)
+        self.num_users = num_users
+        self.Q_strength = Q_strength
+        self.P_strength = P_strength
+        self.learning_rate = learning_rate
+        self.feed_size = feed_size
+        self.activity = activity
+        self.grid = np.linspace(-1.0, 1.0, grid_size)
+
+        # 初始信念：与 PlatformModel 相同的截断正态分布 N(0, 0.2)，截断质量落在端点
+        midpoints = (self.grid[1:] + self.grid[:-1]) / 2.0
+        cdf = _normal_cdf(np.concatenate([[-np.inf], midpoints, [np.inf]]), 0.0, 0.2)
+        self.density = np.diff(cdf)
+
+        self.transition = self._build_transition(quadrature_points)
+
+        self.histogram_bins = histogram_bins
+        self.histogram_edges = np.linspace(-1.0, 1.0, histogram_bins + 1)
+        self.update_belief_distribution()
+
+        self.datacollector = DataCollector(
+            model_reporters={
+                "Polarization": self.calculate_polarization,
+                "Mean_Belief": self.calculate_mean_belief,
+                "Belief_Std": self.calculate_belief_std
+            }
+        )
+
+    def selection_density(self, quadrature_points=400):
+        """
+        每个信念网格点上被选中内容倾向性的分布 f(s|b)
+
+        Returns:
+            (网格数, 网格数) 矩阵，第 i 行为信念位于 grid[i] 时选中倾向性的离散分布
+        """
+        grid = self.grid
+        k = self.feed_size
+        # 内容倾向性的梯形求积权重（均匀内容密度）
+        content = np.full(len(grid), grid[1] - grid[0])
+        content[[0, -1]] /= 2.0
+        distance = np.abs(grid[None, :] - grid[:, None])
+        feed = content * np.exp(-distance * self.Q_strength * 5)
+        feed /= feed.sum(axis=1, keepdims=True)
+        weight = np.exp(-distance * self.P_strength * 5)
+
+        selection = np.empty_like(feed)
+        for i in range(len(grid)):
+            # 对数网格上的数值积分 ∫ exp(-t w(s)) φ(t)^(k-1) dt
+            t_max = 50.0 / weight[i].min()
+            log_t = np.linspace(np.log(1e-6), np.log(t_max), quadrature_points)
+            t = np.exp(log_t)
+            decay = np.exp(-np.outer(t, weight[i]))          # (积分点, 网格数)
+            phi = decay @ feed[i]
+            integrand = decay * (phi ** (k - 1))[:, None] * t[:, None]
+            integral = 1e-6 + _trapezoid(integrand, log_t, axis=0)
+            selection[i] = k * feed[i] * weight[i] * integral
+        selection /= selection.sum(axis=1, keepdims=True)
+        return selection
+
+    def _build_transition(self, quadrature_points):
+        """组合选择分布与信念更新，得到网格上的转移矩阵"""
+        grid = self.grid
+        size = len(grid)
+        selection = self.selection_density(quadrature_points)
+        targets = grid[:, None] + self.learning_rate * (grid[None, :] - grid[:, None])
+        left, right, left_weight, right_weight = _deposit(targets.ravel(), selection.ravel(), grid)
+        sources = np.repeat(np.arange(size), size)
+        transition = np.bincount(sources * size + left, weights=left_weight, minlength=size * size)
+        transition += np.bincount(sources * size + right, weights=right_weight, minlength=size * size)
+        transition = transition.reshape(size, size)
+        # 每步只有 activity 比例的用户行动
+        return self.activity * transition + (1.0 - self.activity) * np.eye(size)
+
+    @property
+    def primary_beliefs(self):
+        """与 PlatformModel 接口一致：网格点（配合 density 作为权重）"""
+        return self.grid
+
+    def update_belief_distribution(self):
+        """由密度计算固定分箱直方图和左/中/右人数（按人数换算）"""
+        bins = self.histogram_bins
+        bin_index = ((self.grid + 1.0) * (bins / 2.0)).astype(np.intp)
+        np.clip(bin_index, 0, bins - 1, out=bin_index)
+        self.belief_histogram = np.bincount(bin_index, weights=self.density, minlength=bins) * self.num_users
+
+        left = float(self.density[self.grid < -self.GROUP_THRESHOLD].sum()) * self.num_users
+        right = float(self.density[self.grid > self.GROUP_THRESHOLD].sum()) * self.num_users
+        self.belief_groups = {
+            'left': left,
+            'center': self.num_users - left - right,
+            'right': right
+        }
+
+    def calculate_polarization(self):
+        """极化程度（信念方差）"""
+        mean = self.calculate_mean_belief()
+        return float(self.density @ (self.grid - mean) ** 2)
+
+    def calculate_mean_belief(self):
+        """平均信念"""
+        return float(self.density @ self.grid)
+
+    def calculate_belief_std(self):
+        """信念标准差"""
+        return math.sqrt(self.calculate_polarization())
+
+    def step(self):
+        """演化一步：密度乘以转移矩阵"""
+        self.datacollector.collect(self)
+        self.density = self.density @ self.transition
+        self.update_belief_distribution()
+
+
+def compare_with_agents(Q_strength=0.8, P_strength=0.8, steps=50, user_counts=(1000, 10000),
+                        replicates=2, content_pool_size=5000, **params):
+    """
+    在较小的用户规模上比较平均场模型与基于代理的模型的极化轨迹
+
+    Args:
+        Q_strength: 算法个性化强度
+        P_strength: 确认偏误强度
+        steps: 模拟步数
+        user_counts: 代理模型的用户规模
+        replicates: 每个规模的重复次数（取平均轨迹）
+        content_pool_size: 代理模型的内容池大小（平均场对应无限内容池，
+            有限内容池与有限用户数带来的偏差都计入误差）
+        **params: 两种模型共用的其他参数（如 learning_rate、feed_size）
+
+    Returns:
+        {用户数: (平均绝对误差, 最大绝对误差, 末步相对误差)}
+    """
+    from model import PlatformModel
+
+    mean_field = MeanFieldModel(Q_strength=Q_strength, P_strength=P_strength, **params)
+    for _ in range(steps):
+        mean_field.step()
+    expected = np.asarray(mean_field.datacollector.model_vars["Polarization"])
+
+    results = {}
+    for num_users in user_counts:
+        trajectories = []
+        for seed in range(replicates):
+            model = PlatformModel(num_users=num_users, Q_strength=Q_strength, P_strength=P_strength,
+                                  content_pool_size=content_pool_size, backend='numpy',
+                                  seed=seed, **params)
+            for _ in range(steps):
+                model.step()
+            trajectories.append(model.datacollector.model_vars["Polarization"])
+        observed = np.mean(trajectories, axis=0)
+        error = np.abs(observed - expected)
+        results[num_users] = (float(error.mean()), float(error.max()),
+                              float(error[-1] / max(expected[-1], 1e-12)))
+    return results
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("平均场密度模型 vs 基于代理的模型：极化轨迹误差")
+    print("=" * 70)
+    for Q, P in [(0.1, 0.1), (0.1, 0.8), (0.8, 0.1), (0.8, 0.8)]:
+        print(f"\nQ={Q}, P={P}")
+        for num_users, (mean_error, max_error, final_error) in compare_with_agents(Q, P).items():
+            print(f"  N={num_users:6d}: 平均误差 {mean_error:.5f}  最大误差 {max_error:.5f}  "
+                  f"末步相对误差 {final_error:.2%}")
@@ -0,0 +1,285 @@
+"""
+极化指标
+在一维信念数组上一次向量化计算多种极化指标：双峰系数、Esteban-Ray 极化、
+直方图熵、群体距离指数和极端观点比例；可按需选择作为模型的数据收集指标
+
+成对距离类指标（平均绝对差、Esteban-Ray）不做 O(N²) 的两两比较：
+平均绝对差通过排序 + 前缀和 O(N log N) 精确计算，
+Esteban-Ray 在分箱上用前缀和 O(B) 计算，细分箱版本附带误差上界
+"""
+import numpy as np
+
+
+# 左翼 / 右翼阈值（与 PlatformModel.GROUP_THRESHOLD 一致）与极端观点阈值
+GROUP_THRESHOLD = 0.3
+EXTREME_THRESHOLD = 0.8
+
+
+def _histogram(beliefs, bins):
+    """[-1, 1] 上固定分箱的直方图计数（与 PlatformModel 的分箱方式一致）"""
+    bin_index = ((beliefs + 1.0) * (bins / 2.0)).astype(np.intp)
+    np.clip(bin_index, 0, bins - 1, out=bin_index)
+    return np.bincount(bin_index, minlength=bins)
+
+
+def bimodality_coefficient(beliefs):
+    """
+    Sarle 双峰系数 BC = (g² + 1) / (k + 3(n-1)² / ((n-2)(n-3)))
+
+    g 为样本偏度，k 为样本超额峰度（均为小样本校正）；
+    BC > 5/9 ≈ 0.555 通常视为双峰（极化）分布的迹象
+    """
+    return _moment_metrics(np.asarray(beliefs, dtype=np.float64))['bimodality']
+
+
+def esteban_ray(beliefs, alpha=1.6, bins=20):
+    """
+    Esteban-Ray 极化指数（基于直方图）
+
+    ER = Σ_i Σ_j π_i^(1+α) · π_j · |y_i - y_j|，π 为各分箱的人口比例，
+    y 为分箱中点；α 越大越强调群体内部的认同（α ∈ [0, 1.6]）
+    """
+    return _histogram_metrics(_histogram(np.asarray(beliefs), bins), alpha)['esteban_ray']
+
+
+def histogram_entropy(beliefs, bins=20):
+    """直方图的归一化香农熵（0 表示全部集中在一个分箱，1 表示均匀分布）"""
+    return _histogram_metrics(_histogram(np.asarray(beliefs), bins), 1.6)['entropy']
+
+
+def mean_absolute_difference(beliefs):
+    """
+    平均绝对差：所有用户对之间 |b_i - b_j| 的平均值（精确，O(N log N)）
+
+    排序后第 i 小的信念 x_(i) 在 i 个比它小的值的差中取正号、在 n-1-i 个
+    比它大的值的差中取负号，因此 Σ_{i<j} |x_i - x_j| = Σ_i (2i - n + 1) · x_(i)
+    """
+    return _sorted_metrics(np.asarray(beliefs, dtype=np.float64))['mean_abs_diff']
+
+
+def esteban_ray_fine(beliefs, alpha=1.6, bins=1000):
+    """
+    细分箱 Esteban-Ray 极化指数及其误差上界
+
+    以细分箱为群体，群体位置取箱内平均信念；用前缀和在 O(B) 内得到
+    每个群体到其他群体的加权距离。群体内个体与群体位置的距离不超过箱宽 h，
+    因此与按个体位置计算距离项的差距不超过 h · Σ π_i^(1+α)
+
+    Returns:
+        (指数, 误差上界)
+    """
+    values = _fine_histogram_metrics(np.asarray(beliefs, dtype=np.float64), alpha, bins)
+    return values['esteban_ray_fine'], values['esteban_ray_fine_error']
+
+
+def group_distance(beliefs, threshold=GROUP_THRESHOLD):
+    """
+    群体距离指数：右翼平均信念与左翼平均信念之差，乘以两个群体的规模均衡度
+    4 · p_左 · p_右（两翼各占一半时为 1，任一翼为空时指数为 0）
+    """
+    return _group_metrics(np.asarray(beliefs, dtype=np.float64), threshold, EXTREME_THRESHOLD)['group_distance']
+
+
+def extremism_share(beliefs, threshold=EXTREME_THRESHOLD):
+    """极端观点比例：|信念| 超过阈值的用户占比"""
+    return _group_metrics(np.asarray(beliefs, dtype=np.float64), GROUP_THRESHOLD, threshold)['extremism']
+
+
+def _moment_metrics(beliefs):
+    """由中心矩一次得到方差、偏度、峰度和双峰系数"""
+    n = len(beliefs)
+    centered = beliefs - beliefs.mean()
+    squared = centered * centered
+    m2 = squared.mean()
+    m3 = (squared * centered).mean()
+    m4 = (squared * squared).mean()
+    if n < 4 or m2 <= 0:
+        return {'variance': float(m2), 'bimodality': float('nan')}
+    # 小样本校正的偏度与超额峰度
+    skewness = m3 / m2 ** 1.5 * np.sqrt(n * (n - 1)) / (n - 2)
+    kurtosis = ((n + 1) * (m4 / m2 ** 2 - 3.0) + 6.0) * (n - 1) / ((n - 2) * (n - 3))
+    bimodality = (skewness ** 2 + 1.0) / (kurtosis + 3.0 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+    return {'variance': float(m2), 'bimodality': float(bimodality)}
+
+
+def _sorted_metrics(beliefs):
+    """排序 + 前缀权重得到平均绝对差"""
+    n = len(beliefs)
+    if n < 2:
+        return {'mean_abs_diff': 0.0}
+    ordered = np.sort(beliefs)
+    total = (2.0 * np.arange(n) - (n - 1)) @ ordered
+    return {'mean_abs_diff': float(total / (n * (n - 1) / 2.0))}
+
+
+def _esteban_ray(shares, positions, alpha):
+    """
+    Esteban-Ray 指数 Σ_i π_i^(1+α) Σ_j π_j |y_i - y_j|（位置已按升序排列）
+
+    Σ_j π_j |y_i - y_j| = y_i · (左侧比例 - 右侧比例) + (右侧质量矩 - 左侧质量矩)，
+    左右两侧的比例与质量矩均为前缀和，总代价 O(B)
+    """
+    moments = shares * positions
+    shares_below = np.cumsum(shares) - shares
+    moments_below = np.cumsum(moments) - moments
+    shares_above = shares.sum() - shares_below - shares
+    moments_above = moments.sum() - moments_below - moments
+    spread = positions * (shares_below - shares_above) + moments_above - moments_below
+    return float(shares ** (1.0 + alpha) @ spread)
+
+
+def _histogram_metrics(counts, alpha):
+    """由直方图计数得到 Esteban-Ray 指数和归一化熵（代价只与分箱数有关）"""
+    bins = len(counts)
+    shares = counts / max(counts.sum(), 1)
+    centers = -1.0 + (np.arange(bins) + 0.5) * (2.0 / bins)
+    esteban_ray = _esteban_ray(shares, centers, alpha)
+    nonzero = shares[shares > 0]
+    entropy = float(-(nonzero * np.log(nonzero)).sum() / np.log(bins))
+    return {'esteban_ray': esteban_ray, 'entropy': entropy}
+
+
+def _fine_histogram_metrics(beliefs, alpha, bins):
+    """细分箱 Esteban-Ray 指数（群体位置为箱内平均信念）及其误差上界"""
+    bin_index = ((beliefs + 1.0) * (bins / 2.0)).astype(np.intp)
+    np.clip(bin_index, 0, bins - 1, out=bin_index)
+    counts = np.bincount(bin_index, minlength=bins)
+    sums = np.bincount(bin_index, weights=beliefs, minlength=bins)
+    occupied = counts > 0
+    shares = counts[occupied] / max(len(beliefs), 1)
+    positions = sums[occupied] / counts[occupied]
+    return {
+        'esteban_ray_fine': _esteban_ray(shares, positions, alpha),
+        'esteban_ray_fine_error': float((2.0 / bins) * (shares ** (1.0 + alpha)).sum())
+    }
+
+
+def _group_metrics(beliefs, threshold, extreme_threshold):
+    """左右两翼的规模、平均信念与极端观点比例"""
+    n = max(len(beliefs), 1)
+    left = beliefs < -threshold
+    right = beliefs > threshold
+    left_count = np.count_nonzero(left)
+    right_count = np.count_nonzero(right)
+    if left_count and right_count:
+        gap = beliefs[right].mean() - beliefs[left].mean()
+        distance = float(gap * 4.0 * (left_count / n) * (right_count / n))
+    else:
+        distance = 0.0
+    return {
+        'left_share': float(left_count / n),
+        'center_share': float((len(beliefs) - left_count - right_count) / n),
+        'right_share': float(right_count / n),
+        'group_distance': distance,
+        'extremism': float(np.count_nonzero(np.abs(beliefs) > extreme_threshold) / n)
+    }
+
+
+def compute_metrics(beliefs, names=None, bins=20, alpha=1.6, fine_bins=1000,
+                    threshold=GROUP_THRESHOLD, extreme_threshold=EXTREME_THRESHOLD):
+    """
+    一次计算多个极化指标，共用中间结果（中心矩、直方图、分组掩码各只计算一次）
+
+    Args:
+        beliefs: 一维信念数组
+        names: 需要的指标名称（见 METRICS），None 表示全部
+        bins: 直方图分箱数
+        alpha: Esteban-Ray 指数的认同参数
+        fine_bins: 细分箱 Esteban-Ray 指数的分箱数
+        threshold: 左 / 右翼阈值
+        extreme_threshold: 极端观点阈值
+
+    Returns:
+        {指标名称: 值}
+    """
+    names = list(METRICS) if names is None else _check_names(names)
+    beliefs = np.asarray(beliefs, dtype=np.float64)
+    groups = {METRICS[name] for name in names}
+
+    values = {}
+    if 'moments' in groups:
+        values.update(_moment_metrics(beliefs))
+    if 'sorted' in groups:
+        values.update(_sorted_metrics(beliefs))
+    if 'histogram' in groups:
+        values.update(_histogram_metrics(_histogram(beliefs, bins), alpha))
+    if 'fine_histogram' in groups:
+        values.update(_fine_histogram_metrics(beliefs, alpha, fine_bins))
+    if 'groups' in groups:
+        values.update(_group_metrics(beliefs, threshold, extreme_threshold))
+    return {name: values[name] for name in names}
+
+
+# 指标名称 -> 所需的中间结果类别
+METRICS = {
+    'variance': 'moments',
+    'bimodality': 'moments',
+    'mean_abs_diff': 'sorted',
+    'esteban_ray': 'histogram',
+    'esteban_ray_fine': 'fine_histogram',
+    'esteban_ray_fine_error': 'fine_histogram',
+    'entropy': 'histogram',
+    'group_distance': 'groups',
+    'extremism': 'groups',
+    'left_share': 'groups',
+    'center_share': 'groups',
+    'right_share': 'groups'
+}
+
+# 指标名称 -> 数据收集器中的列名
+REPORTER_NAMES = {
+    'variance': 'Variance',
+    'bimodality': 'Bimodality',
+    'mean_abs_diff': 'Mean_Abs_Diff',
+    'esteban_ray': 'Esteban_Ray',
+    'esteban_ray_fine': 'Esteban_Ray_Fine',
+    'esteban_ray_fine_error': 'Esteban_Ray_Fine_Error',
+    'entropy': 'Entropy',
+    'group_distance': 'Group_Distance',
+    'extremism': 'Extremism',
+    'left_share': 'Left_Share',
+    'center_share': 'Center_Share',
+    'right_share': 'Right_Share'
+}
+
+
+def _check_names(names):
+    """检查指标名称，返回名称列表；有未知名称时抛出 ValueError"""
+    names = list(names)
+    unknown = [name for name in names if name not in METRICS]
+    if unknown:
+        raise ValueError(f"未知的极化指标: {unknown}（可选 {list(METRICS)}）")
+    return names
+
+
+class MetricsReporter:
+    """
+    为模型的数据收集器提供一组极化指标
+
+    同一次收集中各指标共用一次 compute_metrics 的结果（按 model.collect_count 缓存），
+    收集多个指标的代价与收集一个相同
+
+    属性:
+        names: 选中的指标名称
+        options: 传给 compute_metrics 的其他参数
+    """
+
+    def __init__(self, names, **options):
+        self.names = _check_names(names)
+        self.options = options
+        self._step = None
+        self._values = None
+
+    def values(self, model):
+        """本次收集的全部选中指标"""
+        if self._step != model.collect_count or self._values is None:
+            self._values = compute_metrics(model.primary_beliefs, self.names, **self.options)
+            self._step = model.collect_count
+        return self._values
+
+    def reporters(self):
+        """数据收集器的 model_reporters 条目 {列名: lambda 模型: 值}"""
+        return {
+            REPORTER_NAMES[name]: (lambda model, name=name: self.values(model)[name])
+            for name in self.names
+        }
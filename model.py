@@ -6,6 +6,17 @@ import numpy as np
 from mesa import Model
 from mesa import DataCollector
 from agent import UserAgent
+from content import ContentPool
+from kernels import get_backend, select_and_update, select_many_and_update
+from metrics import MetricsReporter, compute_metrics
+from exposure import ExposureTracker
+from trajectory import BeliefTrajectory
+from profiler import PhaseProfiler
+from distributions import sample_parameter
+from network import build_network
+from recommenders import get_recommender
+from scheduler import get_scheduler
+from spatial_index import IVFIndex
 
 
 class PlatformModel(Model):
@@ -15,69 +26,245 @@ class PlatformModel(Model):
     属性:
         num_users: 用户数量
         Q_strength: 算法个性化强度 (0-1)
-        P_strength: 确认偏误强度 (0-1)
-        content_pool: 信息内容池
+        P_strength: 确认偏误强度 (0-1)，异质用户时为总体分布的标称值
+        content_pool: 信息内容池 (ContentPool，环形缓冲区)；指定 content_source
+            （save_content_pool 写出的目录）时从磁盘内存映射加载
         learning_rate: 信念更新速率
+        beliefs: 全体用户信念数组（UserAgent.belief 读写其中对应元素）
+        belief_histogram: 固定分箱的信念直方图计数，每步更新
+        belief_groups: 左翼 / 中间 / 右翼人数
+        history_limit: 每个代理保留的消费记录条数上限（None 表示不限）
+        max_records: 数据收集器保留的最近记录步数上限（None 表示不限）
+        records_dropped: 因 max_records 而丢弃的最早记录步数
+        collect_count: 已记录的状态数（每次 collect 加一，报告器的缓存以此区分）
+        network: 可选的社交网络 (SocialNetwork)，None 表示没有社交关系
+        peer_influence: 每步信念向邻居平均信念靠拢的比例
+        content_arrival: 动态内容池每步新增内容的期望数量（0 表示静态内容池）
+        author_share: 新增内容中由用户创作的比例（倾向性接近作者信念）
+        author_noise: 用户创作内容相对作者信念的噪声标准差
+        belief_dim: 信念 / 内容倾向性的维度（多话题时为话题向量，距离为欧氏距离）
+        recommender: 推荐算法（见 recommenders.py），默认为指数相似度核 'kernel'
+        feed_index: 信息流候选检索方式，None 为全量扫描，'ivf' 为倒排近邻索引
+        backend: 内容选择与信念更新的执行方式，'agents' 为逐代理执行（默认），
+            'numpy' / 'numba' / 'auto' 为对全体行动用户的融合计算（不记录代理的 history）
+        update_mode: 'sequential' 为逐个用户依次更新（默认），'synchronous' 为同步更新：
+            所有用户读取第 t 步的状态、写入第 t+1 步的状态，以融合内核对全体用户一次计算
+        scheduler: 异步激活调度器（见 scheduler.py），None 表示每步每个用户按 activity
+            概率行动一次；'poisson' / 'events' 时用户按 agent_activity_rate 产生行动事件
+        agent_consume: 每个用户每步从信息流中消费的内容数量（取值方式同 feed_size）
+        consume_with_replacement: 一步内多次消费时是否放回抽样（可重复消费同一内容）
+        metrics: 额外收集的极化指标名称列表（见 metrics.py，如 ['bimodality', 'esteban_ray']），
+            每步一次计算，作为数据收集器的模型指标
+        exposure: 可选的接触统计累积器 (ExposureTracker，track_exposure=True 时启用)，
+            在信息流生成和内容选择时在线更新，每步报告接触多样性与跨立场接触比例
+        trajectory: 可选的信念轨迹 (BeliefTrajectory，record_trajectory=True 时启用)，
+            每步数据收集时以稠密数组记录全体信念，按步 / 按用户切片无需查询多级索引；
+            启用时数据收集器不再登记逐代理的 Belief 变量
+        profiler: 可选的分阶段计时器 (PhaseProfiler，profile=True 时启用)，累计信息流生成、
+            内容选择、信念更新、数据收集等阶段的耗时，并收集每步吞吐量 Agent_Steps_Per_Sec；
+            未启用时为 None，不产生任何开销
+        agent_activity_rate: 每个用户每步的期望行动次数（可大于 1，默认等于 activity）；
+            整体替换或经 set_activity_rate 修改时 activity_rate_version 递增，调度器据此重建状态
+        agent_P / agent_learning_rate / agent_activity / agent_feed_size:
+            每个用户的确认偏误强度、信念更新速率、每步行动概率、信息流大小（连续数组）
+    
+    异质用户参数通过 P_distribution、learning_rate_distribution、activity、feed_size
+    配置，取值可以是常数、(分布名称, 参数...) 元组、函数或数组，见 distributions.py
+    
+    多维时，极化程度为各维度方差之和，平均信念、标准差、直方图和左/中/右人数
+    按第一个话题维度统计
     """
     
+    # 左翼 / 右翼的信念阈值（与 run_simple、analyze 的统计口径一致）
+    GROUP_THRESHOLD = 0.3
+    
     def __init__(self, num_users=100, Q_strength=0.5, P_strength=0.5, 
-                 learning_rate=0.05, content_pool_size=1000):
-        super().__init__()
+                 learning_rate=0.05, content_pool_size=1000, histogram_bins=20,
+                 history_limit=None, max_records=None, network=None, peer_influence=0.0,
+                 content_arrival=0, content_ttl=None, content_decay=None,
+                 content_capacity=None, author_share=0.0, author_noise=0.1,
+                 belief_dim=1, feed_index=None, index_probes=8,
+                 P_distribution=None, learning_rate_distribution=None,
+                 activity=1.0, feed_size=10, recommender='kernel', content_source=None,
+                 backend='agents', seed=None, scheduler=None, activity_rate=None,
+                 update_mode='sequential', consume_per_step=1, consume_with_replacement=False,
+                 metrics=None, track_exposure=False, record_trajectory=False, profile=False):
+        super().__init__(seed=seed)
+        if seed is not None:
+            # 模型中的随机过程统一使用 np.random 全局随机数生成器
+            np.random.seed(seed)
         self.num_users = num_users
         self.Q_strength = Q_strength
         self.P_strength = P_strength
         self.learning_rate = learning_rate
+        self.history_limit = history_limit
+        self.max_records = max_records
+        self.records_dropped = 0
+        self._state_collected = False
+        self.collect_count = 0
+        self.belief_dim = belief_dim
         
         # 1. 初始化内容池：在 [-1, 1] 范围内均匀分布
-        self.content_pool = self._create_content_pool(content_pool_size)
+        # 动态模式下内容池是固定容量的环形缓冲区，新内容覆盖最早的内容
+        self.content_arrival = content_arrival
+        self.author_share = author_share
+        self.author_noise = author_noise
+        # 指定 content_source 时从磁盘内存映射加载语料（多进程共享只读页）
+        if content_source is not None:
+            self.content_pool = ContentPool.from_file(content_source, ttl=content_ttl, decay=content_decay)
+            if self.content_pool.dim != belief_dim:
+                raise ValueError(f"内容语料维度 {self.content_pool.dim} 与信念维度 {belief_dim} 不一致")
+        else:
+            self.content_pool = self._create_content_pool(
+                content_pool_size, capacity=content_capacity, ttl=content_ttl, decay=content_decay
+            )
+        self.recommender = get_recommender(recommender)
+        # 自定义推荐算法可以不实现 observe / update
+        self._observe_consumption = getattr(self.recommender, 'observe', None)
+        self._update_recommender = getattr(self.recommender, 'update', None)
+        self._prefetched_feeds = None
+        # 'agents' 为逐代理执行（Mesa 调度），其余为群体融合内核（见 kernels.py）
+        if update_mode not in ('sequential', 'synchronous'):
+            raise ValueError(f"未知的更新方式: {update_mode}")
+        self.update_mode = update_mode
+        if backend == 'agents' and update_mode == 'sequential':
+            self.backend, self._kernel = backend, None
+        else:
+            # 同步更新总是使用群体融合内核
+            self.backend, self._kernel = get_backend('auto' if backend == 'agents' else backend)
+        if feed_index == 'ivf':
+            self.content_pool.build_index(IVFIndex(n_probe=index_probes))
+        elif feed_index is not None:
+            raise ValueError(f"未知的信息流索引: {feed_index}")
         
         # 2. 创建用户代理
         # 初始信念设置为围绕0的正态分布（温和状态）
+        # 信念和用户参数统一存放在连续数组中，代理通过 index 访问自己的元素
+        self.beliefs = np.clip(np.random.normal(0, 0.2, self._shape(self.num_users)), -1.0, 1.0)
+        self.agent_P = sample_parameter(
+            self.P_strength if P_distribution is None else P_distribution,
+            self.num_users, low=0.0, high=1.0
+        )
+        self.agent_learning_rate = sample_parameter(
+            self.learning_rate if learning_rate_distribution is None else learning_rate_distribution,
+            self.num_users, low=0.0, high=1.0
+        )
+        self.agent_activity = sample_parameter(activity, self.num_users, low=0.0, high=1.0)
+        self.agent_feed_size = sample_parameter(feed_size, self.num_users, low=1, dtype=np.int64)
+        self.agent_consume = sample_parameter(consume_per_step, self.num_users, low=1, dtype=np.int64)
+        self.consume_with_replacement = consume_with_replacement
+        self.activity_rate_version = 0
+        self.agent_activity_rate = (
+            self.agent_activity.copy() if activity_rate is None
+            else sample_parameter(activity_rate, self.num_users, low=0.0)
+        )
+        if scheduler is not None and update_mode == 'synchronous':
+            raise ValueError("同步更新方式每步每个用户只行动一次，不能与异步调度器同时使用")
+        self.scheduler = None if scheduler is None else get_scheduler(scheduler)
+        # 按编号排列的代理列表，调度器按编号激活代理
+        self.user_agents = []
         for i in range(self.num_users):
-            initial_belief = np.random.normal(0, 0.2)
-            initial_belief = np.clip(initial_belief, -1.0, 1.0)
-            
-            UserAgent(
+            agent = UserAgent(
                 model=self,
-                initial_belief=initial_belief,
-                P_strength=self.P_strength,
-                learning_rate=self.learning_rate
+                index=i,
+                P_strength=self.agent_P[i],
+                learning_rate=self.agent_learning_rate[i],
+                history_limit=self.history_limit
             )
+            self.user_agents.append(agent)
+        
+        # 3. 可选的社交网络：网络类型名称、配置字典、边列表文件或 SocialNetwork 实例
+        self.network = None if network is None else build_network(network, self.num_users)
+        self.peer_influence = peer_influence
         
-        # 3. 设置数据收集器
+        # 4. 固定分箱的信念直方图（图表直接绘制计数，无需遍历代理）
+        self.histogram_bins = histogram_bins
+        self.histogram_edges = np.linspace(-1.0, 1.0, histogram_bins + 1)
+        self.update_belief_distribution()
+        
+        # 5. 可选的接触多样性统计（每用户数组，不需要保存消费历史）
+        self.exposure = ExposureTracker(self.num_users) if track_exposure else None
+        self.trajectory = BeliefTrajectory(self.num_users, self.belief_dim) if record_trajectory else None
+        
+        # 6. 设置数据收集器（可选的扩展极化指标每步共用一次计算）
+        self.metrics = None if metrics is None else MetricsReporter(
+            metrics, bins=histogram_bins, threshold=self.GROUP_THRESHOLD
+        )
+        self.profiler = PhaseProfiler() if profile else None
         self.datacollector = DataCollector(
             model_reporters={
                 "Polarization": self.calculate_polarization,
                 "Mean_Belief": self.calculate_mean_belief,
-                "Belief_Std": self.calculate_belief_std
+                "Belief_Std": self.calculate_belief_std,
+                **({} if self.metrics is None else self.metrics.reporters()),
+                **({} if self.exposure is None else self.exposure.reporters()),
+                **({} if self.profiler is None else self.profiler.reporters())
             },
-            agent_reporters={
+            # 记录轨迹时信念只存一份（稠密数组），不再逐代理收集
+            agent_reporters={} if self.trajectory is not None else {
                 "Belief": "belief"
             }
         )
+        # 计时包装安装在实例上，需在代理与数据收集器创建之后
+        if self.profiler is not None:
+            self.profiler.attach(self)
     
-    def _create_content_pool(self, size):
+    def _create_content_pool(self, size, capacity=None, ttl=None, decay=None):
         """
         创建多元的信息内容池
         
         Args:
-            size: 内容池大小
+            size: 初始内容数量
+            capacity: 环形缓冲区容量（默认等于 size）
+            ttl: 内容存活步数（None 表示不过期）
+            decay: 每步的权重衰减系数（None 表示不衰减）
             
         Returns:
-            内容项列表，每项包含 id 和 slant（倾向性）
-        """
-        content_pool = []
-        for i in range(size):
-            content_pool.append({
-                'id': i,
-                'slant': np.random.uniform(-1.0, 1.0)
-            })
+            ContentPool，每个内容项包含 id 和 slant（倾向性）
+        """
+        content_pool = ContentPool(capacity or size, ttl=ttl, decay=decay, dim=self.belief_dim)
+        content_pool.add(np.random.uniform(-1.0, 1.0, self._shape(size)), step=0)
         return content_pool
     
+    def _shape(self, count):
+        """count 个信念 / 倾向性的数组形状：一维时为 (count,)，多维时为 (count, belief_dim)"""
+        return count if self.belief_dim == 1 else (count, self.belief_dim)
+    
+    def update_content_pool(self):
+        """
+        动态内容池的每步更新：过期与衰减，然后加入新到达的内容
+        新内容数量服从泊松分布，其中 author_share 比例由随机用户创作
+        """
+        self.content_pool.advance(self.steps)
+        if self.content_arrival <= 0:
+            return
+        count = np.random.poisson(self.content_arrival)
+        num_authored = np.random.binomial(count, self.author_share)
+        authors = np.random.randint(0, self.num_users, num_authored)
+        slants = np.concatenate([
+            self.beliefs[authors] + np.random.normal(0, self.author_noise, self._shape(num_authored)),
+            np.random.uniform(-1.0, 1.0, self._shape(count - num_authored))
+        ])
+        self.content_pool.add(np.clip(slants, -1.0, 1.0), self.steps)
+    
+    def generate_feeds(self, agent_indices, feed_size=10):
+        """
+        为一批用户生成信息流（实现算法 Q 机制）
+        由推荐算法一次处理全部用户，默认算法使用指数衰减函数：
+        相似度 = exp(-距离 * Q_scaled)，Q_strength 从 0-1 缩放到 0-5
+        
+        Args:
+            agent_indices: 用户编号数组
+            feed_size: 信息流大小
+            
+        Returns:
+            (用户数, feed_size) 的内容槽位矩阵，不足处为 -1
+        """
+        return self.recommender.recommend(self, agent_indices, feed_size)
+    
     def generate_feed(self, agent, feed_size=10):
         """
-        为特定用户生成个性化信息流（实现算法 Q 机制）
-        使用指数衰减函数：相似度 = exp(-距离 * Q_scaled)
+        为特定用户生成个性化信息流
         
         Args:
             agent: 目标用户代理
@@ -86,34 +273,180 @@ class PlatformModel(Model):
         Returns:
             推荐的内容项列表
         """
-        # 1. 计算内容池中所有内容与用户信念的距离
-        distances = np.array([abs(agent.belief - item['slant']) 
-                            for item in self.content_pool])
-        
-        # 2. 将距离转化为相似度（使用指数衰减）
-        # Q_strength 从 0-1 缩放到 0-5（降低以避免过度锁定）
-        Q_scaled = self.Q_strength * 5
-        similarities = np.exp(-distances * Q_scaled)
+        slots = self.generate_feeds(np.array([agent.index]), feed_size)[0]
+        return [self.content_pool[i] for i in slots[slots >= 0]]
+    
+    def get_feed(self, agent):
+        """
+        获取用户本步的信息流：优先使用 step 开始时为全体行动用户批量生成的结果
         
-        # 3. 归一化为概率分布
-        total_similarity = np.sum(similarities)
-        if total_similarity > 0 and not np.isinf(total_similarity):
-            probabilities = similarities / total_similarity
+        Args:
+            agent: 目标用户代理
+            
+        Returns:
+            推荐的内容项列表
+        """
+        if self._prefetched_feeds is None:
+            return self.generate_feed(agent, agent.feed_size)
+        rows, feeds = self._prefetched_feeds
+        slots = feeds[rows[agent.index], :agent.feed_size]
+        return [self.content_pool[i] for i in slots[slots >= 0]]
+    
+    def prefetch_feeds(self, agent_indices):
+        """
+        为本步行动的用户批量生成信息流（按其中最大的信息流大小）
+        每行的前 m 列即为大小为 m 的信息流
+        """
+        rows = np.full(self.num_users, -1, dtype=np.int64)
+        rows[agent_indices] = np.arange(len(agent_indices))
+        feed_size = int(self.agent_feed_size[agent_indices].max()) if len(agent_indices) else 0
+        feeds = self.generate_feeds(agent_indices, feed_size)
+        if self.exposure is not None:
+            self._observe_feeds(agent_indices, feeds)
+        self._prefetched_feeds = (rows, feeds)
+    
+    def _primary_slants(self, slots):
+        """内容在第一个话题维度上的倾向性"""
+        slants = self.content_pool.slant[slots]
+        return slants if self.belief_dim == 1 else slants[..., 0]
+    
+    def _observe_feeds(self, agent_indices, feeds):
+        """将一批信息流（每行取前 feed_size 列）计入接触统计"""
+        valid = (feeds >= 0) & (np.arange(feeds.shape[1]) < self.agent_feed_size[agent_indices][:, None])
+        slants = self._primary_slants(np.where(valid, feeds, 0))
+        self.exposure.observe_feeds(agent_indices, slants, valid, self.primary_beliefs[agent_indices])
+    
+    def consume_population(self, agent_indices):
+        """
+        融合后端：为一批行动用户生成信息流、选择内容并更新信念，
+        结果与逐代理执行同分布（抽样顺序不同）
+
+        Args:
+            agent_indices: 本步行动的用户编号数组
+        """
+        feed_sizes = self.agent_feed_size[agent_indices]
+        width = int(feed_sizes.max()) if len(agent_indices) else 0
+        feeds = self.generate_feeds(agent_indices, width)
+        if self.exposure is not None:
+            self._observe_feeds(agent_indices, feeds)
+        counts = self.agent_consume[agent_indices]
+        if np.any(counts > 1):
+            # 多次消费：批量选择与闭式批量更新（NumPy 实现）
+            consumers, slots = select_many_and_update(
+                self.beliefs, self.content_pool.slant, feeds, feed_sizes, agent_indices,
+                self.agent_P, self.agent_learning_rate, counts, replace=self.consume_with_replacement
+            )
         else:
-            # 容错：使用均匀分布
-            probabilities = np.ones(len(self.content_pool)) / len(self.content_pool)
+            selected = select_and_update(
+                self._kernel, self.beliefs, self.content_pool.slant, feeds, feed_sizes,
+                agent_indices, self.agent_P, self.agent_learning_rate
+            )
+            consumed = selected >= 0
+            consumers, slots = agent_indices[consumed], selected[consumed]
+        np.add.at(self.content_pool.popularity, slots, 1)
+        if self._observe_consumption is not None:
+            self._observe_consumption(self, consumers, slots)
+        if self.exposure is not None:
+            self.exposure.observe_selections(consumers, self._primary_slants(slots))
+
+    def run_batch(self, agent_indices):
+        """
+        让一批互不重复的用户按给定顺序各行动一次（调度器的一个批次）
+        """
+        if self._kernel is not None:
+            self.consume_population(agent_indices)
+            return
+        self.prefetch_feeds(agent_indices)
+        for i in agent_indices:
+            self.user_agents[i].step()
+
+    def record_consumption(self, agent, item):
+        """记录一次内容消费（更新内容热度，并通知推荐算法）"""
+        self.content_pool.popularity[item['slot']] += 1
+        if self._observe_consumption is not None:
+            self._observe_consumption(self, agent.index, item['slot'])
+        if self.exposure is not None:
+            self.exposure.observe_selections(agent.index, self._primary_slants(item['slot']))
+
+    def record_consumptions(self, agent, slots):
+        """批量记录一个用户在本步内的多次内容消费"""
+        np.add.at(self.content_pool.popularity, slots, 1)
+        agents = np.full(len(slots), agent.index)
+        if self._observe_consumption is not None:
+            self._observe_consumption(self, agents, slots)
+        if self.exposure is not None:
+            self.exposure.observe_selections(agents, self._primary_slants(slots))
+    
+    def _enforce_record_limit(self):
+        """
+        丢弃数据收集器中超出 max_records 的最早记录，限制长时间运行的内存占用
+        丢弃的步数累计在 records_dropped 中，绘图时用于还原时间轴
+        """
+        excess = len(self.datacollector.model_vars["Polarization"]) - self.max_records
+        if excess <= 0:
+            return
+        for values in self.datacollector.model_vars.values():
+            del values[:excess]
+        for step in sorted(self.datacollector._agent_records)[:excess]:
+            del self.datacollector._agent_records[step]
+        if self.trajectory is not None:
+            self.trajectory.drop(len(self.trajectory) - self.max_records)
+        self.records_dropped += excess
+    
+    @property
+    def agent_activity_rate(self):
+        return self._agent_activity_rate
+
+    @agent_activity_rate.setter
+    def agent_activity_rate(self, rates):
+        self._agent_activity_rate = rates
+        self.activity_rate_version += 1
+
+    def set_activity_rate(self, rates, agents=None):
+        """
+        修改用户的活跃率并通知调度器（原地修改数组时需经此方法，否则调度器不会察觉）
+
+        Args:
+            rates: 新的活跃率（标量或与 agents 等长的数组）
+            agents: 用户编号数组，None 表示全体用户
+        """
+        self._agent_activity_rate[slice(None) if agents is None else agents] = rates
+        self.activity_rate_version += 1
+
+    @property
+    def primary_beliefs(self):
+        """第一个话题维度上的信念（一维时即全部信念）"""
+        return self.beliefs if self.belief_dim == 1 else self.beliefs[:, 0]
+    
+    def update_belief_distribution(self):
+        """
+        基于信念数组重新计算固定分箱直方图和左/中/右人数
+        一次 bincount 完成，结果供图表直接绘制
+        """
+        beliefs = self.primary_beliefs
+        bins = self.histogram_bins
+        bin_index = ((beliefs + 1.0) * (bins / 2.0)).astype(np.intp)
+        np.clip(bin_index, 0, bins - 1, out=bin_index)
+        self.belief_histogram = np.bincount(bin_index, minlength=bins)
         
-        # 4. 根据概率抽样生成信息流（不重复）
-        feed_size = min(feed_size, len(self.content_pool))
-        indices = np.random.choice(
-            len(self.content_pool), 
-            size=feed_size, 
-            replace=False, 
-            p=probabilities
+        left = int(np.count_nonzero(beliefs < -self.GROUP_THRESHOLD))
+        right = int(np.count_nonzero(beliefs > self.GROUP_THRESHOLD))
+        self.belief_groups = {
+            'left': left,
+            'center': len(beliefs) - left - right,
+            'right': right
+        }
+    
+    def apply_peer_influence(self):
+        """
+        社交同伴影响：所有有邻居的用户同步地向邻居平均信念靠拢
+        邻居平均信念由一次稀疏矩阵-向量乘法得到
+        """
+        peer_mean = self.network.neighbor_mean(self.beliefs)
+        has_peers = self.network.degree > 0
+        self.beliefs[has_peers] += self.peer_influence * (
+            peer_mean[has_peers] - self.beliefs[has_peers]
         )
-        feed = [self.content_pool[i] for i in indices]
-        
-        return feed
     
     def calculate_polarization(self):
         """
@@ -121,26 +454,92 @@ class PlatformModel(Model):
         使用信念的方差作为极化指标
         
         Returns:
-            极化程度（方差）
+            极化程度（方差；多维时为各维度方差之和）
         """
-        beliefs = [agent.belief for agent in self.agents]
-        return np.var(beliefs)
+        return np.sum(np.var(self.beliefs, axis=0))
+    
+    def calculate_topic_polarization(self):
+        """计算每个话题维度的信念方差"""
+        return np.var(self.beliefs.reshape(self.num_users, -1), axis=0)
     
+    def calculate_metrics(self, names=None):
+        """
+        计算扩展极化指标（见 metrics.py，多维时按第一个话题维度）
+
+        Args:
+            names: 指标名称列表，None 表示全部
+
+        Returns:
+            {指标名称: 值}
+        """
+        return compute_metrics(self.primary_beliefs, names, bins=self.histogram_bins,
+                               threshold=self.GROUP_THRESHOLD)
+
     def calculate_mean_belief(self):
         """计算平均信念"""
-        beliefs = [agent.belief for agent in self.agents]
-        return np.mean(beliefs)
+        return np.mean(self.primary_beliefs)
     
     def calculate_belief_std(self):
         """计算信念标准差"""
-        beliefs = [agent.belief for agent in self.agents]
-        return np.std(beliefs)
+        return np.std(self.primary_beliefs)
     
     def step(self):
         """
         模型的一个时间步
+
+        同步更新 (update_mode='synchronous') 的语义：信息流在步开始时由第 t 步的
+        信念和内容热度一次生成；每个用户的选择只读取自己第 t 步的信念，
+        内容热度与推荐算法的交互记录在第 t+1 步才生效，同伴影响由第 t 步之后的
+        信念一次矩阵乘法得到。因此融合内核原地写入即等价于双缓冲的 t -> t+1 映射。
+        与逐个更新方式相比，两者只在随机抽样顺序上不同，
+        轨迹差异可用 compare_update_modes.py 量化
         """
-        self.datacollector.collect(self)
+        self.collect()
+        self.update_content_pool()
         # Mesa 3.x: 让所有代理执行一步
-        self.agents.shuffle_do("step")
+        # 行动概率不全为 1 时，每个用户以各自的概率决定本步是否行动
+        # 信息流在步开始时由推荐算法为全体行动用户一次生成
+        if self._update_recommender is not None:
+            self._update_recommender(self)
+        if self.scheduler is not None:
+            # 异步调度：只有产生行动事件的用户参与计算
+            for batch in self.scheduler.batches(self):
+                self.run_batch(batch)
+        elif np.all(self.agent_activity >= 1.0):
+            if self._kernel is not None:
+                self.consume_population(np.arange(self.num_users))
+            else:
+                self.prefetch_feeds(np.arange(self.num_users))
+                self.agents.shuffle_do("step")
+        else:
+            active = np.random.random(self.num_users) < self.agent_activity
+            if self._kernel is not None:
+                self.consume_population(np.flatnonzero(active))
+            else:
+                self.prefetch_feeds(np.flatnonzero(active))
+                self.agents.select(lambda agent: active[agent.index]).shuffle_do("step")
+        self._prefetched_feeds = None
+        if self.network is not None and self.peer_influence > 0:
+            self.apply_peer_influence()
+        self.update_belief_distribution()
+        self._state_collected = False
+
+    def collect(self):
+        """
+        记录当前状态（数据收集器与信念轨迹），同一状态只记录一次
+
+        step 在开始时调用，记录的是上一步结束后的状态；运行结束后再调用一次，
+        最后一步之后的状态也被记录，数据的最后一行与 trajectory.final 即为最终状态。
+        之后若继续 step，不会重复记录同一状态
+        """
+        if self._state_collected:
+            return
+        # 指标与接触统计的缓存按收集次数区分，补记的最终状态不会复用上一次的结果
+        self.collect_count += 1
+        self.datacollector.collect(self)
+        if self.trajectory is not None:
+            self.trajectory.record(self.beliefs)
+        if self.max_records is not None:
+            self._enforce_record_limit()
+        self._state_collected = True
 
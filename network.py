@@ -0,0 +1,200 @@
+"""
+社交网络 (SocialNetwork)
+用户之间的稀疏关注关系，以 CSR 矩阵存储，
+同伴影响通过一次稀疏矩阵-向量乘法对全体用户并行计算
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from sparse import CSRMatrix
+
+
+class SocialNetwork:
+    """
+    用户社交网络
+
+    属性:
+        num_nodes: 节点（用户）数量
+        adjacency: 邻接矩阵 (CSR)，行 i 为用户 i 关注 / 相连的用户
+        degree: 每个用户的邻居数量
+    """
+
+    def __init__(self, adjacency):
+        self.adjacency = adjacency
+        self.num_nodes = adjacency.shape[0]
+        self.degree = np.diff(adjacency.indptr)
+        # 行归一化的权重矩阵：W @ x 即每个用户邻居的平均值
+        weight_sums = adjacency.row_sums()
+        inverse = np.divide(1.0, weight_sums, out=np.zeros_like(weight_sums),
+                            where=weight_sums > 0)
+        self._mean_operator = adjacency.scale_rows(inverse)
+
+    @classmethod
+    def from_edges(cls, sources, targets, num_nodes, directed=False):
+        """
+        由边列表构建网络（自环被去除，重复边被合并）
+
+        Args:
+            sources: 边的起点数组
+            targets: 边的终点数组
+            num_nodes: 节点数量
+            directed: 是否为有向网络；无向时每条边双向保存
+
+        Returns:
+            SocialNetwork
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+        if not directed:
+            sources, targets = (np.concatenate([sources, targets]),
+                                np.concatenate([targets, sources]))
+        adjacency = CSRMatrix.from_coo(sources, targets, shape=(num_nodes, num_nodes))
+        # 合并重复边后权重恢复为 1
+        adjacency.data[:] = 1.0
+        return cls(adjacency)
+
+    @property
+    def num_edges(self):
+        """存储的有向边数量（无向边计两次）"""
+        return self.adjacency.nnz
+
+    def neighbor_mean(self, values):
+        """
+        计算每个用户邻居的平均值（没有邻居的用户为 0）
+
+        Args:
+            values: 每个用户的取值，一维或 (用户数, d) 数组
+
+        Returns:
+            与 values 形状相同的数组
+        """
+        return self._mean_operator.dot(values)
+
+    def neighbors(self, node):
+        """返回某个用户的邻居编号"""
+        return self.adjacency.indices[self.adjacency.indptr[node]:self.adjacency.indptr[node + 1]]
+
+
+def erdos_renyi(num_nodes, avg_degree=10):
+    """
+    Erdős–Rényi 随机网络 G(n, m)，m = n * avg_degree / 2
+
+    Args:
+        num_nodes: 节点数量
+        avg_degree: 期望平均度
+    """
+    num_edges = int(num_nodes * avg_degree / 2)
+    sources = np.random.randint(0, num_nodes, num_edges)
+    targets = np.random.randint(0, num_nodes, num_edges)
+    return SocialNetwork.from_edges(sources, targets, num_nodes)
+
+
+def barabasi_albert(num_nodes, m=5):
+    """
+    Barabási–Albert 无标度网络（Batagelj–Brandes 算法的向量化实现）
+
+    每个新节点连接 m 条边，目标按度数成比例选择。原算法逐边依赖之前的
+    端点数组；这里先为所有边抽取随机位置，再用指针跳跃并行解析。
+
+    Args:
+        num_nodes: 节点数量
+        m: 每个新节点的连边数
+    """
+    num_edges = num_nodes * m
+    edge = np.arange(num_edges, dtype=np.int64)
+    sources = edge // m
+    # 第 e 条边的终点取端点数组中 [0, 2e] 的随机位置：偶数位置是某条边的起点，
+    # 奇数位置是某条边的终点（需要继续追溯）
+    pointer = (np.random.random(num_edges) * (2 * edge + 1)).astype(np.int64)
+    unresolved = pointer % 2 == 1
+    while unresolved.any():
+        pointer[unresolved] = pointer[(pointer[unresolved] - 1) // 2]
+        unresolved[unresolved] = pointer[unresolved] % 2 == 1
+    targets = sources[pointer // 2]
+    return SocialNetwork.from_edges(sources, targets, num_nodes)
+
+
+def watts_strogatz(num_nodes, k=10, rewire_prob=0.1):
+    """
+    Watts–Strogatz 小世界网络
+
+    Args:
+        num_nodes: 节点数量
+        k: 环形格点中每个节点的邻居数（取偶数）
+        rewire_prob: 每条边的终点被随机重连的概率
+    """
+    half = max(k // 2, 1)
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int64), half)
+    offsets = np.tile(np.arange(1, half + 1, dtype=np.int64), num_nodes)
+    targets = (sources + offsets) % num_nodes
+    rewire = np.random.random(len(targets)) < rewire_prob
+    targets[rewire] = np.random.randint(0, num_nodes, int(rewire.sum()))
+    return SocialNetwork.from_edges(sources, targets, num_nodes)
+
+
+def load_edgelist(path, num_nodes=None, directed=False, delimiter=None):
+    """
+    从边列表文件加载网络
+
+    支持每行 "起点 终点" 的文本文件（# 开头为注释），
+    或形状为 (边数, 2) 的 .npy 整数数组
+
+    Args:
+        path: 文件路径
+        num_nodes: 节点数量（默认取最大编号 + 1）
+        directed: 是否为有向网络
+        delimiter: 文本分隔符（默认任意空白）
+    """
+    if os.path.splitext(path)[1] == '.npy':
+        edges = np.load(path, mmap_mode='r')
+        sources, targets = edges[:, 0], edges[:, 1]
+    else:
+        edges = pd.read_csv(path, sep=delimiter or r'\s+', header=None, comment='#',
+                            usecols=[0, 1], dtype=np.int64)
+        sources, targets = edges[0].to_numpy(), edges[1].to_numpy()
+    if num_nodes is None:
+        num_nodes = int(max(sources.max(), targets.max())) + 1
+    return SocialNetwork.from_edges(sources, targets, num_nodes, directed)
+
+
+# 网络类型名称 -> 生成函数
+NETWORK_GENERATORS = {
+    'erdos_renyi': erdos_renyi,
+    'barabasi_albert': barabasi_albert,
+    'watts_strogatz': watts_strogatz
+}
+
+
+def build_network(spec, num_nodes):
+    """
+    根据配置构建社交网络
+
+    Args:
+        spec: SocialNetwork 实例；生成器名称（如 'barabasi_albert'）；
+            形如 {'type': 'watts_strogatz', 'k': 10, 'rewire_prob': 0.1} 的字典；
+            或边列表文件路径
+        num_nodes: 节点数量
+
+    Returns:
+        SocialNetwork
+    """
+    if isinstance(spec, SocialNetwork):
+        network = spec
+    elif isinstance(spec, dict):
+        params = dict(spec)
+        generator = NETWORK_GENERATORS[params.pop('type')]
+        network = generator(num_nodes, **params)
+    elif spec in NETWORK_GENERATORS:
+        network = NETWORK_GENERATORS[spec](num_nodes)
+    elif os.path.exists(spec):
+        network = load_edgelist(spec, num_nodes)
+    else:
+        raise ValueError(f"未知的网络类型: {spec}")
+    if network.num_nodes != num_nodes:
+        raise ValueError(
+            f"网络节点数 ({network.num_nodes}) 与用户数量 ({num_nodes}) 不一致"
+        )
+    return network
@@ -0,0 +1,238 @@
+"""
+分阶段性能剖析 (PhaseProfiler)
+按阶段累计 PlatformModel.step 及代理路径的耗时与调用次数：
+信息流生成、内容选择、信念更新、融合计算、数据收集等
+
+启用时把模型与代理实例上的对应方法替换为计时包装，不修改类本身；
+未启用时模型中没有任何计时代码，开销为零
+"""
+import time
+
+import pandas as pd
+
+
+# 阶段名称 -> 被计时的模型方法
+MODEL_PHASES = {
+    'content_pool': 'update_content_pool',
+    'recommender_update': '_update_recommender',
+    'feeds': 'generate_feeds',
+    'fused_select_update': 'consume_population',
+    'peer_influence': 'apply_peer_influence',
+    'histogram': 'update_belief_distribution'
+}
+
+# 阶段名称 -> 被计时的代理方法
+AGENT_PHASES = {
+    'selection': ['select_content', 'select_contents'],
+    'belief_update': ['update_belief', 'update_beliefs']
+}
+
+# 阶段名称 -> 显示名称
+PHASE_LABELS = {
+    'collect': '数据收集',
+    'content_pool': '内容池更新',
+    'recommender_update': '推荐器更新',
+    'feeds': '信息流生成',
+    'fused_select_update': '融合选择与更新',
+    'selection': '内容选择',
+    'belief_update': '信念更新',
+    'peer_influence': '同伴影响',
+    'histogram': '直方图统计',
+    'other': '其他'
+}
+
+
+class PhaseProfiler:
+    """
+    分阶段计时器
+
+    每个阶段记录自身耗时（不含嵌套在其中的其他阶段，例如融合计算中的信息流生成
+    计入 feeds），因此各阶段耗时之和等于总耗时；step 中未归入任何阶段的部分计为 other。
+    吞吐量的分子是实际行动的用户·步数：逐代理执行时为内容选择的调用次数，
+    融合计算时为传入 consume_population 的用户数（activity < 1 或异步调度时小于用户数）
+
+    属性:
+        seconds: {阶段: 累计自身耗时}
+        calls: {阶段: 调用次数}
+        steps: 已计时的步数
+        step_seconds: 已计时步的总耗时
+        last_step_seconds: 最近一步的耗时
+        agent_steps: 已计时步中实际行动的用户·步总数
+        last_agent_steps: 最近一步实际行动的用户数
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.reset()
+        self._stack = []
+        self._acted = 0
+
+    def reset(self):
+        """清零全部统计（原地清空，已安装的计时包装继续有效）"""
+        self.seconds.clear()
+        self.calls.clear()
+        self.steps = 0
+        self.step_seconds = 0.0
+        self.last_step_seconds = 0.0
+        self.agent_steps = 0
+        self.last_agent_steps = 0
+
+    def wrap(self, name, func):
+        """返回 func 的计时包装：耗时计入 name 阶段，并从外层阶段中扣除"""
+        stack = self._stack
+        seconds = self.seconds
+        calls = self.calls
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            stack.append(0.0)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = stack.pop()
+                seconds[name] = seconds.get(name, 0.0) + elapsed - nested
+                calls[name] = calls.get(name, 0) + 1
+                if stack:
+                    stack[-1] += elapsed
+
+        return timed
+
+    def _wrap_step(self, func):
+        """一步的总计时；step 自身（不在任何阶段中）的耗时计为 other"""
+        timed = self.wrap('other', func)
+
+        def step(*args, **kwargs):
+            self._acted = 0
+            start = time.perf_counter()
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                self.last_step_seconds = time.perf_counter() - start
+                self.step_seconds += self.last_step_seconds
+                self.steps += 1
+                self.last_agent_steps = self._acted
+                self.agent_steps += self._acted
+
+        return step
+
+    def _count(self, func, size):
+        """返回 func 的包装：每次调用把 size(参数) 计入本步行动的用户数"""
+        def counted(*args, **kwargs):
+            self._acted += size(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        return counted
+
+    def attach(self, model):
+        """
+        在模型及其全部代理实例上安装计时包装
+
+        Mesa 的 model.step 在调用用户定义的 step 前递增步数，
+        因此包装的是 model._user_step，步数的维护不受影响
+        """
+        model._user_step = self._wrap_step(model._user_step)
+        model.datacollector.collect = self.wrap('collect', model.datacollector.collect)
+        for name, method in MODEL_PHASES.items():
+            if getattr(model, method, None) is not None:
+                setattr(model, method, self.wrap(name, getattr(model, method)))
+        # 实际行动的用户数：融合计算按批次大小计数，逐代理执行按内容选择的调用计数
+        model.consume_population = self._count(model.consume_population, len)
+        for agent in model.user_agents:
+            for name, methods in AGENT_PHASES.items():
+                for method in methods:
+                    setattr(agent, method, self.wrap(name, getattr(agent, method)))
+            for method in AGENT_PHASES['selection']:
+                setattr(agent, method, self._count(getattr(agent, method), lambda *args: 1))
+        return self
+
+    @property
+    def throughput(self):
+        """全部已计时步的平均吞吐量（实际行动的用户·步 / 秒）"""
+        return self.agent_steps / self.step_seconds if self.step_seconds > 0 else 0.0
+
+    @property
+    def last_throughput(self):
+        """最近一步的吞吐量（实际行动的用户·步 / 秒）"""
+        return self.last_agent_steps / self.last_step_seconds if self.last_step_seconds > 0 else 0.0
+
+    def stats(self):
+        """
+        统计字典
+
+        Returns:
+            {'phases': {阶段: {'seconds', 'calls', 'share', 'per_step'}},
+             'steps', 'step_seconds', 'throughput', 'last_throughput'}
+        """
+        total = sum(self.seconds.values())
+        phases = {
+            name: {
+                'seconds': seconds,
+                'calls': self.calls[name],
+                'share': seconds / total if total > 0 else 0.0,
+                'per_step': seconds / self.steps if self.steps else 0.0
+            }
+            for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+        }
+        return {
+            'phases': phases,
+            'steps': self.steps,
+            'step_seconds': self.step_seconds,
+            'throughput': self.throughput,
+            'last_throughput': self.last_throughput
+        }
+
+    def table(self):
+        """各阶段统计表（按耗时降序）"""
+        rows = [{
+            '阶段': PHASE_LABELS.get(name, name),
+            '总耗时 (s)': values['seconds'],
+            '每步 (ms)': values['per_step'] * 1e3,
+            '调用次数': values['calls'],
+            '占比': f"{values['share']:.1%}"
+        } for name, values in self.stats()['phases'].items()]
+        return pd.DataFrame(rows)
+
+    def report(self):
+        """可打印的文字报告"""
+        lines = [
+            f"已计时 {self.steps} 步，总耗时 {self.step_seconds:.3f} 秒，"
+            f"吞吐量 {self.throughput:,.0f} 用户·步/秒（最近一步 {self.last_throughput:,.0f}）"
+        ]
+        if self.seconds:
+            lines.append(self.table().to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+        return "\n".join(lines)
+
+    def reporters(self):
+        """数据收集器的 model_reporters 条目：上一步的吞吐量（每步开始时收集）"""
+        return {'Agent_Steps_Per_Sec': lambda model: self.last_throughput}
+
+
+if __name__ == "__main__":
+    import argparse
+    from model import PlatformModel
+
+    parser = argparse.ArgumentParser(description="带分阶段计时运行 PlatformModel，实时输出吞吐量")
+    parser.add_argument('--users', type=int, default=1000, help="用户数量")
+    parser.add_argument('--pool', type=int, default=1000, help="内容池大小")
+    parser.add_argument('--steps', type=int, default=100, help="模拟步数")
+    parser.add_argument('--backend', default='agents', help="执行方式（agents / numpy / numba / auto）")
+    parser.add_argument('--every', type=int, default=10, help="每隔多少步输出一次吞吐量")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"分阶段性能剖析：{args.users} 用户，内容池 {args.pool}，执行方式 {args.backend}")
+    print("=" * 70)
+    model = PlatformModel(num_users=args.users, content_pool_size=args.pool,
+                          backend=args.backend, seed=args.seed, profile=True)
+    profiler = model.profiler
+    for _ in range(args.steps):
+        model.step()
+        if model.steps % args.every == 0:
+            slowest = max(profiler.seconds, key=profiler.seconds.get)
+            print(f"  步数 {model.steps:5d}  吞吐量 {profiler.last_throughput:12,.0f} 用户·步/秒  "
+                  f"最耗时阶段: {PHASE_LABELS.get(slowest, slowest)}")
+    print()
+    print(profiler.report())
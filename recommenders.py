@@ -0,0 +1,480 @@
+"""
+推荐算法 (Recommender)
+平台的信息流生成策略。每个策略一次接收一批用户，
+返回 (用户数 × 信息流大小) 的内容槽位矩阵，不足的位置填 -1
+
+约定：矩阵每一行按推荐顺序排列，取前 m 列即得到大小为 m 的有效信息流，
+因此信息流大小不同的用户可以共用同一次批量推荐
+"""
+import numpy as np
+from content import pairwise_slant_distance
+from sparse import CSRMatrix
+
+
+# 每个分块的矩阵元素上限，控制 (用户 × 候选内容) 临时矩阵的内存
+CHUNK_ELEMENTS = 1 << 22
+
+
+def _gumbel(shape):
+    """Gumbel 噪声：按 log 权重加噪后取前 k 个，等价于按权重不放回抽样"""
+    return -np.log(-np.log(np.random.random(shape)))
+
+
+def _top_k(scores, k):
+    """
+    每行得分最高的 k 个位置（按得分降序），得分为 -inf 的位置记为 -1
+    """
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind='stable')
+    top = np.take_along_axis(part, order, axis=1)
+    valid = np.isfinite(np.take_along_axis(scores, top, axis=1))
+    return np.where(valid, top, -1)
+
+
+class Recommender:
+    """
+    推荐算法基类
+
+    子类实现 score()，为每个 (用户, 候选内容) 打分，基类负责分块、
+    近邻候选检索和取前 k 个；需要特殊排序的策略可以重写 rank()
+    """
+
+    name = None
+
+    def recommend(self, model, agents, feed_size):
+        """
+        为一批用户生成信息流
+
+        Args:
+            model: PlatformModel
+            agents: 用户编号数组（model.beliefs 的下标）
+            feed_size: 信息流大小
+
+        Returns:
+            (len(agents), feed_size) 的内容槽位矩阵，不足处为 -1
+        """
+        pool = model.content_pool
+        agents = np.asarray(agents, dtype=np.int64)
+        beliefs = model.beliefs[agents]
+        feeds = np.full((len(agents), feed_size), -1, dtype=np.int64)
+
+        if pool.index is None:
+            # 全量扫描：按内容池大小分块处理用户
+            rows = max(1, CHUNK_ELEMENTS // pool.capacity)
+            for start in range(0, len(agents), rows):
+                block = slice(start, start + rows)
+                top = self.rank(model, beliefs[block], None, feed_size)
+                feeds[block, :top.shape[1]] = top
+        else:
+            # 近邻索引：检索到相同候选集合的用户成组，每组按候选数量分块批量排序
+            for rows, candidates in pool.candidate_groups(beliefs):
+                if len(candidates) == 0:
+                    continue
+                chunk = max(1, CHUNK_ELEMENTS // len(candidates))
+                for start in range(0, len(rows), chunk):
+                    block = rows[start:start + chunk]
+                    top = self.rank(model, beliefs[block], candidates, feed_size)
+                    feeds[block, :top.shape[1]] = np.where(top >= 0, candidates[top], -1)
+        return feeds
+
+    def rank(self, model, beliefs, candidates, feed_size):
+        """
+        在候选内容中为一组用户排序取前 feed_size 个
+
+        Args:
+            beliefs: 这组用户的信念
+            candidates: 候选槽位数组，None 表示整个内容池
+
+        Returns:
+            候选内容中的位置矩阵（candidates 为 None 时即为槽位）
+        """
+        pool = model.content_pool
+        select = slice(None) if candidates is None else candidates
+        scores = self.score(model, beliefs, pool.slant[select], select)
+        return _top_k(scores, feed_size)
+
+    def score(self, model, beliefs, slants, select):
+        """
+        为 (用户, 候选内容) 打分，越高越优先；-inf 表示不可推荐
+
+        Args:
+            beliefs: 用户信念 (k,) 或 (k, d)
+            slants: 候选内容倾向性 (m,) 或 (m, d)
+            select: 候选内容在内容池中的下标（切片或数组）
+        """
+        raise NotImplementedError
+
+    def observe(self, model, agents, slots):
+        """
+        接收消费事件（用户编号数组, 内容槽位数组），基于交互的算法据此学习
+        """
+
+    def update(self, model):
+        """每步开始、生成信息流之前调用，用于更新算法的内部状态"""
+
+
+class KernelRecommender(Recommender):
+    """
+    指数相似度核（默认算法 Q 机制）：按 exp(-距离 × Q×5) × 内容权重 不放回抽样
+    """
+
+    name = 'kernel'
+
+    def score(self, model, beliefs, slants, select):
+        Q_scaled = model.Q_strength * 5
+        log_similarity = -pairwise_slant_distance(beliefs, slants) * Q_scaled
+        log_similarity += model.content_pool.log_weights(select)
+        return log_similarity + _gumbel(log_similarity.shape)
+
+
+class TopKRecommender(Recommender):
+    """确定性最近邻：直接推荐与用户信念最接近的内容"""
+
+    name = 'topk'
+
+    def score(self, model, beliefs, slants, select):
+        scores = -pairwise_slant_distance(beliefs, slants)
+        scores[:, ~model.content_pool.alive[select]] = -np.inf
+        return scores
+
+
+class PopularityRecommender(Recommender):
+    """
+    热度加权：在相似度核的基础上乘以 (1 + 消费次数)^alpha 后不放回抽样
+
+    属性:
+        alpha: 热度的权重指数，0 时退化为相似度核
+    """
+
+    name = 'popularity'
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+
+    def score(self, model, beliefs, slants, select):
+        pool = model.content_pool
+        Q_scaled = model.Q_strength * 5
+        log_weight = -pairwise_slant_distance(beliefs, slants) * Q_scaled
+        log_weight += pool.log_weights(select) + self.alpha * np.log1p(pool.popularity[select])
+        return log_weight + _gumbel(log_weight.shape)
+
+
+class MMRRecommender(Recommender):
+    """
+    多样性注入 (Maximal Marginal Relevance)
+
+    先按相似度核取出 candidate_factor × feed_size 个最相关的内容，再逐个贪心选择
+    λ × 相关度 - (1 - λ) × 与已选内容的最大相似度 最高的内容
+
+    属性:
+        diversity: 多样性权重 1 - λ，0 时等价于按相关度排序
+        candidate_factor: 预选候选数量相对信息流大小的倍数
+        similarity_scale: 内容之间相似度 exp(-距离 × scale) 的缩放系数
+    """
+
+    name = 'mmr'
+
+    def __init__(self, diversity=0.3, candidate_factor=5, similarity_scale=5.0):
+        self.diversity = diversity
+        self.candidate_factor = candidate_factor
+        self.similarity_scale = similarity_scale
+
+    def rank(self, model, beliefs, candidates, feed_size):
+        pool = model.content_pool
+        select = slice(None) if candidates is None else candidates
+        slants = pool.slant[select]
+        Q_scaled = model.Q_strength * 5
+        relevance = np.exp(-pairwise_slant_distance(beliefs, slants) * Q_scaled + pool.log_weights(select))
+        relevance[:, ~pool.alive[select]] = -np.inf
+
+        # 1. 预选最相关的候选
+        shortlist = _top_k(relevance, self.candidate_factor * feed_size)
+        num_short = shortlist.shape[1]
+        feed_size = min(feed_size, num_short)
+        result = np.full((len(beliefs), feed_size), -1, dtype=np.int64)
+
+        # 2. 分块进行贪心选择，每块的 (用户 × 候选 × 候选) 相似度张量受内存上限约束
+        rows = max(1, CHUNK_ELEMENTS // (num_short * num_short))
+        for start in range(0, len(beliefs), rows):
+            block = slice(start, start + rows)
+            short = shortlist[block]
+            valid = short >= 0
+            positions = np.where(valid, short, 0)
+            rel = np.take_along_axis(relevance[block], positions, axis=1)
+            rel = np.where(valid, rel, 0.0)
+            rel /= np.maximum(rel.max(axis=1, keepdims=True), 1e-300)
+
+            short_slants = slants[positions]
+            if short_slants.ndim == 2:
+                gaps = np.abs(short_slants[:, :, None] - short_slants[:, None, :])
+            else:
+                gaps = np.sqrt(((short_slants[:, :, None, :] - short_slants[:, None, :, :]) ** 2).sum(axis=-1))
+            similarity = np.exp(-gaps * self.similarity_scale)
+
+            max_similarity = np.zeros_like(rel)
+            available = valid.copy()
+            block_rows = np.arange(len(short))
+            for t in range(feed_size):
+                mmr = (1 - self.diversity) * rel - self.diversity * max_similarity
+                mmr[~available] = -np.inf
+                pick = np.argmax(mmr, axis=1)
+                picked = available[block_rows, pick]
+                result[block, t] = np.where(picked, short[block_rows, pick], -1)
+                available[block_rows, pick] = False
+                max_similarity = np.maximum(max_similarity, similarity[block_rows, pick])
+        return result
+
+
+class RandomRecommender(Recommender):
+    """随机推荐：在有效内容中均匀不放回抽样（不使用近邻索引）"""
+
+    name = 'random'
+
+    def recommend(self, model, agents, feed_size):
+        alive = model.content_pool.alive_slots()
+        feed_size_used = min(feed_size, len(alive))
+        feeds = np.full((len(agents), feed_size), -1, dtype=np.int64)
+        if feed_size_used == 0:
+            return feeds
+        # 每行为有效内容赋随机键取前 k 个：一次得到不放回的均匀抽样，
+        # 信息流接近有效内容数量时也不需要重抽；按有效内容数量分块控制内存
+        rows = max(1, CHUNK_ELEMENTS // len(alive))
+        for start in range(0, len(agents), rows):
+            block = slice(start, start + rows)
+            keys = np.random.random((len(feeds[block]), len(alive)))
+            feeds[block, :feed_size_used] = alive[_top_k(keys, feed_size_used)]
+        return feeds
+
+
+class InteractionMatrix:
+    """
+    用户 × 内容 的稀疏交互矩阵（值为消费次数，列为内容的全局编号）
+
+    新事件先追加到缓冲区，缓冲区超过已合并的非零元数量时才合并为 CSR，
+    每个事件的均摊合并代价为对数级
+    """
+
+    def __init__(self, num_users):
+        self.num_users = num_users
+        self._matrix = None
+        self._pending = []
+        self._pending_count = 0
+
+    def add(self, users, items):
+        """追加一批 (用户, 内容编号) 交互事件"""
+        self._pending.append((np.asarray(users, dtype=np.int64), np.asarray(items, dtype=np.int64)))
+        self._pending_count += len(self._pending[-1][0])
+        merged = 0 if self._matrix is None else self._matrix.nnz
+        if self._pending_count > max(merged, 1 << 16):
+            self._merge()
+
+    def _merge(self):
+        """将缓冲区合并进 CSR 矩阵（重复的交互累加）"""
+        if not self._pending:
+            return
+        rows = [users for users, _ in self._pending]
+        cols = [items for _, items in self._pending]
+        data = [np.ones(len(users)) for users in rows]
+        if self._matrix is not None:
+            old_rows, old_cols, old_data = self._matrix.to_coo()
+            rows.append(old_rows)
+            cols.append(old_cols)
+            data.append(old_data)
+        cols = np.concatenate(cols)
+        num_items = int(cols.max()) + 1 if len(cols) else 0
+        self._matrix = CSRMatrix.from_coo(np.concatenate(rows), cols, np.concatenate(data),
+                                          shape=(self.num_users, num_items))
+        self._pending = []
+        self._pending_count = 0
+
+    def contains(self, users, items):
+        """
+        批量查询用户是否消费过某内容（已合并部分二分查找，缓冲区部分按键匹配，不触发合并）
+
+        Args:
+            users / items: 等长的用户编号、内容编号数组
+
+        Returns:
+            布尔数组
+        """
+        users = np.asarray(users, dtype=np.int64)
+        items = np.asarray(items, dtype=np.int64)
+        found = (np.zeros(len(users), dtype=bool) if self._matrix is None
+                 else self._matrix.contains(users, items))
+        if self._pending:
+            pending_users = np.concatenate([u for u, _ in self._pending])
+            pending_items = np.concatenate([i for _, i in self._pending])
+            width = int(max(pending_items.max(initial=0), items.max(initial=0))) + 1
+            found |= np.isin(users * width + items, pending_users * width + pending_items)
+        return found
+
+    @property
+    def matrix(self):
+        """合并后的 CSR 交互矩阵"""
+        self._merge()
+        return self._matrix
+
+    @property
+    def nnz(self):
+        """交互事件总数的上界（合并前重复事件分别计数）"""
+        return (0 if self._matrix is None else self._matrix.nnz) + self._pending_count
+
+
+class CollaborativeFilteringRecommender(Recommender):
+    """
+    协同过滤：不使用信念，只从消费行为中学习
+
+    记录 用户 × 内容 的稀疏交互矩阵，并对每步新产生的交互做几轮带负采样的
+    SGD（负样本排除用户历史上消费过的内容），增量更新低秩分解 (用户因子 U, 内容因子 V)；信息流由
+    U[用户] @ V[候选内容].T 的批量点积得分取前 k 个（可加 Gumbel 噪声抽样）
+
+    属性:
+        rank: 因子维度
+        learning_rate: SGD 步长
+        regularization: L2 正则系数
+        sweeps: 每步对新交互做 SGD 的轮数
+        negatives: 每个正样本对应的随机负样本数量
+        num_candidates: 每步打分的候选内容数量上限（None 表示全部有效内容）
+        temperature: 抽样温度，None 表示确定性取前 k 个
+    """
+
+    name = 'cf'
+
+    def __init__(self, rank=16, learning_rate=0.05, regularization=0.01, sweeps=2,
+                 negatives=4, num_candidates=5000, temperature=1.0, init_scale=0.1):
+        self.rank = rank
+        self.learning_rate = learning_rate
+        self.regularization = regularization
+        self.sweeps = sweeps
+        self.negatives = negatives
+        self.num_candidates = num_candidates
+        self.temperature = temperature
+        self.init_scale = init_scale
+        self.user_factors = None
+        self.item_factors = None
+        self.interactions = None
+        self._item_ids = None
+        self._new_events = []
+
+    def _ensure_state(self, model):
+        """首次使用时按用户数和内容池容量初始化因子"""
+        if self.user_factors is not None:
+            return
+        pool = model.content_pool
+        self.user_factors = np.random.normal(0, self.init_scale, (model.num_users, self.rank))
+        self.item_factors = np.random.normal(0, self.init_scale, (pool.capacity, self.rank))
+        self._item_ids = pool.ids.copy()
+        self.interactions = InteractionMatrix(model.num_users)
+
+    def observe(self, model, agents, slots):
+        self._ensure_state(model)
+        agents = np.atleast_1d(np.asarray(agents, dtype=np.int64))
+        slots = np.atleast_1d(np.asarray(slots, dtype=np.int64))
+        # 同时记下内容编号：学习前槽位可能已被新内容复用
+        ids = model.content_pool.ids[slots]
+        self._new_events.append((agents, slots, ids))
+        self.interactions.add(agents, ids)
+
+    def update(self, model):
+        self._ensure_state(model)
+        pool = model.content_pool
+
+        # 槽位被新内容复用时重新初始化对应的内容因子
+        reused = pool.ids != self._item_ids
+        if reused.any():
+            self.item_factors[reused] = np.random.normal(0, self.init_scale, (int(reused.sum()), self.rank))
+            self._item_ids[reused] = pool.ids[reused]
+
+        if not self._new_events:
+            return
+        users = np.concatenate([agents for agents, _, _ in self._new_events])
+        items = np.concatenate([slots for _, slots, _ in self._new_events])
+        ids = np.concatenate([ids for _, _, ids in self._new_events])
+        self._new_events = []
+        # 只学习槽位中仍是被消费的那条内容的交互（过期或被复用的槽位丢弃）
+        keep = pool.alive[items] & (pool.ids[items] == ids)
+        users, items = users[keep], items[keep]
+        alive = pool.alive_slots()
+        if len(users) == 0 or len(alive) == 0:
+            return
+
+        negative_users = np.repeat(users, self.negatives)
+        for _ in range(self.sweeps):
+            negatives = alive[np.random.randint(0, len(alive), len(negative_users))]
+            # 丢弃该用户历史上消费过的内容（交互矩阵中的正样本）
+            valid = ~self.interactions.contains(negative_users, pool.ids[negatives])
+            all_users = np.concatenate([users, negative_users[valid]])
+            all_items = np.concatenate([items, negatives[valid]])
+            labels = np.concatenate([np.ones(len(users)), np.zeros(int(valid.sum()))])
+            order = np.random.permutation(len(all_users))
+            self._sgd(all_users[order], all_items[order], labels[order])
+
+    def _sgd(self, users, items, labels):
+        """
+        一轮小批量逻辑回归 SGD（同一批内的梯度同时应用）
+        同一用户或内容在批内多次出现时取梯度平均，避免一步内大量交互导致发散
+        """
+        U, V = self.user_factors, self.item_factors
+        user_vectors, item_vectors = U[users], V[items]
+        logits = np.clip(np.einsum('ij,ij->i', user_vectors, item_vectors), -30.0, 30.0)
+        predictions = 1.0 / (1.0 + np.exp(-logits))
+        errors = (labels - predictions)[:, None]
+        user_rate = self.learning_rate / np.bincount(users)[users][:, None]
+        item_rate = self.learning_rate / np.bincount(items)[items][:, None]
+        np.add.at(U, users, user_rate * (errors * item_vectors - self.regularization * user_vectors))
+        np.add.at(V, items, item_rate * (errors * user_vectors - self.regularization * item_vectors))
+
+    def recommend(self, model, agents, feed_size):
+        self._ensure_state(model)
+        agents = np.asarray(agents, dtype=np.int64)
+        feeds = np.full((len(agents), feed_size), -1, dtype=np.int64)
+        alive = model.content_pool.alive_slots()
+        if len(alive) == 0:
+            return feeds
+        if self.num_candidates is not None and len(alive) > self.num_candidates:
+            candidates = np.unique(alive[np.random.randint(0, len(alive), self.num_candidates)])
+        else:
+            candidates = alive
+
+        candidate_factors = self.item_factors[candidates]
+        rows = max(1, CHUNK_ELEMENTS // len(candidates))
+        for start in range(0, len(agents), rows):
+            block = slice(start, start + rows)
+            scores = self.user_factors[agents[block]] @ candidate_factors.T
+            if self.temperature is not None:
+                scores = scores / self.temperature + _gumbel(scores.shape)
+            top = _top_k(scores, feed_size)
+            feeds[block, :top.shape[1]] = np.where(top >= 0, candidates[top], -1)
+        return feeds
+
+
+# 策略名称 -> 推荐算法类
+RECOMMENDERS = {
+    cls.name: cls
+    for cls in (KernelRecommender, TopKRecommender, PopularityRecommender,
+                MMRRecommender, RandomRecommender, CollaborativeFilteringRecommender)
+}
+
+
+def get_recommender(spec):
+    """
+    根据配置获取推荐算法实例
+
+    Args:
+        spec: 策略名称（见 RECOMMENDERS）、(名称, 参数字典) 元组，
+            或任何实现了 recommend(model, agents, feed_size) 的对象
+
+    Returns:
+        推荐算法实例
+    """
+    if isinstance(spec, str):
+        spec = (spec, {})
+    if isinstance(spec, tuple):
+        name, params = spec
+        if name not in RECOMMENDERS:
+            raise ValueError(f"未知的推荐算法: {name}")
+        return RECOMMENDERS[name](**params)
+    if not hasattr(spec, 'recommend'):
+        raise TypeError("推荐算法需要实现 recommend(model, agents, feed_size)")
+    return spec
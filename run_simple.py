@@ -7,7 +7,6 @@ import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 matplotlib.rcParams['axes.unicode_minus'] = False
 from matplotlib.animation import FuncAnimation
-import numpy as np
 from model import PlatformModel
 
 # 创建模型
@@ -28,7 +27,8 @@ model = PlatformModel(
     Q_strength=0.8,  # 修改这里: 0.1=低, 0.8=高
     P_strength=0.8,  # 修改这里: 0.1=低, 0.8=高
     learning_rate=0.05,
-    content_pool_size=1000
+    content_pool_size=1000,
+    profile=True     # 分阶段计时，统计面板显示吞吐量
 )
 # ========================
 
@@ -44,9 +44,10 @@ ax4 = plt.subplot(2, 3, 4)  # 初始分布
 ax5 = plt.subplot(2, 3, 5)  # 当前分布
 ax6 = plt.subplot(2, 3, 6)  # 统计信息
 
-# 初始信念
-initial_beliefs = [agent.belief for agent in model.agents]
-ax4.hist(initial_beliefs, bins=20, range=(-1, 1), color='skyblue', edgecolor='black', alpha=0.7)
+# 初始信念（直接使用模型维护的直方图计数）
+edges = model.histogram_edges
+initial_histogram = model.belief_histogram.copy()
+ax4.hist(edges[:-1], bins=edges, weights=initial_histogram, color='skyblue', edgecolor='black', alpha=0.7)
 ax4.axvline(x=0, color='red', linestyle='--', linewidth=2)
 ax4.set_xlabel('信念值')
 ax4.set_ylabel('人数')
@@ -64,7 +65,8 @@ def update(frame):
     model.step()
     
     # 获取数据
-    beliefs = [agent.belief for agent in model.agents]
+    histogram = model.belief_histogram
+    groups = model.belief_groups
     model_data = model.datacollector.get_model_vars_dataframe()
     
     polarization_history.append(model_data['Polarization'].iloc[-1])
@@ -78,7 +80,7 @@ def update(frame):
     ax6.clear()
     
     # 1. 当前信念分布
-    ax1.hist(beliefs, bins=20, range=(-1, 1), color='steelblue', edgecolor='black', alpha=0.7)
+    ax1.hist(edges[:-1], bins=edges, weights=histogram, color='steelblue', edgecolor='black', alpha=0.7)
     ax1.axvline(x=0, color='red', linestyle='--', linewidth=2, alpha=0.5)
     ax1.set_xlabel('信念值')
     ax1.set_ylabel('人数')
@@ -101,9 +103,8 @@ def update(frame):
     ax3.grid(True, alpha=0.3)
     
     # 5. 最终分布对比
-    bins = np.linspace(-1, 1, 21)
-    ax5.hist(initial_beliefs, bins=bins, alpha=0.5, label='初始', color='blue', density=True)
-    ax5.hist(beliefs, bins=bins, alpha=0.5, label='当前', color='red', density=True)
+    ax5.hist(edges[:-1], bins=edges, weights=initial_histogram, alpha=0.5, label='初始', color='blue', density=True)
+    ax5.hist(edges[:-1], bins=edges, weights=histogram, alpha=0.5, label='当前', color='red', density=True)
     ax5.axvline(x=0, color='gray', linestyle='--', linewidth=1)
     ax5.set_xlabel('信念值')
     ax5.set_ylabel('密度')
@@ -121,14 +122,17 @@ def update(frame):
     当前步数: {model.steps}
     
     【当前统计】
-    极化程度: {np.var(beliefs):.4f}
-    平均信念: {np.mean(beliefs):.3f}
-    标准差: {np.std(beliefs):.3f}
+    极化程度: {model.calculate_polarization():.4f}
+    平均信念: {model.calculate_mean_belief():.3f}
+    标准差: {model.calculate_belief_std():.3f}
     
     【分布情况】
-    左翼 (< -0.3): {np.sum(np.array(beliefs) < -0.3)} 人
-    中间 (-0.3~0.3): {np.sum((np.array(beliefs) >= -0.3) & (np.array(beliefs) <= 0.3))} 人
-    右翼 (> 0.3): {np.sum(np.array(beliefs) > 0.3)} 人
+    左翼 (< -0.3): {groups['left']} 人
+    中间 (-0.3~0.3): {groups['center']} 人
+    右翼 (> 0.3): {groups['right']} 人
+    
+    【性能】
+    吞吐量: {model.profiler.last_throughput:,.0f} 用户·步/秒
     """
     ax6.text(0.1, 0.5, stats_text, fontsize=12, verticalalignment='center',
              bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
@@ -138,7 +142,9 @@ def update(frame):
     # 停止条件
     if model.steps >= 200:
         print(f"\n模拟完成！运行了 {model.steps} 步")
-        print(f"最终极化程度: {np.var(beliefs):.4f}")
+        print(f"最终极化程度: {model.calculate_polarization():.4f}")
+        print("\n【分阶段耗时】")
+        print(model.profiler.report())
         ani.event_source.stop()
 
 
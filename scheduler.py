@@ -0,0 +1,160 @@
+"""
+异步激活调度器
+用户按各自的活跃率（每步期望行动次数）产生行动事件，只有真正行动的用户参与计算，
+适合活跃度重尾分布、绝大多数用户处于空闲状态的大规模模拟
+"""
+import heapq
+
+import numpy as np
+
+
+def split_rounds(events):
+    """
+    将一步内按时间排序的事件拆分为若干轮，每轮中每个用户至多出现一次
+
+    第 r 轮包含各用户在本步内的第 r+1 次行动，轮内保持事件的时间顺序，
+    这样每一轮都可以作为互不重复的用户批次处理
+
+    Args:
+        events: 按时间排序的用户编号数组
+
+    Returns:
+        用户编号数组的列表
+    """
+    events = np.asarray(events, dtype=np.int64)
+    if len(events) == 0:
+        return []
+    order = np.argsort(events, kind='stable')
+    sorted_events = events[order]
+    starts = np.flatnonzero(np.r_[True, sorted_events[1:] != sorted_events[:-1]])
+    group_sizes = np.diff(np.r_[starts, len(events)])
+    occurrence = np.empty(len(events), dtype=np.int64)
+    occurrence[order] = np.arange(len(events)) - np.repeat(starts, group_sizes)
+    return [events[occurrence == r] for r in range(int(occurrence.max()) + 1)]
+
+
+class Scheduler:
+    """
+    调度器基类
+
+    子类实现 activations(model, rates)，返回本步按行动顺序排列的用户编号事件序列；
+    rates 为每个用户的活跃率（模型的 agent_activity_rate 数组）。
+    由活跃率派生的状态只在 model.activity_rate_version 变化时重建，每步不比较整个数组
+    """
+
+    name = None
+
+    def activations(self, model, rates):
+        raise NotImplementedError
+
+    def batches(self, model):
+        """本步的行动批次（每批内用户互不重复，按批次顺序执行）"""
+        return split_rounds(self.activations(model, model.agent_activity_rate))
+
+    def _rates_changed(self, model, rates):
+        """
+        活跃率是否在上次重建之后发生了变化
+
+        模型维护 activity_rate_version 时按版本号判断（O(1)），否则逐元素比较
+        """
+        version = getattr(model, 'activity_rate_version', None)
+        if version is not None:
+            changed = version != self._version
+            self._version = version
+            return changed
+        changed = self._rates is None or not np.array_equal(self._rates, rates)
+        self._rates = rates.copy()
+        return changed
+
+
+class PoissonScheduler(Scheduler):
+    """
+    泊松批量调度：每步的总行动次数 K ~ Poisson(Σ 活跃率)，
+    每次行动的用户按活跃率成比例抽取（累积活跃率上二分查找）
+
+    每步代价为 O(K log N)，与空闲用户数量无关；累积活跃率在活跃率
+    变化时（见 Scheduler._rates_changed）才以 O(N) 重新计算
+    """
+
+    name = 'poisson'
+
+    def __init__(self):
+        self._rates = None
+        self._version = None
+        self._cumulative = None
+
+    def activations(self, model, rates):
+        if self._rates_changed(model, rates) or self._cumulative is None:
+            self._cumulative = np.cumsum(rates)
+        total = self._cumulative[-1] if len(self._cumulative) else 0.0
+        if total <= 0:
+            return np.empty(0, dtype=np.int64)
+        count = np.random.poisson(total)
+        events = np.searchsorted(self._cumulative, np.random.random(count) * total, side='right')
+        # 泊松过程中各事件的时间相互独立，抽样顺序即为随机的行动顺序
+        return np.minimum(events, len(rates) - 1)
+
+
+class EventQueueScheduler(Scheduler):
+    """
+    事件队列调度：每个用户的行动间隔服从速率为活跃率的指数分布，
+    下一次行动时间存放在优先队列中，每步弹出落在 (步数-1, 步数] 内的事件
+
+    与泊松批量调度同分布，但保留了事件在连续时间上的先后顺序；
+    每步代价为 O(K log N)，活跃率变化时以 O(N log N) 重建队列
+    """
+
+    name = 'events'
+
+    def __init__(self):
+        self._queue = None
+        self._rates = None
+        self._version = None
+
+    def _initialize(self, model, rates):
+        # 队列中事件的下一次间隔按重建时的活跃率抽取
+        self._event_rates = rates.copy()
+        start = model.steps - 1
+        active = np.flatnonzero(rates > 0)
+        times = start + np.random.exponential(1.0 / rates[active])
+        self._queue = list(zip(times.tolist(), active.tolist()))
+        heapq.heapify(self._queue)
+
+    def activations(self, model, rates):
+        if self._rates_changed(model, rates) or self._queue is None:
+            self._initialize(model, rates)
+        end = model.steps
+        queue = self._queue
+        events = []
+        while queue and queue[0][0] <= end:
+            time, agent = queue[0]
+            events.append(agent)
+            heapq.heapreplace(queue, (time + np.random.exponential(1.0 / self._event_rates[agent]), agent))
+        return np.array(events, dtype=np.int64)
+
+
+# 调度器名称 -> 调度器类
+SCHEDULERS = {cls.name: cls for cls in (PoissonScheduler, EventQueueScheduler)}
+
+
+def get_scheduler(spec):
+    """
+    根据配置获取调度器实例
+
+    Args:
+        spec: 调度器名称（见 SCHEDULERS）、(名称, 参数字典) 元组，
+            或任何实现了 batches(model) 的对象
+
+    Returns:
+        调度器实例
+    """
+    if isinstance(spec, str):
+        spec = (spec, {})
+    if isinstance(spec, tuple):
+        name, params = spec
+        if name not in SCHEDULERS:
+            raise ValueError(f"未知的调度器: {name}")
+        return SCHEDULERS[name](**params)
+    if not hasattr(spec, 'batches'):
+        raise TypeError("调度器需要实现 batches(model)")
+    return spec
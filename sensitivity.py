@@ -0,0 +1,322 @@
+"""
+全局敏感性分析
+在可配置的参数范围上生成 Saltelli（Sobol 指数）或 Morris（基本效应）设计，
+用进程池批量运行 PlatformModel，结果逐条追加到 JSONL 缓存，
+中断后重新运行会跳过已完成的参数点
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+
+# 参数名称 -> (下限, 上限, 是否取整)
+PARAMETERS = {
+    'Q_strength': (0.0, 1.0, False),
+    'P_strength': (0.0, 1.0, False),
+    'learning_rate': (0.01, 0.2, False),
+    'content_pool_size': (200, 5000, True),
+    'num_users': (50, 500, True)
+}
+
+
+def scale_design(unit, parameters=PARAMETERS):
+    """
+    将 [0, 1] 单位超立方体中的设计点映射到参数范围
+
+    Args:
+        unit: (点数, 参数数) 数组
+        parameters: {参数名称: (下限, 上限, 是否取整)}
+
+    Returns:
+        每个点一个 {参数名称: 值} 字典
+    """
+    columns = {}
+    for j, (name, (low, high, integer)) in enumerate(parameters.items()):
+        values = low + unit[:, j] * (high - low)
+        columns[name] = np.rint(values).astype(int).tolist() if integer else values.tolist()
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def saltelli_design(base_samples, num_parameters, seed=None):
+    """
+    Saltelli 设计：两个独立的基础矩阵 A、B，以及把 A 的第 i 列换成 B 的第 i 列
+    得到的矩阵 AB_i，共 base_samples × (参数数 + 2) 个点
+
+    Returns:
+        (单位设计点, 每个点的随机数分组)，
+        点的顺序为 A、B、AB_1、…、AB_d，各块内按基础样本编号排列；
+        A 与各 AB_i 的第 j 行同组（编号 j），B 的第 j 行单独成组（编号 N + j）
+    """
+    rng = np.random.default_rng(seed)
+    A = rng.random((base_samples, num_parameters))
+    B = rng.random((base_samples, num_parameters))
+    blocks = [A, B]
+    for i in range(num_parameters):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    rows = np.tile(np.arange(base_samples), num_parameters + 2)
+    # B 使用独立的随机数：若与 AB_i 共用，模拟噪声在 f(B) - f(AB_i) 中抵消，
+    # 一阶指数会把噪声方差计入每个参数而整体偏高
+    rows[base_samples:2 * base_samples] += base_samples
+    return np.vstack(blocks), rows
+
+
+def morris_design(trajectories, num_parameters, levels=4, seed=None):
+    """
+    Morris 一次一因素轨迹设计：每条轨迹从网格上的随机起点出发，
+    按随机顺序每次只改变一个参数 ±Δ（Δ = levels / (2(levels-1))），共 参数数 + 1 个点
+
+    Returns:
+        (单位设计点, 每个点所属的轨迹编号)
+    """
+    rng = np.random.default_rng(seed)
+    delta = levels / (2.0 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+    points = []
+    for _ in range(trajectories):
+        # 起点取在可以沿正方向移动 Δ 的网格值上，再随机翻转方向
+        start = rng.choice(grid[grid + delta <= 1.0 + 1e-12], num_parameters)
+        direction = rng.choice([-1.0, 1.0], num_parameters)
+        start = np.where(direction > 0, start, start + delta)
+        current = start.copy()
+        trajectory = [current.copy()]
+        for i in rng.permutation(num_parameters):
+            current[i] += direction[i] * delta
+            trajectory.append(current.copy())
+        points.append(trajectory)
+    points = np.asarray(points).reshape(-1, num_parameters)
+    return points, np.repeat(np.arange(trajectories), num_parameters + 1)
+
+
+def run_point(params, steps, seed):
+    """运行一个参数点，返回最终极化程度（供进程池调用）"""
+    from model import PlatformModel
+
+    model = PlatformModel(backend='numpy', seed=seed, **params)
+    for _ in range(steps):
+        model.step()
+    return model.calculate_polarization()
+
+
+def _cache_key(params, steps, seed):
+    """参数点、步数与种子的哈希，作为缓存键"""
+    text = json.dumps({'params': params, 'steps': steps, 'seed': seed}, sort_keys=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def load_cache(path):
+    """读取 JSONL 缓存 {键: 输出}（忽略中断时写了一半的末行）"""
+    cache = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                cache[record['key']] = record['output']
+    return cache
+
+
+def evaluate_design(points, seeds, steps=100, workers=None, cache_path=None):
+    """
+    批量运行设计点，已缓存的点直接读取，新结果完成一个追加一条
+
+    Args:
+        points: 每个点的参数字典
+        seeds: 每个点的随机种子
+        steps: 模拟步数
+        workers: 并行进程数（None 或 1 表示在当前进程运行）
+        cache_path: JSONL 缓存路径（None 表示不缓存）
+
+    Returns:
+        与 points 对应的输出数组
+    """
+    keys = [_cache_key(params, steps, int(seed)) for params, seed in zip(points, seeds)]
+    cache = load_cache(cache_path)
+    pending = {}
+    for index, key in enumerate(keys):
+        if key not in cache and key not in pending:
+            pending[key] = index
+    print(f"设计点 {len(points)} 个，已缓存 {len(points) - len(pending)} 个，待运行 {len(pending)} 个")
+
+    log = open(cache_path, 'a', encoding='utf-8') if cache_path else None
+
+    def record(key, output):
+        cache[key] = output
+        if log is not None:
+            index = pending[key]
+            log.write(json.dumps({'key': key, 'params': points[index], 'steps': steps,
+                                  'seed': int(seeds[index]), 'output': output}) + '\n')
+            log.flush()
+
+    try:
+        if workers is not None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(run_point, points[index], steps, int(seeds[index])): key
+                           for key, index in pending.items()}
+                for done, future in enumerate(as_completed(futures), 1):
+                    record(futures[future], future.result())
+                    if done % 100 == 0:
+                        print(f"  已完成 {done}/{len(pending)}")
+        else:
+            for done, (key, index) in enumerate(pending.items(), 1):
+                record(key, run_point(points[index], steps, int(seeds[index])))
+                if done % 100 == 0:
+                    print(f"  已完成 {done}/{len(pending)}")
+    finally:
+        if log is not None:
+            log.close()
+    return np.array([cache[key] for key in keys])
+
+
+def _jansen_indices(yA, yB, yAB):
+    """
+    Jansen 估计量（按最后一维批量计算）
+
+    S_i  = (V - E[(f(B) - f(AB_i))²] / 2) / V
+    ST_i = E[(f(A) - f(AB_i))²] / (2V)
+
+    Args:
+        yA, yB: (..., N)
+        yAB: (参数数, ..., N)
+    """
+    variance = np.concatenate([yA, yB], axis=-1).var(axis=-1)
+    first = 1.0 - ((yB - yAB) ** 2).mean(axis=-1) / (2.0 * variance)
+    total = ((yA - yAB) ** 2).mean(axis=-1) / (2.0 * variance)
+    return first, total
+
+
+def sobol_indices(outputs, num_parameters, resamples=1000, confidence=0.95, seed=None):
+    """
+    由 Saltelli 设计的输出计算一阶与总效应 Sobol 指数及自助法置信区间
+
+    Args:
+        outputs: 按 saltelli_design 的点顺序排列的输出
+        num_parameters: 参数数
+        resamples: 自助重抽样次数（对基础样本整体重抽样，一次向量化计算）
+        confidence: 置信水平
+
+    Returns:
+        (一阶指数, 总效应指数, 一阶置信区间 (2, d), 总效应置信区间 (2, d))
+    """
+    blocks = np.asarray(outputs, dtype=np.float64).reshape(num_parameters + 2, -1)
+    yA, yB, yAB = blocks[0], blocks[1], blocks[2:]
+    first, total = _jansen_indices(yA, yB, yAB)
+
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(yA), (resamples, len(yA)))
+    boot_first, boot_total = _jansen_indices(yA[indices], yB[indices], yAB[:, indices])
+    tail = (1.0 - confidence) / 2.0
+    first_ci = np.quantile(boot_first, [tail, 1.0 - tail], axis=1)
+    total_ci = np.quantile(boot_total, [tail, 1.0 - tail], axis=1)
+    return first, total, first_ci, total_ci
+
+
+def morris_indices(unit, outputs, num_parameters):
+    """
+    由 Morris 轨迹计算每个参数的 μ*（基本效应绝对值的均值）与 σ（基本效应的标准差）
+
+    基本效应以单位超立方体中的步长计算，各参数之间可直接比较
+
+    Returns:
+        (μ*, σ)
+    """
+    unit = unit.reshape(-1, num_parameters + 1, num_parameters)
+    outputs = np.asarray(outputs, dtype=np.float64).reshape(-1, num_parameters + 1)
+    steps = np.diff(unit, axis=1)                            # (轨迹数, 参数数, 参数数)
+    changed = np.argmax(np.abs(steps), axis=2)               # 每一步改变的参数
+    effects = np.diff(outputs, axis=1) / np.take_along_axis(
+        steps, changed[:, :, None], axis=2)[:, :, 0]
+    elementary = np.empty((len(outputs), num_parameters))
+    np.put_along_axis(elementary, changed, effects, axis=1)
+    return np.abs(elementary).mean(axis=0), elementary.std(axis=0, ddof=1)
+
+
+def run_study(method='saltelli', samples=64, steps=100, parameters=PARAMETERS,
+              workers=None, cache_path='sensitivity_cache.jsonl', seed=0, resamples=1000):
+    """
+    生成设计、批量运行（可续跑）并计算敏感性指标
+
+    Args:
+        method: 'saltelli'（Sobol 指数，samples 为基础样本数，共 samples × (d+2) 次运行）
+            或 'morris'（samples 为轨迹数，共 samples × (d+1) 次运行）
+        samples: 基础样本数或轨迹数
+        steps: 每次运行的模拟步数
+        parameters: {参数名称: (下限, 上限, 是否取整)}
+        workers: 并行进程数
+        cache_path: JSONL 缓存路径
+        seed: 设计与模拟的随机数种子
+        resamples: Sobol 指数的自助重抽样次数
+
+    Returns:
+        DataFrame，每行一个参数
+    """
+    num_parameters = len(parameters)
+    if method == 'saltelli':
+        unit, groups = saltelli_design(samples, num_parameters, seed)
+    elif method == 'morris':
+        unit, groups = morris_design(samples, num_parameters, seed=seed)
+    else:
+        raise ValueError(f"未知的设计方法: {method}")
+    # 同组的点共用随机种子（共同随机数）：Saltelli 设计中 A 与 AB_i 同组、B 独立，
+    # Morris 设计中同一轨迹的点同组
+    seeds = seed * 1_000_003 + groups
+    outputs = evaluate_design(scale_design(unit, parameters), seeds, steps, workers, cache_path)
+
+    names = list(parameters)
+    if method == 'saltelli':
+        first, total, first_ci, total_ci = sobol_indices(outputs, num_parameters, resamples, seed=seed)
+        return pd.DataFrame({
+            '参数': names,
+            '一阶指数 S1': first,
+            'S1 CI 下限': first_ci[0],
+            'S1 CI 上限': first_ci[1],
+            '总效应指数 ST': total,
+            'ST CI 下限': total_ci[0],
+            'ST CI 上限': total_ci[1]
+        })
+    mu_star, sigma = morris_indices(unit, outputs, num_parameters)
+    return pd.DataFrame({'参数': names, 'μ*': mu_star, 'σ': sigma}).sort_values('μ*', ascending=False)
+
+
+def _parse_ranges(items):
+    """解析命令行的 名称=下限:上限 参数范围覆盖"""
+    parameters = dict(PARAMETERS)
+    for item in items or []:
+        name, bounds = item.split('=')
+        if name not in parameters:
+            raise ValueError(f"未知参数: {name}（可选 {list(PARAMETERS)}）")
+        low, high = (float(value) for value in bounds.split(':'))
+        parameters[name] = (low, high, parameters[name][2])
+    return parameters
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="PlatformModel 全局敏感性分析（Sobol / Morris）")
+    parser.add_argument('--method', choices=['saltelli', 'morris'], default='saltelli')
+    parser.add_argument('--samples', type=int, default=64, help="Saltelli 基础样本数 / Morris 轨迹数")
+    parser.add_argument('--steps', type=int, default=100, help="每次运行的模拟步数")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="并行进程数")
+    parser.add_argument('--cache', default='sensitivity_cache.jsonl', help="结果缓存（JSONL，可续跑）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--range', action='append', metavar='名称=下限:上限',
+                        help="覆盖参数范围，可重复，如 --range learning_rate=0.01:0.1")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"全局敏感性分析：{args.method}，最终极化程度")
+    print("=" * 70)
+    table = run_study(args.method, args.samples, args.steps, _parse_ranges(args.range),
+                      args.workers, args.cache, args.seed)
+    print()
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    output = f"sensitivity_{args.method}.csv"
+    table.to_csv(output, index=False, encoding='utf-8-sig')
+    print(f"\n结果已保存至: {output}")
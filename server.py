@@ -9,19 +9,17 @@ import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 matplotlib.rcParams['axes.unicode_minus'] = False
-import numpy as np
 
 
 def belief_distribution_chart(model):
     """
     绘制信念分布直方图
     """
-    beliefs = [agent.belief for agent in model.agents]
-    
     fig, ax = plt.subplots(figsize=(6, 4))
     
-    # 绘制直方图
-    ax.hist(beliefs, bins=20, range=(-1, 1), 
+    # 绘制直方图（使用模型维护的分箱计数）
+    ax.hist(model.histogram_edges[:-1], bins=model.histogram_edges,
+            weights=model.belief_histogram,
             color='steelblue', edgecolor='black', alpha=0.7)
     ax.axvline(x=0, color='red', linestyle='--', linewidth=2, alpha=0.5)
     
@@ -32,9 +30,9 @@ def belief_distribution_chart(model):
     ax.set_xlim(-1, 1)
     
     # 添加统计信息
-    mean_belief = np.mean(beliefs)
-    std_belief = np.std(beliefs)
-    polarization = np.var(beliefs)
+    mean_belief = model.calculate_mean_belief()
+    std_belief = model.calculate_belief_std()
+    polarization = model.calculate_polarization()
     
     stats_text = f'均值: {mean_belief:.3f}\n标准差: {std_belief:.3f}\n极化: {polarization:.3f}'
     ax.text(0.02, 0.98, stats_text, transform=ax.transAxes,
@@ -186,7 +184,10 @@ model_params = {
         "min": 100,
         "max": 2000,
         "step": 100
-    }
+    },
+    # 固定的内存预算：限制每个代理的消费记录和数据收集器的记录步数
+    "history_limit": 50,
+    "max_records": 1000
 }
 
 
@@ -0,0 +1,168 @@
+"""
+会话管理 (SessionManager)
+为 Web 界面的每个浏览器会话维护独立的模型实例，
+限制并发会话数量与单个模型的内存占用，并回收空闲会话
+"""
+import threading
+import time
+
+from model import PlatformModel
+
+
+class SessionLimitError(RuntimeError):
+    """并发会话数已达上限且没有可回收的空闲会话"""
+
+
+class SessionManager:
+    """
+    按会话 ID 隔离的模型注册表（线程安全）
+
+    会话的最后一个页面（内核）关闭时立即释放其模型（见 connect / disconnect）；
+    页面一直打开但长时间不操作的会话由后台线程定期回收（见 start_eviction）
+
+    属性:
+        max_sessions: 同时存在的会话（模型）数量上限
+        idle_timeout: 会话空闲多少秒后可被回收
+        history_limit: 每个代理保留的消费记录条数上限
+        max_records: 每个模型的数据收集器保留的记录步数上限
+        max_users: 单个会话允许创建的最大用户数量
+    """
+
+    def __init__(self, max_sessions=30, idle_timeout=1800, history_limit=50,
+                 max_records=1000, max_users=500):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history_limit = history_limit
+        self.max_records = max_records
+        self.max_users = max_users
+        self._sessions = {}  # session_id -> [model, 最近活跃时间]
+        self._connections = {}  # session_id -> 打开的页面（内核）数量
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._evictor = None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """
+        获取会话的模型并刷新活跃时间
+
+        Returns:
+            模型实例；会话不存在或已被回收时返回 None
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            entry[1] = time.monotonic()
+            return entry[0]
+
+    def create(self, session_id, **model_params):
+        """
+        为会话创建（或替换）模型，内存预算由管理器统一施加
+
+        Args:
+            session_id: 会话 ID
+            model_params: 传给 PlatformModel 的参数
+
+        Returns:
+            新建的模型实例
+
+        Raises:
+            SessionLimitError: 会话数已达上限
+        """
+        num_users = min(model_params.pop('num_users', 100), self.max_users)
+        with self._lock:
+            if session_id not in self._sessions:
+                self._evict_idle()
+                if len(self._sessions) >= self.max_sessions:
+                    raise SessionLimitError(
+                        f"当前已有 {len(self._sessions)} 个会话在运行，请稍后再试"
+                    )
+            # 先占位，避免同一会话并发创建时超出上限
+            self._sessions[session_id] = [None, time.monotonic()]
+
+        try:
+            model = PlatformModel(
+                num_users=num_users,
+                history_limit=self.history_limit,
+                max_records=self.max_records,
+                **model_params
+            )
+        except Exception:
+            self.remove(session_id)
+            raise
+
+        with self._lock:
+            self._sessions[session_id] = [model, time.monotonic()]
+        return model
+
+    def remove(self, session_id):
+        """释放会话的模型"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def connect(self, session_id):
+        """登记会话打开了一个页面（内核）"""
+        with self._lock:
+            self._connections[session_id] = self._connections.get(session_id, 0) + 1
+
+    def disconnect(self, session_id):
+        """
+        登记会话关闭了一个页面；最后一个页面关闭时释放会话的模型
+
+        Returns:
+            是否释放了模型
+        """
+        with self._lock:
+            remaining = self._connections.get(session_id, 0) - 1
+            if remaining > 0:
+                self._connections[session_id] = remaining
+                return False
+            self._connections.pop(session_id, None)
+            return self._sessions.pop(session_id, None) is not None
+
+    def start_eviction(self, interval=60.0):
+        """
+        启动后台守护线程，每 interval 秒回收一次空闲会话（已启动时不重复启动）
+        """
+        with self._lock:
+            if self._evictor is not None and self._evictor.is_alive():
+                return
+            self._stop.clear()
+            self._evictor = threading.Thread(target=self._eviction_loop, args=(interval,),
+                                             name='session-eviction', daemon=True)
+            self._evictor.start()
+
+    def stop_eviction(self):
+        """停止后台回收线程"""
+        self._stop.set()
+        if self._evictor is not None:
+            self._evictor.join()
+            self._evictor = None
+
+    def _eviction_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.evict_idle()
+
+    def evict_idle(self):
+        """
+        回收所有超过 idle_timeout 未活跃的会话
+
+        Returns:
+            被回收的会话数量
+        """
+        with self._lock:
+            return self._evict_idle()
+
+    def _evict_idle(self):
+        """回收空闲会话（调用方需持有锁）"""
+        now = time.monotonic()
+        idle = [
+            session_id for session_id, (model, last_active) in self._sessions.items()
+            if model is not None and now - last_active > self.idle_timeout
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+        return len(idle)
@@ -0,0 +1,123 @@
+"""
+轻量级 CSR 稀疏矩阵
+只依赖 NumPy，提供构建、成员查询与矩阵-向量乘法，供社交网络与交互矩阵使用
+"""
+import numpy as np
+
+
+class CSRMatrix:
+    """
+    压缩稀疏行 (CSR) 格式的矩阵
+
+    属性:
+        indptr: 行指针，长度为 行数+1
+        indices: 每个非零元的列号
+        data: 每个非零元的值
+        shape: (行数, 列数)
+    """
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+        # 每个非零元所在的行号，矩阵-向量乘法时用 bincount 按行求和
+        self._rows = np.repeat(
+            np.arange(shape[0], dtype=indices.dtype), np.diff(indptr)
+        )
+
+    @classmethod
+    def from_coo(cls, rows, cols, data=None, shape=None, sum_duplicates=True):
+        """
+        由坐标 (COO) 三元组构建 CSR 矩阵
+
+        Args:
+            rows: 行号数组
+            cols: 列号数组
+            data: 非零元的值（默认全为 1）
+            shape: 矩阵形状（默认由最大行列号推断）
+            sum_duplicates: 是否合并重复坐标（值相加）
+
+        Returns:
+            CSRMatrix
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        if data is None:
+            data = np.ones(len(rows))
+        data = np.asarray(data, dtype=np.float64)
+        if shape is None:
+            shape = (int(rows.max()) + 1 if len(rows) else 0,
+                     int(cols.max()) + 1 if len(cols) else 0)
+
+        order = np.lexsort((cols, rows))
+        rows, cols, data = rows[order], cols[order], data[order]
+        if sum_duplicates and len(rows) > 1:
+            new_entry = np.empty(len(rows), dtype=bool)
+            new_entry[0] = True
+            new_entry[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+            if not new_entry.all():
+                starts = np.flatnonzero(new_entry)
+                data = np.add.reduceat(data, starts)
+                rows, cols = rows[starts], cols[starts]
+
+        index_dtype = np.int32 if max(shape) < np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols.astype(index_dtype), data, shape)
+
+    @property
+    def nnz(self):
+        """非零元数量"""
+        return len(self.indices)
+
+    def to_coo(self):
+        """返回 (行号, 列号, 值) 三元组"""
+        return self._rows, self.indices, self.data
+
+    def contains(self, rows, cols):
+        """
+        批量查询 (行, 列) 是否为非零元（要求每行内列号有序，from_coo 构建的矩阵满足）
+
+        Args:
+            rows / cols: 等长的行号、列号数组（超出矩阵范围的坐标视为不存在）
+
+        Returns:
+            布尔数组
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        if self.nnz == 0:
+            return np.zeros(len(rows), dtype=bool)
+        # 按 (行, 列) 排序的非零元编码为有序整数键，一次二分查找
+        keys = self._rows.astype(np.int64) * self.shape[1] + self.indices
+        inside = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        query = np.where(inside, rows * self.shape[1] + cols, -1)
+        position = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        return inside & (keys[position] == query)
+
+    def row_sums(self):
+        """每行非零元之和"""
+        return np.bincount(self._rows, weights=self.data, minlength=self.shape[0])
+
+    def scale_rows(self, factors):
+        """
+        返回每行乘以 factors 对应元素后的新矩阵（共享结构数组）
+        """
+        return CSRMatrix(self.indptr, self.indices,
+                         self.data * factors[self._rows], self.shape)
+
+    def dot(self, x):
+        """
+        矩阵-向量乘法 A @ x
+
+        Args:
+            x: 长度为列数的一维数组，或 (列数, d) 的二维数组
+
+        Returns:
+            长度为行数的一维数组，或 (行数, d) 的二维数组
+        """
+        if x.ndim == 1:
+            return np.bincount(self._rows, weights=self.data * x[self.indices],
+                               minlength=self.shape[0])
+        return np.column_stack([self.dot(x[:, j]) for j in range(x.shape[1])])
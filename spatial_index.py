@@ -0,0 +1,210 @@
+"""
+倒排文件近邻索引 (IVFIndex)
+用 k-means 将内容划分到若干聚类列表，检索时只扫描与查询最近的几个列表，
+代替对整个内容池的全量扫描；支持随内容写入增量维护
+"""
+import numpy as np
+
+
+def _as_matrix(points):
+    """一维倾向性视为 (n, 1) 矩阵"""
+    points = np.asarray(points, dtype=np.float64)
+    return points[:, None] if points.ndim == 1 else points
+
+
+def _squared_distances(points, centroids):
+    """点到各聚类中心的平方欧氏距离矩阵 (n, k)"""
+    return (np.einsum('ij,ij->i', points, points)[:, None]
+            - 2.0 * points @ centroids.T
+            + np.einsum('ij,ij->i', centroids, centroids)[None, :])
+
+
+class IVFIndex:
+    """
+    倒排文件 (IVF) 近似近邻索引
+
+    属性:
+        num_lists: 聚类列表数量（默认约为 sqrt(内容数)）
+        n_probe: 检索时扫描的最近列表数量
+        centroids: 聚类中心 (num_lists, d)
+        assignment: 每个槽位所属的列表（-1 表示未索引）
+    """
+
+    # 分块分配时每块的点数，控制临时距离矩阵的大小
+    CHUNK_SIZE = 65536
+
+    def __init__(self, num_lists=None, n_probe=8, train_size=50000, iterations=10):
+        self.num_lists = num_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.iterations = iterations
+        self.centroids = None
+        self.assignment = None
+        self._lists = []
+        self._list_sizes = None
+        self._entries = 0
+        self._indexed = 0
+
+    def build(self, points, slots):
+        """
+        训练聚类中心并索引给定槽位的内容
+
+        Args:
+            points: 全部槽位的倾向性数组（一维或 (容量, d)）
+            slots: 需要索引的槽位编号
+        """
+        points = _as_matrix(points)
+        capacity = len(points)
+        num_lists = self.num_lists or max(int(np.sqrt(len(slots))), 1)
+        num_lists = min(num_lists, len(slots))
+
+        # 在抽样上训练 k-means
+        sample = points[np.random.choice(slots, min(self.train_size, len(slots)), replace=False)]
+        centroids = sample[np.random.choice(len(sample), num_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmin(_squared_distances(sample, centroids), axis=1)
+            counts = np.bincount(labels, minlength=num_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+        self.centroids = centroids
+        self.num_lists = num_lists
+
+        self.assignment = np.full(capacity, -1, dtype=np.int64)
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(num_lists)]
+        self._list_sizes = np.zeros(num_lists, dtype=np.int64)
+        self._entries = 0
+        self._indexed = 0
+        self.add(slots, points[slots])
+
+    def _assign(self, points):
+        """分块计算每个点最近的聚类中心"""
+        labels = np.empty(len(points), dtype=np.int64)
+        for start in range(0, len(points), self.CHUNK_SIZE):
+            chunk = points[start:start + self.CHUNK_SIZE]
+            labels[start:start + self.CHUNK_SIZE] = np.argmin(
+                _squared_distances(chunk, self.centroids), axis=1
+            )
+        return labels
+
+    def add(self, slots, points):
+        """
+        增量索引新写入的槽位（槽位被复用时旧条目自动失效）
+
+        Args:
+            slots: 槽位编号数组
+            points: 这些槽位的新倾向性
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        labels = self._assign(_as_matrix(points))
+        # 所属列表没有变化的槽位无需追加新条目
+        changed = self.assignment[slots] != labels
+        slots, labels = slots[changed], labels[changed]
+        self._indexed += np.count_nonzero(self.assignment[slots] < 0)
+        self.assignment[slots] = labels
+
+        order = np.argsort(labels, kind='stable')
+        slots, labels = slots[order], labels[order]
+        boundaries = np.flatnonzero(np.diff(labels)) + 1
+        for group in np.split(np.arange(len(slots)), boundaries):
+            if len(group) == 0:
+                continue
+            lst = labels[group[0]]
+            size = self._list_sizes[lst]
+            buffer = self._lists[lst]
+            if size + len(group) > len(buffer):
+                grown = np.empty(max(2 * len(buffer), size + len(group)), dtype=np.int64)
+                grown[:size] = buffer[:size]
+                self._lists[lst] = buffer = grown
+            buffer[size:size + len(group)] = slots[group]
+            self._list_sizes[lst] += len(group)
+        self._entries += len(slots)
+
+        # 失效条目过多时按 assignment 压缩列表
+        if self._entries > 2 * len(self.assignment):
+            self._compact()
+
+    def _compact(self):
+        """丢弃失效条目，按当前 assignment 重新组织列表"""
+        indexed = np.flatnonzero(self.assignment >= 0)
+        labels = self.assignment[indexed]
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=self.num_lists)
+        self._lists = np.split(indexed[order], np.cumsum(counts)[:-1])
+        self._list_sizes = counts.astype(np.int64)
+        self._entries = self._indexed = len(indexed)
+
+    def probe(self, queries, n_probe=None):
+        """
+        每个查询点最近的 n_probe 个列表（按列表编号排序）
+
+        Args:
+            queries: 查询点数组，形状 (k,)（一维倾向性）或 (k, d)
+            n_probe: 扫描的列表数量（默认使用 self.n_probe）
+
+        Returns:
+            (k, n_probe) 的列表编号矩阵
+        """
+        n_probe = min(n_probe or self.n_probe, self.num_lists)
+        distances = _squared_distances(_as_matrix(queries), self.centroids)
+        return np.sort(np.argpartition(distances, n_probe - 1, axis=1)[:, :n_probe], axis=1)
+
+    def gather(self, lists, alive=None):
+        """
+        给定列表中的候选槽位
+
+        Args:
+            lists: 列表编号数组
+            alive: 可选的槽位有效性掩码，用于过滤已过期的内容
+
+        Returns:
+            候选槽位编号数组
+        """
+        candidates = np.concatenate([self._lists[i][:self._list_sizes[i]] for i in lists])
+        owners = np.repeat(lists, self._list_sizes[lists])
+        # 过滤已被分配到其他列表的失效条目
+        valid = self.assignment[candidates] == owners
+        if alive is not None:
+            valid &= alive[candidates]
+        candidates = candidates[valid]
+        if self._entries > self._indexed:
+            # 槽位多次复用后可能在同一列表中重复出现
+            candidates = np.unique(candidates)
+        return candidates
+
+    def search(self, query, alive=None, n_probe=None):
+        """
+        返回与查询点最近的 n_probe 个列表中的候选槽位
+
+        Args:
+            query: 查询点（标量或长度为 d 的向量）
+            alive: 可选的槽位有效性掩码，用于过滤已过期的内容
+            n_probe: 扫描的列表数量（默认使用 self.n_probe）
+
+        Returns:
+            候选槽位编号数组
+        """
+        query = np.atleast_1d(np.asarray(query, dtype=np.float64))[None, :]
+        return self.gather(self.probe(query, n_probe)[0], alive)
+
+    def search_batch(self, queries, alive=None, n_probe=None):
+        """
+        批量检索：扫描相同列表集合的查询点共用一组候选
+
+        一维倾向性上最近的 n_probe 个列表总是相邻的一段，
+        分组数至多为 num_lists - n_probe + 1，与查询点数量无关
+
+        Args:
+            queries: 查询点数组，形状 (k,) 或 (k, d)
+            alive / n_probe: 见 search
+
+        Returns:
+            [(查询点下标数组, 候选槽位编号数组), ...]
+        """
+        probes = self.probe(queries, n_probe)
+        groups, inverse = np.unique(probes, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        rows = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(groups)))[:-1])
+        return [(members, self.gather(lists, alive)) for lists, members in zip(groups, rows)]
@@ -0,0 +1,7 @@
+"""
+测试配置：模块位于仓库根目录（平铺布局），将其加入导入路径
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
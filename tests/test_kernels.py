@@ -0,0 +1,90 @@
+"""
+融合内核的后端等价性测试
+NumPy 后端与逐用户参考实现比较；Numba 后端与 NumPy 后端在相同随机数下比较
+（未安装 numba 时跳过）
+"""
+import warnings
+
+import numpy as np
+import pytest
+
+from kernels import (BACKENDS, NUMBA_AVAILABLE, _reference_select_and_update,
+                     get_backend, select_and_update, verify_backends)
+from model import PlatformModel
+
+
+requires_numba = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="未安装 numba")
+
+
+def _inputs(belief_dim, num_users=500, pool_size=2000, feed_size=10, seed=0):
+    """固定种子的一批内核输入（含空位、空信息流与吸引力全为零的用户）"""
+    rng = np.random.default_rng(seed)
+    shape = lambda n: n if belief_dim == 1 else (n, belief_dim)
+    beliefs = np.clip(rng.normal(0, 0.3, shape(num_users)), -1.0, 1.0)
+    slants = rng.uniform(-1.0, 1.0, shape(pool_size))
+    agents = rng.permutation(num_users)[:num_users // 2]
+    feeds = rng.integers(0, pool_size, (len(agents), feed_size))
+    feeds[rng.random(feeds.shape) < 0.05] = -1
+    feeds = np.sort(feeds, axis=1)[:, ::-1].copy()
+    feed_sizes = rng.integers(0, feed_size + 1, len(agents))
+    P = rng.uniform(0, 1, num_users)
+    P[:10] = np.inf
+    learning_rate = rng.uniform(0, 0.2, num_users)
+    uniforms = rng.random(len(agents))
+    return beliefs, slants, feeds, feed_sizes, agents, P, learning_rate, uniforms
+
+
+def _run(name, inputs):
+    beliefs, *rest = inputs
+    updated = beliefs.copy()
+    selected = select_and_update(BACKENDS[name], updated, *rest)
+    return selected, updated
+
+
+@pytest.mark.parametrize('belief_dim', [1, 3])
+def test_numpy_matches_reference(belief_dim):
+    inputs = _inputs(belief_dim)
+    expected, expected_beliefs = _reference_select_and_update(*inputs)
+    selected, updated = _run('numpy', inputs)
+    assert np.mean(selected == expected) > 0.999
+    np.testing.assert_allclose(updated, expected_beliefs, atol=1e-9)
+
+
+@requires_numba
+@pytest.mark.parametrize('belief_dim', [1, 3])
+def test_numba_matches_numpy(belief_dim):
+    inputs = _inputs(belief_dim)
+    numpy_selected, numpy_beliefs = _run('numpy', inputs)
+    numba_selected, numba_beliefs = _run('numba', inputs)
+    # 浮点累加顺序不同，极少数落在累积和边界上的抽样可能不同
+    assert np.mean(numba_selected == numpy_selected) > 0.999
+    same = numba_selected == numpy_selected
+    rows = inputs[4][same]
+    np.testing.assert_allclose(numba_beliefs[rows], numpy_beliefs[rows], atol=1e-9)
+
+
+@requires_numba
+def test_numba_model_matches_numpy():
+    def run(backend):
+        model = PlatformModel(num_users=200, content_pool_size=500, backend=backend, seed=42)
+        for _ in range(5):
+            model.step()
+        return model.beliefs.copy()
+
+    np.testing.assert_allclose(run('numba'), run('numpy'), atol=1e-9)
+
+
+@requires_numba
+def test_verify_backends_reports_numba():
+    results = verify_backends(num_users=500, pool_size=1000)
+    agreement, error = results['numba']
+    assert agreement > 0.999 and error < 1e-9
+
+
+@pytest.mark.skipif(NUMBA_AVAILABLE, reason="已安装 numba")
+def test_numba_falls_back_to_numpy_when_missing():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        name, kernel = get_backend('numba')
+    assert name == 'numpy' and kernel is BACKENDS['numpy']
+    assert caught
@@ -0,0 +1,390 @@
+"""
+信念轨迹 (BeliefTrajectory)
+以稠密数组 (步数, 用户数) 保存每步的全体信念，按步、按用户、按步区间切片都是 O(1) 的视图，
+替代在数据收集器的 (Step, AgentID) 多级索引 DataFrame 上逐步 .xs 查询
+
+大规模运行的轨迹可写为分块压缩的目录 (TrajectoryWriter / save_trajectory)，
+按 (时间块, 用户块) 分块、可选量化与差分编码，StoredTrajectory 只读取查询涉及的块
+"""
+import json
+import os
+
+import numpy as np
+
+
+class BeliefTrajectory:
+    """
+    每步全体用户信念的稠密记录
+
+    第 k 行是完成 k 步时（每步开始、数据收集时）的信念，与数据收集器的记录时刻一致；
+    容量不足时按倍数扩容，丢弃最早的记录只移动起始偏移，不复制数据
+
+    属性:
+        num_users: 用户数量
+        start: 保留的第一条记录对应的步数（丢弃早期记录后大于 0）
+        values: 保留的全部记录，(记录数, 用户数[, 维度]) 的视图
+    """
+
+    def __init__(self, num_users, dim=1, capacity=64, dtype=np.float64):
+        self.num_users = num_users
+        self.dim = dim
+        shape = (capacity, num_users) if dim == 1 else (capacity, num_users, dim)
+        self._data = np.empty(shape, dtype=dtype)
+        self._first = 0
+        self._end = 0
+        self.start = 0
+
+    def __len__(self):
+        return self._end - self._first
+
+    @property
+    def values(self):
+        """保留的全部记录（视图）"""
+        return self._data[self._first:self._end]
+
+    @property
+    def steps(self):
+        """每条记录对应的步数"""
+        return np.arange(self.start, self.start + len(self))
+
+    def record(self, beliefs):
+        """追加一步的信念（复制一份）"""
+        if self._end == len(self._data):
+            count = len(self)
+            # 前部空出的位置足够多时原地前移，否则扩容
+            if self._first < len(self._data) // 2:
+                grown = np.empty((2 * len(self._data),) + self._data.shape[1:], dtype=self._data.dtype)
+                grown[:count] = self._data[self._first:self._end]
+                self._data = grown
+            else:
+                self._data[:count] = self._data[self._first:self._end]
+            self._first, self._end = 0, count
+        self._data[self._end] = beliefs
+        self._end += 1
+
+    def drop(self, count):
+        """丢弃最早的 count 条记录"""
+        count = min(max(count, 0), len(self))
+        self._first += count
+        self.start += count
+
+    def _row(self, step):
+        """步数 -> 数组行号（负数表示从末尾倒数）"""
+        if step < 0:
+            step += self.start + len(self)
+        row = step - self.start
+        if not 0 <= row < len(self):
+            raise IndexError(f"步数 {step} 不在记录范围 [{self.start}, {self.start + len(self)}) 内")
+        return self._first + row
+
+    def at(self, step):
+        """第 step 步时全体用户的信念（视图，负数表示从末尾倒数）"""
+        return self._data[self._row(step)]
+
+    @property
+    def initial(self):
+        """保留的第一条记录"""
+        return self.at(self.start)
+
+    @property
+    def final(self):
+        """最近一条记录"""
+        return self.at(-1)
+
+    def agent(self, index):
+        """一个用户在全部保留步上的信念路径（视图）"""
+        return self.values[:, index]
+
+    def window(self, start=None, stop=None):
+        """步数区间 [start, stop) 内的记录（视图）"""
+        start = self.start if start is None else max(start, self.start)
+        stop = self.start + len(self) if stop is None else min(stop, self.start + len(self))
+        return self._data[self._first + start - self.start:self._first + max(stop, start) - self.start]
+
+    def primary(self, values=None):
+        """第一个话题维度（一维时原样返回）"""
+        values = self.values if values is None else values
+        return values if self.dim == 1 else values[..., 0]
+
+    def distribution(self, step, bins=20, density=False):
+        """
+        第 step 步的信念分布（[-1, 1] 上的固定分箱，按第一个话题维度）
+
+        Returns:
+            (计数或密度, 分箱边界)
+        """
+        return np.histogram(self.primary(self.at(step)), bins=bins, range=(-1.0, 1.0), density=density)
+
+    def quantile_bands(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95), start=None, stop=None):
+        """
+        每步信念的分位数带（按第一个话题维度）
+
+        Returns:
+            (分位数个数, 步数) 数组
+        """
+        return np.quantile(self.primary(self.window(start, stop)), quantiles, axis=1)
+
+    def save(self, path, **options):
+        """将保留的记录写为分块压缩目录（参数见 TrajectoryWriter）"""
+        return save_trajectory(path, self.values, start=self.start, **options)
+
+
+# 量化方式 -> 存储类型；fixed16 为 [-1, 1] 上的 16 位定点数（分辨率 1/32767）
+QUANTIZATIONS = {
+    'float64': np.float64,
+    'float32': np.float32,
+    'float16': np.float16,
+    'fixed16': np.int16
+}
+FIXED_SCALE = 32767.0
+
+
+def _encode(block, quantize, delta):
+    """
+    量化一个块；差分编码时把存储值按位视为同宽度的无符号整数，沿时间取差（模 2^位数），
+    解码时累加即可精确还原，缓慢变化的轨迹差分后高位多为 0，压缩率更高
+    """
+    if quantize == 'fixed16':
+        stored = np.rint(np.clip(block, -1.0, 1.0) * FIXED_SCALE).astype(np.int16)
+    else:
+        stored = block.astype(QUANTIZATIONS[quantize])
+    if not delta:
+        return stored
+    bits = stored.view(f'u{stored.itemsize}')
+    return np.concatenate([bits[:1], np.diff(bits, axis=0)])
+
+
+def _decode(encoded, quantize, delta):
+    """_encode 的逆变换，返回 float64"""
+    if delta:
+        encoded = np.cumsum(encoded, axis=0, dtype=encoded.dtype)
+    stored = encoded.view(QUANTIZATIONS[quantize])
+    if quantize == 'fixed16':
+        return stored / FIXED_SCALE
+    return stored.astype(np.float64)
+
+
+class TrajectoryWriter:
+    """
+    逐步写出分块压缩的信念轨迹目录
+
+    每凑满 time_chunk 步，按用户切成 agent_chunk 列一块，每块一个压缩 .npz 文件，
+    内存中只保留一个时间块；close 时写出 trajectory.json 清单
+
+    属性:
+        path: 输出目录
+        num_users / dim: 用户数量与信念维度
+        quantize: 量化方式（见 QUANTIZATIONS）
+        delta: 是否沿时间差分编码
+        steps: 已写入的步数
+    """
+
+    def __init__(self, path, num_users, dim=1, start=0, time_chunk=256, agent_chunk=65536,
+                 quantize='float32', delta=True, **metadata):
+        if quantize not in QUANTIZATIONS:
+            raise ValueError(f"未知的量化方式: {quantize}（可选 {list(QUANTIZATIONS)}）")
+        self.path = path
+        self.num_users = num_users
+        self.dim = dim
+        self.start = start
+        self.time_chunk = time_chunk
+        self.agent_chunk = agent_chunk
+        self.quantize = quantize
+        self.delta = delta
+        self.metadata = metadata
+        self.steps = 0
+        shape = (time_chunk, num_users) if dim == 1 else (time_chunk, num_users, dim)
+        self._buffer = np.empty(shape)
+        self._filled = 0
+        os.makedirs(path, exist_ok=True)
+
+    def record(self, beliefs):
+        """追加一步的信念"""
+        self._buffer[self._filled] = beliefs
+        self._filled += 1
+        self.steps += 1
+        if self._filled == self.time_chunk:
+            self._flush()
+
+    def write(self, values):
+        """追加多步的信念 (步数, 用户数[, 维度])"""
+        for row in values:
+            self.record(row)
+
+    def _flush(self):
+        """把缓冲的时间块按用户块压缩写出"""
+        if self._filled == 0:
+            return
+        chunk = (self.steps - 1) // self.time_chunk
+        block = self._buffer[:self._filled]
+        for a, low in enumerate(range(0, self.num_users, self.agent_chunk)):
+            encoded = _encode(block[:, low:low + self.agent_chunk], self.quantize, self.delta)
+            np.savez_compressed(os.path.join(self.path, f'chunk_{chunk:06d}_{a:06d}.npz'), data=encoded)
+        self._filled = 0
+
+    def close(self):
+        """写出最后一个不完整的时间块与清单"""
+        self._flush()
+        info = {
+            'num_users': self.num_users,
+            'dim': self.dim,
+            'start': self.start,
+            'steps': self.steps,
+            'time_chunk': self.time_chunk,
+            'agent_chunk': self.agent_chunk,
+            'quantize': self.quantize,
+            'delta': self.delta,
+            'metadata': self.metadata
+        }
+        with open(os.path.join(self.path, 'trajectory.json'), 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_trajectory(path, values, start=0, **options):
+    """
+    将 (步数, 用户数[, 维度]) 的信念数组写为分块压缩目录
+
+    Args:
+        path: 输出目录
+        values: 信念轨迹数组
+        start: 第一行对应的步数
+        **options: TrajectoryWriter 的其他参数（time_chunk、agent_chunk、quantize、delta、元数据）
+
+    Returns:
+        输出目录
+    """
+    values = np.asarray(values)
+    dim = 1 if values.ndim == 2 else values.shape[2]
+    with TrajectoryWriter(path, values.shape[1], dim, start=start, **options) as writer:
+        writer.write(values)
+    return path
+
+
+class StoredTrajectory:
+    """
+    分块压缩轨迹目录的惰性读取，查询接口与 BeliefTrajectory 一致
+
+    只解压查询涉及的 (时间块, 用户块)：读取一段步数或一部分用户的代价
+    与目录总大小无关；差分编码时按整个时间块解码后再截取
+
+    属性:
+        num_users / dim / start / quantize / delta / metadata: 见 trajectory.json 清单
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'trajectory.json'), encoding='utf-8') as f:
+            info = json.load(f)
+        self.num_users = info['num_users']
+        self.dim = info['dim']
+        self.start = info['start']
+        self._steps = info['steps']
+        self.time_chunk = info['time_chunk']
+        self.agent_chunk = info['agent_chunk']
+        self.quantize = info['quantize']
+        self.delta = info['delta']
+        self.metadata = info['metadata']
+
+    def __len__(self):
+        return self._steps
+
+    @property
+    def steps(self):
+        """每条记录对应的步数"""
+        return np.arange(self.start, self.start + len(self))
+
+    def _chunk(self, t, a):
+        """读取并解码一个块"""
+        with np.load(os.path.join(self.path, f'chunk_{t:06d}_{a:06d}.npz')) as archive:
+            return _decode(archive['data'], self.quantize, self.delta)
+
+    def read(self, start=None, stop=None, agents=None):
+        """
+        读取步数区间 [start, stop) 内、指定用户的信念
+
+        Args:
+            start / stop: 步数区间（None 表示到记录的开头 / 结尾）
+            agents: 用户编号数组或切片（None 表示全部用户）
+
+        Returns:
+            (步数, 用户数[, 维度]) 的 float64 数组
+        """
+        begin = self.start if start is None else max(start, self.start)
+        end = self.start + len(self) if stop is None else min(stop, self.start + len(self))
+        first, last = begin - self.start, max(end, begin) - self.start
+        if agents is None:
+            agents = np.arange(self.num_users)
+        elif isinstance(agents, slice):
+            agents = np.arange(self.num_users)[agents]
+        agents = np.atleast_1d(np.asarray(agents, dtype=np.int64))
+
+        shape = (last - first, len(agents)) + (() if self.dim == 1 else (self.dim,))
+        result = np.empty(shape)
+        agent_chunks = agents // self.agent_chunk
+        for t in range(first // self.time_chunk, (last - 1) // self.time_chunk + 1 if last > first else 0):
+            rows = slice(max(first, t * self.time_chunk) - t * self.time_chunk,
+                         min(last, (t + 1) * self.time_chunk) - t * self.time_chunk)
+            target = slice(t * self.time_chunk + rows.start - first, t * self.time_chunk + rows.stop - first)
+            for a in np.unique(agent_chunks):
+                columns = np.flatnonzero(agent_chunks == a)
+                block = self._chunk(t, a)
+                result[target, columns] = block[rows, agents[columns] - a * self.agent_chunk]
+        return result
+
+    def at(self, step):
+        """第 step 步时全体用户的信念（负数表示从末尾倒数）"""
+        if step < 0:
+            step += self.start + len(self)
+        if not self.start <= step < self.start + len(self):
+            raise IndexError(f"步数 {step} 不在记录范围 [{self.start}, {self.start + len(self)}) 内")
+        return self.read(step, step + 1)[0]
+
+    @property
+    def initial(self):
+        """第一条记录"""
+        return self.at(self.start)
+
+    @property
+    def final(self):
+        """最后一条记录"""
+        return self.at(-1)
+
+    def agent(self, index):
+        """一个用户在全部步上的信念路径（只读取该用户所在的用户块）"""
+        return self.read(agents=[index])[:, 0]
+
+    def window(self, start=None, stop=None):
+        """步数区间 [start, stop) 内的全部记录"""
+        return self.read(start, stop)
+
+    def primary(self, values):
+        """第一个话题维度（一维时原样返回）"""
+        return values if self.dim == 1 else values[..., 0]
+
+    def distribution(self, step, bins=20, density=False):
+        """第 step 步的信念分布（[-1, 1] 上的固定分箱，按第一个话题维度）"""
+        return np.histogram(self.primary(self.at(step)), bins=bins, range=(-1.0, 1.0), density=density)
+
+    def quantile_bands(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95), start=None, stop=None):
+        """每步信念的分位数带，逐个时间块计算，内存只占一个时间块"""
+        begin = self.start if start is None else max(start, self.start)
+        end = self.start + len(self) if stop is None else min(stop, self.start + len(self))
+        bands = [np.quantile(self.primary(self.read(low, min(low + self.time_chunk, end))), quantiles, axis=1)
+                 for low in range(begin, end, self.time_chunk)]
+        return np.concatenate(bands, axis=1) if bands else np.empty((len(quantiles), 0))
+
+    def load(self):
+        """全部读入内存，返回 BeliefTrajectory"""
+        values = self.read()
+        trajectory = BeliefTrajectory(self.num_users, self.dim, capacity=max(len(values), 1))
+        for row in values:
+            trajectory.record(row)
+        trajectory.start = self.start
+        return trajectory